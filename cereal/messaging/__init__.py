@@ -19,8 +19,8 @@ except ImportError:
 
 context = Context()
 
-def new_message(service=None, size=None):
-  dat = log.Event.new_message()
+def new_message(service=None, size=None, num_first_segment_words=None):
+  dat = log.Event.new_message(num_first_segment_words=num_first_segment_words)
   dat.logMonoTime = int(sec_since_boot() * 1e9)
   dat.valid = True
   if service is not None:
@@ -51,35 +51,18 @@ def sub_sock(endpoint, poller=None, addr="127.0.0.1", conflate=False, timeout=No
 def drain_sock_raw(sock, wait_for_one=False):
   """Receive all message currently available on the queue"""
   ret = []
-  while 1:
-    if wait_for_one and len(ret) == 0:
-      dat = sock.receive()
-    else:
-      dat = sock.receive(non_blocking=True)
-
+  if wait_for_one:
+    dat = sock.receive()
     if dat is None:
-      break
-
+      return ret
     ret.append(dat)
 
+  ret += sock.receive_many()
   return ret
 
 def drain_sock(sock, wait_for_one=False):
   """Receive all message currently available on the queue"""
-  ret = []
-  while 1:
-    if wait_for_one and len(ret) == 0:
-      dat = sock.receive()
-    else:
-      dat = sock.receive(non_blocking=True)
-
-    if dat is None: # Timeout hit
-      break
-
-    dat = log.Event.from_bytes(dat)
-    ret.append(dat)
-
-  return ret
+  return [log.Event.from_bytes(dat) for dat in drain_sock_raw(sock, wait_for_one=wait_for_one)]
 
 
 # TODO: print when we drop packets?
@@ -87,16 +70,14 @@ def recv_sock(sock, wait=False):
   """Same as drain sock, but only returns latest message. Consider using conflate instead."""
   dat = None
 
-  while 1:
-    if wait and dat is None:
-      rcv = sock.receive()
-    else:
-      rcv = sock.receive(non_blocking=True)
-
-    if rcv is None: # Timeout hit
-      break
+  if wait:
+    dat = sock.receive()
+    if dat is None: # Timeout hit
+      return None
 
-    dat = rcv
+  rcv = sock.receive_many()
+  if len(rcv):
+    dat = rcv[-1]
 
   if dat is not None:
     dat = log.Event.from_bytes(dat)
@@ -129,8 +110,28 @@ def get_one_can(logcan):
     if len(can.can) > 0:
       return can
 
+class LazyDict(dict):
+  """Dict whose values are decoded on first read, see SubMaster(lazy=True)"""
+  def __init__(self, resolve, *args):
+    super().__init__(*args)
+    self.resolve = resolve
+
+  def __getitem__(self, s):
+    self.resolve(s)
+    return dict.__getitem__(self, s)
+
+  def get(self, s, default=None):
+    return self[s] if s in self else default
+
+  def values(self):
+    return [self[s] for s in self]
+
+  def items(self):
+    return [(s, self[s]) for s in self]
+
+
 class SubMaster():
-  def __init__(self, services, ignore_alive=None, addr="127.0.0.1"):
+  def __init__(self, services, ignore_alive=None, addr="127.0.0.1", lazy=False):
     self.poller = Poller()
     self.frame = -1
     self.updated = {s : False for s in services}
@@ -143,6 +144,16 @@ class SubMaster():
     self.logMonoTime = {}
     self.valid = {}
 
+    # in lazy mode the raw payload is kept and only decoded when the service is read
+    self.lazy = lazy
+    self.pending = {}
+    self.pending_data = {}
+    self.service_by_sock = {}
+    if lazy:
+      self.data = LazyDict(self.decode_data)
+      self.logMonoTime = LazyDict(self.decode_event)
+      self.valid = LazyDict(self.decode_event)
+
     if ignore_alive is not None:
       self.ignore_alive = ignore_alive
     else:
@@ -151,6 +162,7 @@ class SubMaster():
     for s in services:
       if addr is not None:
         self.sock[s] = sub_sock(s, poller=self.poller, addr=addr, conflate=True)
+        self.service_by_sock[self.sock[s]] = s
       self.freq[s] = service_list[s].frequency
 
       try:
@@ -166,11 +178,43 @@ class SubMaster():
   def __getitem__(self, s):
     return self.data[s]
 
+  def decode_event(self, s):
+    # only the Event header, enough for logMonoTime and valid
+    dat = self.pending.pop(s, None)
+    if dat is not None:
+      msg = log.Event.from_bytes(dat)
+      dict.__setitem__(self.logMonoTime, s, msg.logMonoTime)
+      dict.__setitem__(self.valid, s, msg.valid)
+      self.pending_data[s] = msg
+
+  def decode_data(self, s):
+    self.decode_event(s)
+    msg = self.pending_data.pop(s, None)
+    if msg is not None:
+      dict.__setitem__(self.data, s, getattr(msg, s))
+
   def update(self, timeout=1000):
-    msgs = []
-    for sock in self.poller.poll(timeout):
-      msgs.append(recv_one_or_none(sock))
-    self.update_msgs(sec_since_boot(), msgs)
+    # sockets are conflated, so there is at most one message per socket
+    ready = self.poller.poll_and_receive(timeout, 1)
+    if self.lazy:
+      raw = {self.service_by_sock[sock]: dats[-1] for sock, dats in ready}
+      self.update_raw(sec_since_boot(), raw)
+    else:
+      msgs = [log.Event.from_bytes(dats[-1]) for _, dats in ready]
+      self.update_msgs(sec_since_boot(), msgs)
+
+  def update_raw(self, cur_time, raw):
+    """Like update_msgs, but takes a dict of service -> undecoded payload"""
+    self.frame += 1
+    self.updated = dict.fromkeys(self.updated, False)
+    for s, dat in raw.items():
+      self.updated[s] = True
+      self.rcv_time[s] = cur_time
+      self.rcv_frame[s] = self.frame
+      self.pending[s] = dat
+      self.pending_data.pop(s, None)
+
+    self.update_alive(cur_time)
 
   def update_msgs(self, cur_time, msgs):
     # TODO: add optional input that specify the service to wait for
@@ -184,10 +228,15 @@ class SubMaster():
       self.updated[s] = True
       self.rcv_time[s] = cur_time
       self.rcv_frame[s] = self.frame
+      self.pending.pop(s, None)
+      self.pending_data.pop(s, None)
       self.data[s] = getattr(msg, s)
       self.logMonoTime[s] = msg.logMonoTime
       self.valid[s] = msg.valid
 
+    self.update_alive(cur_time)
+
+  def update_alive(self, cur_time):
     for s in self.data:
       # arbitrary small number to avoid float comparison. If freq is 0, we can skip the check
       if self.freq[s] > 1e-5:
@@ -215,11 +264,23 @@ class SubMaster():
 class PubMaster():
   def __init__(self, services):
     self.sock = {}
+    self.msg_words = {}
     for s in services:
       self.sock[s] = pub_sock(s)
 
+  def new_message(self, s, size=None):
+    """Same as new_message, but the first segment is sized from the largest message sent
+    on this service so far. The builder then fits in a single arena allocation instead of
+    growing one segment at a time, and to_bytes copies one contiguous segment."""
+    return new_message(s, size, self.msg_words.get(s))
+
   def send(self, s, dat):
     # accept either bytes or capnp builder
     if not isinstance(dat, bytes):
       dat = dat.to_bytes()
+
+    words = len(dat) // 8
+    if words > self.msg_words.get(s, 0):
+      self.msg_words[s] = words
+
     self.sock[s].send(dat)
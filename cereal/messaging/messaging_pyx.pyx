@@ -42,9 +42,11 @@ cdef class Context:
 cdef class Poller:
   cdef cppPoller * poller
   cdef list sub_sockets
+  cdef dict sub_sockets_by_ptr
 
   def __cinit__(self):
     self.sub_sockets = []
+    self.sub_sockets_by_ptr = {}
     self.poller = cppPoller.create()
 
   def __dealloc__(self):
@@ -52,6 +54,7 @@ cdef class Poller:
 
   def registerSocket(self, SubSocket socket):
     self.sub_sockets.append(socket)
+    self.sub_sockets_by_ptr[<size_t>socket.socket] = socket
     self.poller.registerSocket(socket.socket)
 
   def poll(self, timeout):
@@ -61,13 +64,30 @@ cdef class Poller:
     with nogil:
         result = self.poller.poll(t)
 
+    # Return the registered objects instead of wrapping the raw pointers,
+    # this avoids creating a throwaway socket and lets callers key on them
     for s in result:
-        socket = SubSocket()
-        socket.setPtr(s)
-        sockets.append(socket)
+        sockets.append(self.sub_sockets_by_ptr[<size_t>s])
 
     return sockets
 
+  def poll_and_receive(self, timeout, int max_msgs=-1):
+    """Poll and drain every ready socket, returns a list of (socket, [payloads])"""
+    cdef int t = timeout
+    cdef SubSocket socket
+
+    with nogil:
+        result = self.poller.poll(t)
+
+    ret = []
+    for s in result:
+        socket = self.sub_sockets_by_ptr[<size_t>s]
+        msgs = socket.receive_many(max_msgs)
+        if len(msgs):
+          ret.append((socket, msgs))
+
+    return ret
+
 cdef class SubSocket:
   cdef cppSubSocket * socket
   cdef bool is_owner
@@ -119,6 +139,23 @@ cdef class SubSocket:
 
       return m
 
+  cpdef list receive_many(self, int max_msgs=-1):
+    """Non-blocking receive of up to max_msgs queued messages, -1 for all of them"""
+    cdef cppMessage * msg
+    cdef list msgs = []
+    cdef int n = 0
+
+    while max_msgs < 0 or n < max_msgs:
+      msg = self.socket.receive(True)
+      if msg == NULL:
+        break
+
+      msgs.append(msg.getData()[:msg.getSize()])
+      del msg
+      n += 1
+
+    return msgs
+
 
 cdef class PubSocket:
   cdef cppPubSocket * socket
@@ -140,9 +177,15 @@ cdef class PubSocket:
       else:
         raise MessagingError
 
-  def send(self, string data):
+  def send(self, data):
+    cdef char * ptr
+
+    # bytes and bytearray are sent straight from their buffer, without a copy into a std::string
+    if isinstance(data, str):
+      data = data.encode('utf8')
+    ptr = data
     length = len(data)
-    r = self.socket.send(<char*>data.c_str(), length)
+    r = self.socket.send(ptr, length)
 
     if r != length:
       if errno.errno == errno.EADDRINUSE:
@@ -118,6 +118,53 @@ class TestPoller(unittest.TestCase):
     del sub
     context.term()
 
+  def test_receive_many(self):
+    context = messaging.Context()
+
+    pub = messaging.PubSocket()
+    pub.connect(context, 'controlsState')
+
+    sub = messaging.SubSocket()
+    sub.connect(context, 'controlsState')
+
+    time.sleep(0.1)  # Slow joiner
+
+    for i in range(10):
+      pub.send(str(i))
+    time.sleep(0.1)
+
+    r = sub.receive_many(3)
+    r += sub.receive_many()
+    self.assertEqual([str(i).encode('utf8') for i in range(10)], r)
+    self.assertEqual([], sub.receive_many())
+
+    del pub
+    del sub
+    context.term()
+
+  def test_poll_and_receive(self):
+    context = messaging.Context()
+
+    pub = messaging.PubSocket()
+    pub.connect(context, 'controlsState')
+
+    p = messaging.Poller()
+    sub = messaging.SubSocket()
+    sub.connect(context, 'controlsState')
+    p.registerSocket(sub)
+
+    time.sleep(0.1)  # Slow joiner
+    pub.send('a')
+    pub.send('b')
+    time.sleep(0.1)
+
+    result = p.poll_and_receive(1000)
+    self.assertEqual([(sub, [b'a', b'b'])], result)
+
+    del pub
+    del sub
+    context.term()
+
   def test_conflate(self):
     context = messaging.Context()
 
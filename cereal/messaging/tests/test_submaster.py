@@ -0,0 +1,55 @@
+import unittest
+import cereal.messaging as messaging
+
+
+def car_state_bytes(v_ego, valid=True):
+  dat = messaging.new_message('carState')
+  dat.valid = valid
+  dat.carState.vEgo = v_ego
+  return dat.to_bytes()
+
+
+class TestSubMaster(unittest.TestCase):
+  def test_lazy_matches_eager(self):
+    eager = messaging.SubMaster(['carState', 'controlsState'], addr=None)
+    lazy = messaging.SubMaster(['carState', 'controlsState'], addr=None, lazy=True)
+
+    dat = car_state_bytes(13.5, valid=False)
+    eager.update_msgs(1., [messaging.log.Event.from_bytes(dat)])
+    lazy.update_raw(1., {'carState': dat})
+
+    self.assertEqual(eager.updated, lazy.updated)
+    self.assertEqual(eager.rcv_frame, lazy.rcv_frame)
+    self.assertEqual(eager.alive, lazy.alive)
+    self.assertEqual(eager['carState'].vEgo, lazy['carState'].vEgo)
+    self.assertEqual(eager.logMonoTime['carState'], lazy.logMonoTime['carState'])
+    self.assertEqual(eager.valid['carState'], lazy.valid['carState'])
+    self.assertEqual(eager.all_valid(), lazy.all_valid())
+
+  def test_lazy_decodes_on_access(self):
+    sm = messaging.SubMaster(['carState'], addr=None, lazy=True)
+
+    sm.update_raw(1., {'carState': car_state_bytes(1.)})
+    sm.update_raw(2., {'carState': car_state_bytes(2.)})
+    self.assertIn('carState', sm.pending)
+
+    # header fields don't decode the service struct
+    self.assertTrue(sm.valid['carState'])
+    self.assertNotIn('carState', sm.pending)
+    self.assertIn('carState', sm.pending_data)
+
+    self.assertEqual(sm['carState'].vEgo, 2.)
+    self.assertNotIn('carState', sm.pending_data)
+
+  def test_lazy_keeps_last_value(self):
+    sm = messaging.SubMaster(['carState', 'controlsState'], addr=None, lazy=True)
+
+    sm.update_raw(1., {'carState': car_state_bytes(3.)})
+    sm.update_raw(2., {})
+    self.assertFalse(sm.updated['carState'])
+    self.assertEqual(sm['carState'].vEgo, 3.)
+    self.assertEqual(dict(sm.valid.items()), {'carState': True, 'controlsState': True})
+
+
+if __name__ == "__main__":
+  unittest.main()
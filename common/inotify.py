@@ -0,0 +1,90 @@
+"""Minimal ctypes binding for Linux inotify.
+
+HAS_INOTIFY is False on platforms without it (e.g. macOS), callers should fall back to polling.
+"""
+import os
+import errno
+import select
+import struct
+import ctypes
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+try:
+  _libc = ctypes.CDLL(None, use_errno=True)
+  _inotify_init1 = _libc.inotify_init1
+  _inotify_add_watch = _libc.inotify_add_watch
+  _inotify_rm_watch = _libc.inotify_rm_watch
+  _inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+  HAS_INOTIFY = True
+except (OSError, AttributeError):
+  HAS_INOTIFY = False
+
+
+class Inotify():
+  def __init__(self):
+    if not HAS_INOTIFY:
+      raise OSError(errno.ENOSYS, "inotify is not available")
+
+    self.fd = _inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if self.fd < 0:
+      e = ctypes.get_errno()
+      raise OSError(e, os.strerror(e))
+
+  def fileno(self):
+    return self.fd
+
+  def add_watch(self, path, mask):
+    wd = _inotify_add_watch(self.fd, path.encode('utf8'), mask)
+    if wd < 0:
+      e = ctypes.get_errno()
+      raise OSError(e, os.strerror(e), path)
+    return wd
+
+  def rm_watch(self, wd):
+    _inotify_rm_watch(self.fd, wd)
+
+  def read(self, timeout=None):
+    """Returns a list of (wd, mask, name) tuples, or an empty list if timeout (in seconds) expired"""
+    if timeout is not None:
+      timeout = max(timeout, 0.)
+    ready, _, _ = select.select([self.fd], [], [], timeout)
+    if not ready:
+      return []
+
+    try:
+      buf = os.read(self.fd, 4096)
+    except BlockingIOError:
+      return []
+
+    events = []
+    i = 0
+    while i + _EVENT_HEADER.size <= len(buf):
+      wd, mask, _, length = _EVENT_HEADER.unpack_from(buf, i)
+      i += _EVENT_HEADER.size
+      name = buf[i:i + length].rstrip(b'\0').decode('utf8')
+      i += length
+      events.append((wd, mask, name))
+    return events
+
+  def close(self):
+    if self.fd is not None:
+      os.close(self.fd)
+      self.fd = None
+
+  def __enter__(self): return self
+
+  def __exit__(self, type, value, traceback):
+    self.close()
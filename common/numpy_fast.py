@@ -1,3 +1,6 @@
+from bisect import bisect_left
+
+
 def int_rnd(x):
   return int(round(x))
 
@@ -7,15 +10,47 @@ def clip(x, lo, hi):
 def interp(x, xp, fp):
   N = len(xp)
   def get_interp(xv):
-    hi = 0
-    while hi < N and xv > xp[hi]:
-      hi += 1
+    hi = bisect_left(xp, xv)
+    if hi == N:
+      return fp[-1]
+    if hi == 0:
+      return fp[0]
     low = hi - 1
-    return fp[-1] if hi == N and xv > xp[low] else (
-      fp[0] if hi == 0 else
-      (xv - xp[low]) * (fp[hi] - fp[low]) / (xp[hi] - xp[low]) + fp[low])
+    return (xv - xp[low]) * (fp[hi] - fp[low]) / (xp[hi] - xp[low]) + fp[low]
   return [get_interp(v) for v in x] if hasattr(
     x, '__iter__') else get_interp(x)
 
+
+class Interp1D():
+  """interp with the breakpoints xp and values fp fixed, for tables looked up every cycle.
+  The segments are computed once, and give the same results as interp."""
+  def __init__(self, xp, fp):
+    self.xp = list(xp)
+    self.fp = list(fp)
+    assert len(self.xp) == len(self.fp)
+    self.n = len(self.xp)
+    # segment ending at breakpoint i: start x, start value, value change and length
+    self.segments = [None] + [(self.xp[i - 1], self.fp[i - 1], self.fp[i] - self.fp[i - 1], self.xp[i] - self.xp[i - 1])
+                              for i in range(1, self.n)]
+
+  def get(self, x):
+    hi = bisect_left(self.xp, x)
+    if hi == self.n:
+      return self.fp[-1]
+    if hi == 0:
+      return self.fp[0]
+    x0, f0, df, dx = self.segments[hi]
+    return (x - x0) * df / dx + f0
+
+  def __call__(self, x):
+    if not hasattr(x, '__iter__'):
+      return self.get(x)
+    if hasattr(x, 'ndim'):
+      # numpy arrays are interpolated in one go
+      import numpy as np  # pylint: disable=import-outside-toplevel
+      return np.interp(x, self.xp, self.fp)
+    return [self.get(v) for v in x]
+
+
 def mean(x):
   return sum(x) / len(x)
@@ -19,6 +19,11 @@ before deleting the old <params_dir>/<d> directory.
 
 Writers that only modify a single key can simply take the lock, then swap the corresponding value
 file in place without messing with <params_dir>/d.
+
+Writers that atomically modify a few keys (put_many) avoid the full copy with a journal. New values
+are staged as temp files in <params_dir>, then "<params_dir>/.journal" listing every rename and
+delete is committed with an atomic rename, and only then applied to <params_dir>/d. A journal left
+behind by a crash is replayed by the next writer, before it changes anything.
 """
 import time
 import os
@@ -30,8 +35,12 @@ import shutil
 import fcntl
 import tempfile
 import threading
+import traceback
+import atexit
+import json
 from enum import Enum
 from common.basedir import PARAMS
+from common.inotify import Inotify, HAS_INOTIFY, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW
 
 def mkdirs_exists_ok(path):
   try:
@@ -222,6 +231,7 @@ class DBWriter(DBAccessor):
     try:
       os.chmod(self._path, 0o777)
       self._lock = self._get_lock(True)
+      replay_journal(self._path)
       self._vals = self._read_values_locked()
     except:
       os.umask(self._prev_umask)
@@ -304,41 +314,301 @@ def read_db(params_path, key):
   except IOError:
     return None
 
+def _poll_db(params_path, key, end_time):
+  while 1:
+    ret = read_db(params_path, key)
+    if ret is not None or (end_time is not None and time.monotonic() > end_time):
+      return ret
+    time.sleep(0.05)
+
+def wait_db(params_path, key, timeout=None):
+  """Block until key exists and return its value, or None if timeout (in seconds) expires.
+
+  Readers sleep on inotify and wake when write_db renames a value into <params_dir>/d, or when
+  a DBWriter swaps the <params_dir>/d symlink. Without inotify this falls back to polling."""
+  end_time = None if timeout is None else time.monotonic() + timeout
+
+  if not HAS_INOTIFY:
+    return _poll_db(params_path, key, end_time)
+
+  try:
+    ino = Inotify()
+  except OSError:
+    return _poll_db(params_path, key, end_time)
+
+  with ino:
+    try:
+      ino.add_watch(params_path, IN_MOVED_TO)
+    except OSError:
+      return _poll_db(params_path, key, end_time)
+
+    while 1:
+      # (re)watch whatever d points to now, before reading, so a write in between is not missed
+      try:
+        ino.add_watch(os.path.join(params_path, "d"), IN_MOVED_TO | IN_CREATE)
+      except OSError:
+        pass
+
+      ret = read_db(params_path, key)
+      if ret is not None:
+        return ret
+
+      remaining = None
+      if end_time is not None:
+        remaining = end_time - time.monotonic()
+        if remaining <= 0:
+          return None
+      ino.read(remaining)
+
 def write_db(params_path, key, value):
-  if isinstance(value, str):
-    value = value.encode('utf8')
+  write_db_many(params_path, {key: value})
+
+def write_db_many(params_path, vals):
+  """Write several keys under one lock acquisition, with a single fsync of the data directory"""
+  prev_umask = os.umask(0)
+  lock = FileLock(params_path+"/.lock", True)
+  lock.acquire()
 
+  try:
+    replay_journal(params_path)
+
+    data_path = "%s/d" % params_path
+    for key, value in vals.items():
+      if isinstance(value, str):
+        value = value.encode('utf8')
+
+      tmp_path = tempfile.mktemp(prefix=".tmp", dir=params_path)
+      with open(tmp_path, "wb") as f:
+        f.write(value)
+        f.flush()
+        os.fsync(f.fileno())
+
+      os.rename(tmp_path, os.path.join(data_path, key))
+    fsync_dir(data_path)
+  finally:
+    os.umask(prev_umask)
+    lock.release()
+
+def replay_journal(params_path, ops=None):
+  """Apply a committed put_many journal and remove it. Callers should hold the lock."""
+  journal_path = os.path.join(params_path, ".journal")
+  if ops is None:
+    try:
+      with open(journal_path) as f:
+        ops = json.load(f)
+    except (OSError, IOError):
+      return
+
+  data_path = os.path.join(params_path, "d")
+  for key, tmp_name in ops:
+    try:
+      if tmp_name is None:
+        os.remove(os.path.join(data_path, key))
+      else:
+        os.rename(os.path.join(params_path, tmp_name), os.path.join(data_path, key))
+    except FileNotFoundError:
+      # already applied before the crash
+      pass
+  fsync_dir(data_path)
+
+  os.remove(journal_path)
+  fsync_dir(params_path)
+
+def write_db_atomic(params_path, vals):
+  """Atomically put several keys, a value of None deletes the key. Only the affected keys are written."""
   prev_umask = os.umask(0)
   lock = FileLock(params_path+"/.lock", True)
   lock.acquire()
 
   try:
-    tmp_path = tempfile.mktemp(prefix=".tmp", dir=params_path)
-    with open(tmp_path, "wb") as f:
-      f.write(value)
+    replay_journal(params_path)
+
+    # stage the new values
+    ops = []
+    for key, value in vals.items():
+      if value is None:
+        ops.append((key, None))
+        continue
+
+      if isinstance(value, str):
+        value = value.encode('utf8')
+
+      fd, tmp_path = tempfile.mkstemp(prefix=".tmp", dir=params_path)
+      with os.fdopen(fd, "wb") as f:
+        f.write(value)
+        f.flush()
+        os.fsync(f.fileno())
+      os.chmod(tmp_path, 0o666)
+      ops.append((key, os.path.basename(tmp_path)))
+
+    # commit
+    journal_path = os.path.join(params_path, ".journal")
+    with open(journal_path + ".tmp", "w") as f:
+      json.dump(ops, f)
       f.flush()
       os.fsync(f.fileno())
+    os.rename(journal_path + ".tmp", journal_path)
+    fsync_dir(params_path)
 
-    path = "%s/d/%s" % (params_path, key)
-    os.rename(tmp_path, path)
-    fsync_dir(os.path.dirname(path))
+    replay_journal(params_path, ops)
   finally:
     os.umask(prev_umask)
     lock.release()
 
+class ParamsCache():
+  """Per-process read-through cache of a params directory.
+
+  Values are invalidated by an inotify watch on <params_dir>/d (and on the d symlink itself),
+  so a hit costs no syscalls. Without inotify, cached values are validated with a single stat
+  of the value file (inode, mtime and size) instead of an open/read/close.
+  """
+  def __init__(self, db):
+    self.db = db
+    self.pid = os.getpid()
+    self.hits = 0
+    self.misses = 0
+
+    self._vals = {}
+    self._lock = threading.Lock()
+    self._generation = 0
+    self._ino = None
+    self._thread = None
+    self._closed = False
+
+    if HAS_INOTIFY:
+      try:
+        self._ino = Inotify()
+        self._db_wd = self._ino.add_watch(db, IN_MOVED_TO)
+        self._data_wd = self._watch_data()
+      except OSError:
+        if self._ino is not None:
+          self._ino.close()
+        self._ino = None
+
+    if self._ino is not None:
+      self._thread = threading.Thread(target=self._watch_thread, daemon=True)
+      self._thread.start()
+
+  def _watch_data(self):
+    return self._ino.add_watch(os.path.join(self.db, "d"), IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE)
+
+  def _watch_thread(self):
+    while not self._closed:
+      # the timeout bounds how long close() can wait for this thread
+      for wd, mask, name in self._ino.read(timeout=1.):
+        if mask & IN_Q_OVERFLOW or (wd == self._db_wd and name == "d"):
+          # d points to a new directory, start watching it before dropping everything
+          try:
+            self._data_wd = self._watch_data()
+          except OSError:
+            pass
+          self.clear()
+        elif wd == self._data_wd:
+          self.invalidate(name)
+
+  def close(self):
+    """Stops the watcher thread and releases the inotify fd"""
+    if self._ino is None or self._closed:
+      return
+    self._closed = True
+    if self._thread is not None and self._thread.is_alive():
+      # removing the watches queues IN_IGNORED events, which wake the thread right away
+      for wd in (self._db_wd, self._data_wd):
+        self._ino.rm_watch(wd)
+      if self._thread is not threading.current_thread():
+        self._thread.join()
+    self._ino.close()
+
+  def invalidate(self, key):
+    with self._lock:
+      self._generation += 1
+      self._vals.pop(key, None)
+
+  def clear(self):
+    with self._lock:
+      self._generation += 1
+      self._vals.clear()
+
+  def get(self, key):
+    path = os.path.join(self.db, "d", key)
+
+    if self._ino is not None:
+      try:
+        ret = self._vals[key]
+        self.hits += 1
+        return ret
+      except KeyError:
+        pass
+    else:
+      try:
+        st = os.stat(path)
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+      except OSError:
+        stamp = None
+
+      cached = self._vals.get(key)
+      if cached is not None and cached[0] == stamp:
+        self.hits += 1
+        return cached[1]
+
+    self.misses += 1
+    generation = self._generation
+    ret = read_db(self.db, key)
+
+    with self._lock:
+      # skip storing if the value changed while it was being read
+      if generation == self._generation:
+        self._vals[key] = ret if self._ino is not None else (stamp, ret)
+    return ret
+
+
+_caches = {}
+
+def get_params_cache(db):
+  cache = _caches.get(db)
+  # the watcher thread does not survive a fork, children need their own cache
+  if cache is None or cache.pid != os.getpid():
+    cache = _caches[db] = ParamsCache(db)
+  return cache
+
+
+def _close_cache(db):
+  # the next get_params_cache starts a new cache, watching the new d directory
+  cache = _caches.pop(db, None)
+  if cache is not None and cache.pid == os.getpid():
+    cache.close()
+
+
+def _invalidate_cache(db, key=None):
+  # writes from this process don't wait for the watcher thread to catch up
+  cache = _caches.get(db)
+  if cache is not None:
+    if key is None:
+      cache.clear()
+    else:
+      cache.invalidate(key)
+
+
 class Params():
-  def __init__(self, db=PARAMS):
+  def __init__(self, db=PARAMS, cache=False):
     self.db = db
+    self.use_cache = cache
 
     # create the database if it doesn't exist...
     if not os.path.exists(self.db+"/d"):
       with self.transaction(write=True):
         pass
 
+  @property
+  def cache(self):
+    """The process-wide ParamsCache of db, None without cache=True"""
+    return get_params_cache(self.db) if self.use_cache else None
+
   def clear_all(self):
     shutil.rmtree(self.db, ignore_errors=True)
     with self.transaction(write=True):
       pass
+    _close_cache(self.db)
 
   def transaction(self, write=False):
     if write:
@@ -347,10 +617,7 @@ class Params():
       return DBReader(self.db)
 
   def _clear_keys_with_type(self, tx_type):
-    with self.transaction(write=True) as txn:
-      for key in keys:
-        if tx_type in keys[key]:
-          txn.delete(key)
+    self.put_many({key: None for key in keys if tx_type in keys[key]})
 
   def manager_start(self):
     self._clear_keys_with_type(TxType.CLEAR_ON_MANAGER_START)
@@ -359,19 +626,20 @@ class Params():
     self._clear_keys_with_type(TxType.CLEAR_ON_PANDA_DISCONNECT)
 
   def delete(self, key):
-    with self.transaction(write=True) as txn:
-      txn.delete(key)
+    self.put_many({key: None})
 
-  def get(self, key, block=False, encoding=None):
+  def get(self, key, block=False, encoding=None, timeout=None):
+    """Returns None if the key is not set. With block=True, waits until the key is written,
+    or until timeout (in seconds) expires."""
     if key not in keys:
       raise UnknownKeyName(key)
 
-    while 1:
+    if block:
+      ret = wait_db(self.db, key, timeout)
+    elif self.use_cache:
+      ret = get_params_cache(self.db).get(key)
+    else:
       ret = read_db(self.db, key)
-      if not block or ret is not None:
-        break
-      # is polling really the best we can do?
-      time.sleep(0.05)
 
     if ret is not None and encoding is not None:
       ret = ret.decode(encoding)
@@ -391,16 +659,93 @@ class Params():
       raise UnknownKeyName(key)
 
     write_db(self.db, key, dat)
+    _invalidate_cache(self.db, key)
+
+  def put_many(self, vals):
+    """Atomically write several keys, a value of None deletes the key.
+    Blocks until written to disk, like put."""
+    for key in vals:
+      if key not in keys:
+        raise UnknownKeyName(key)
+
+    write_db_atomic(self.db, vals)
+    for key in vals:
+      _invalidate_cache(self.db, key)
+
+
+class ParamsWriter():
+  """Single background writer per process and params directory, used by put_nonblocking.
+
+  Repeated puts of a key are coalesced, only the last value is written. Everything queued
+  while the previous batch was being written goes to disk under one lock acquisition and
+  one directory fsync.
+  """
+  def __init__(self, db):
+    self.db = db
+    self.pid = os.getpid()
+
+    self._pending = {}
+    self._cv = threading.Condition()
+    self._queued = 0
+    self._written = 0
+
+    threading.Thread(target=self._writer_thread, daemon=True).start()
+
+  def put(self, key, val):
+    with self._cv:
+      self._pending[key] = val
+      self._queued += 1
+      self._cv.notify_all()
+
+  def flush(self, timeout=None):
+    """Wait until everything queued before this call is on disk. Returns False on timeout."""
+    with self._cv:
+      target = self._queued
+      return self._cv.wait_for(lambda: self._written >= target, timeout)
+
+  def _writer_thread(self):
+    while 1:
+      with self._cv:
+        self._cv.wait_for(lambda: self._pending)
+        vals, self._pending = self._pending, {}
+        queued = self._queued
+
+      try:
+        write_db_many(self.db, vals)
+      except Exception:
+        traceback.print_exc()
+      finally:
+        for key in vals:
+          _invalidate_cache(self.db, key)
+
+      with self._cv:
+        self._written = queued
+        self._cv.notify_all()
+
+
+_writers = {}
+
+def get_params_writer(db):
+  writer = _writers.get(db)
+  # the writer thread does not survive a fork, children need their own writer
+  if writer is None or writer.pid != os.getpid():
+    writer = _writers[db] = ParamsWriter(db)
+    atexit.register(writer.flush)
+  return writer
+
 
+def put_nonblocking(key, val, db=PARAMS):
+  if key not in keys:
+    raise UnknownKeyName(key)
 
-def put_nonblocking(key, val):
-  def f(key, val):
-    params = Params()
-    params.put(key, val)
+  get_params_writer(db).put(key, val)
 
-  t = threading.Thread(target=f, args=(key, val))
-  t.start()
-  return t
+def flush_nonblocking(db=PARAMS, timeout=None):
+  """Block until all put_nonblocking calls made so far are written. Returns False on timeout."""
+  writer = _writers.get(db)
+  if writer is None or writer.pid != os.getpid():
+    return True
+  return writer.flush(timeout)
 
 
 if __name__ == "__main__":
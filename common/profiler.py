@@ -44,3 +44,75 @@ class Profiler():
         print("%30s: %9.2f   percent: %3.0f" % (n, ms*1000.0, ms/self.tot*100))
     print("Iter clock: %2.6f   TOTAL: %2.2f" % (self.tot/self.iter, self.tot))
 
+
+
+class StageTimer():
+  """Always-on timing of the stages of a process loop. The last `window` durations of every stage
+  are kept in a ring, their p50/p99/max are reported every `report_every` cycles on processStats,
+  or to cloudlog by processes that don't publish it."""
+  def __init__(self, name, window=1000, report_every=100):
+    self.name = name
+    self.window = window
+    self.report_every = report_every
+    self.rings = {}  # stage name -> [durations, samples recorded]
+    self.cycles = 0
+    self.busy = 0.
+    self.last_time = time.monotonic()
+
+  def _record(self, name, dt):
+    ring = self.rings.get(name)
+    if ring is None:
+      ring = self.rings[name] = [[0.] * self.window, 0]
+    ring[0][ring[1] % self.window] = dt
+    ring[1] += 1
+
+  def start(self):
+    self.busy = 0.
+    self.last_time = time.monotonic()
+
+  def checkpoint(self, name, ignore=False):
+    # ignore flag for waiting on sockets, the stage is recorded but not counted in the cycle time
+    t = time.monotonic()
+    dt = t - self.last_time
+    self._record(name, dt)
+    if not ignore:
+      self.busy += dt
+    self.last_time = t
+
+  def end(self, pm=None):
+    """Ends a cycle, the time spent in its stages is recorded as the "cycle" stage"""
+    self._record("cycle", self.busy)
+    self.cycles += 1
+    if self.cycles % self.report_every == 0:
+      self.report(pm)
+
+  def stats(self):
+    """Returns (stage, count, p50, p99, max) of every stage, in ms"""
+    ret = []
+    for name, (durations, n) in self.rings.items():
+      count = min(n, self.window)
+      s = sorted(durations[:count])
+      ret.append((name, count, s[count // 2] * 1e3, s[min(count * 99 // 100, count - 1)] * 1e3, s[-1] * 1e3))
+    return ret
+
+  def report(self, pm=None):
+    # only needed every report_every cycles, Profiler users don't pull these in
+    import cereal.messaging as messaging  # pylint: disable=import-outside-toplevel
+    from selfdrive.swaglog import cloudlog  # pylint: disable=import-outside-toplevel
+
+    stats = self.stats()
+    if pm is None or 'processStats' not in pm.sock:
+      cloudlog.event("processStats", name=self.name, cycles=self.cycles, stages=stats)
+      return
+
+    dat = messaging.new_message('processStats')
+    dat.processStats.name = self.name
+    dat.processStats.cycles = self.cycles
+    stages = dat.processStats.init('stages', len(stats))
+    for stage, (name, count, p50, p99, max_ms) in zip(stages, stats):
+      stage.name = name
+      stage.count = count
+      stage.p50Ms = p50
+      stage.p99Ms = p99
+      stage.maxMs = max_ms
+    pm.send('processStats', dat)
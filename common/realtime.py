@@ -1,9 +1,11 @@
 """Utilities for reading real time clocks and keeping soft real time constraints."""
 import os
+import errno
 import time
 import platform
 import subprocess
 import multiprocessing
+from collections import deque
 from cffi import FFI
 
 from common.common_pyx import sec_since_boot  # pylint: disable=no-name-in-module, import-error
@@ -17,9 +19,27 @@ DT_TRML = 0.5  # thermald and manager
 
 
 ffi = FFI()
-ffi.cdef("long syscall(long number, ...);")
+ffi.cdef("""
+long syscall(long number, ...);
+
+struct timespec { long tv_sec; long tv_nsec; };
+struct itimerspec { struct timespec it_interval; struct timespec it_value; };
+int clock_nanosleep(int clockid, int flags, const struct timespec *request, struct timespec *remain);
+int timerfd_create(int clockid, int flags);
+int timerfd_settime(int fd, int flags, const struct itimerspec *new_value, struct itimerspec *old_value);
+""")
 libc = ffi.dlopen(None)
 
+# absolute deadlines on the clock of sec_since_boot, Linux only
+CLOCK_BOOTTIME = 7
+TIMER_ABSTIME = 1
+TFD_CLOEXEC = 0o2000000
+EINTR = 4
+try:
+  HAS_ABS_SLEEP = platform.system() == "Linux" and bool(libc.clock_nanosleep) and bool(libc.timerfd_create)
+except AttributeError:
+  HAS_ABS_SLEEP = False
+
 
 def set_realtime_priority(level):
   if os.getuid() != 0:
@@ -36,9 +56,30 @@ def set_realtime_priority(level):
   return subprocess.call(['chrt', '-f', '-p', str(level), str(tid)])
 
 
+def _to_timespec(ts, t):
+  ts.tv_sec = int(t)
+  ts.tv_nsec = int((t - ts.tv_sec) * 1e9)
+  return ts
+
+
+def sleep_until(t):
+  """Sleeps until sec_since_boot() reaches t, with clock_nanosleep on an absolute deadline"""
+  ts = _to_timespec(ffi.new("struct timespec *"), t)
+  while libc.clock_nanosleep(CLOCK_BOOTTIME, TIMER_ABSTIME, ts, ffi.NULL) == EINTR:
+    pass
+
+
 class Ratekeeper():
-  def __init__(self, rate, print_delay_threshold=0.):
-    """Rate in Hz for ratekeeping. print_delay_threshold must be nonnegative."""
+  def __init__(self, rate, print_delay_threshold=0., sleep=None, spin=0., stats_window=100):
+    """Rate in Hz for ratekeeping. print_delay_threshold must be nonnegative.
+
+    sleep selects how keep_time waits for the next frame: "relative" sleeps for the remaining time,
+    "clock_nanosleep" and "timerfd" sleep until the frame's absolute deadline, so time spent between
+    computing the remaining time and sleeping doesn't delay the frame. Defaults to clock_nanosleep
+    where available. The last spin seconds before each deadline are busy waited instead of slept,
+    for tight loops that need the least jitter.
+
+    Wake up lateness and loop period jitter are kept over the last stats_window frames, see stats()."""
     self._interval = 1. / rate
     self._next_frame_time = sec_since_boot() + self._interval
     self._print_delay_threshold = print_delay_threshold
@@ -46,6 +87,39 @@ class Ratekeeper():
     self._remaining = 0
     self._process_name = multiprocessing.current_process().name
 
+    if sleep is None:
+      sleep = "clock_nanosleep" if HAS_ABS_SLEEP else "relative"
+    if sleep not in ("relative", "clock_nanosleep", "timerfd"):
+      raise ValueError("unknown sleep strategy %s" % sleep)
+    if sleep != "relative" and not HAS_ABS_SLEEP:
+      raise OSError(errno.ENOSYS, "%s is not available" % sleep)
+    self._sleep = sleep
+    self._spin = spin
+    self._deadline = self._next_frame_time
+
+    self._timerfd = None
+    if sleep == "timerfd":
+      self._timerfd = libc.timerfd_create(CLOCK_BOOTTIME, TFD_CLOEXEC)
+      if self._timerfd < 0:
+        raise OSError(ffi.errno, os.strerror(ffi.errno))
+      self._itimerspec = ffi.new("struct itimerspec *")
+
+    self._last_time = None
+    self._period_errors = deque(maxlen=stats_window)
+    self._wake_late = deque(maxlen=stats_window)
+    self._overruns = 0
+
+  def close(self):
+    """Releases the timerfd of the "timerfd" sleep strategy"""
+    if self._timerfd is not None:
+      os.close(self._timerfd)
+      self._timerfd = None
+
+  def __del__(self):
+    # __init__ may have raised before setting _timerfd
+    if getattr(self, "_timerfd", None) is not None:
+      self.close()
+
   @property
   def frame(self):
     return self._frame
@@ -54,21 +128,64 @@ class Ratekeeper():
   def remaining(self):
     return self._remaining
 
+  def _sleep_until(self, t):
+    if self._sleep == "relative":
+      remaining = t - sec_since_boot()
+      if remaining > 0:
+        time.sleep(remaining)
+    elif self._sleep == "clock_nanosleep":
+      sleep_until(t)
+    else:
+      _to_timespec(self._itimerspec.it_value, t)
+      libc.timerfd_settime(self._timerfd, TIMER_ABSTIME, self._itimerspec, ffi.NULL)
+      while True:
+        try:
+          os.read(self._timerfd, 8)
+          break
+        except InterruptedError:
+          pass
+
   # Maintain loop rate by calling this at the end of each loop
   def keep_time(self):
     lagged = self.monitor_time()
     if self._remaining > 0:
-      time.sleep(self._remaining)
+      deadline = self._deadline
+      if self._spin > 0.:
+        self._sleep_until(deadline - self._spin)
+        while sec_since_boot() < deadline:
+          pass
+      else:
+        self._sleep_until(deadline)
+      self._wake_late.append(sec_since_boot() - deadline)
     return lagged
 
   # this only monitor the cumulative lag, but does not enforce a rate
   def monitor_time(self):
     lagged = False
-    remaining = self._next_frame_time - sec_since_boot()
+    t = sec_since_boot()
+    remaining = self._next_frame_time - t
+    self._deadline = self._next_frame_time
     self._next_frame_time += self._interval
     if self._print_delay_threshold is not None and remaining < -self._print_delay_threshold:
       print("%s lagging by %.2f ms" % (self._process_name, -remaining * 1000))
       lagged = True
+    if remaining < 0:
+      self._overruns += 1
+    if self._last_time is not None:
+      self._period_errors.append(t - self._last_time - self._interval)
+    self._last_time = t
     self._frame += 1
     self._remaining = remaining
     return lagged
+
+  def stats(self):
+    """Returns the frame count, the frames that ended past their deadline, and over the last frames
+    the mean and max absolute error of the loop period and the max wake up lateness, in ms"""
+    errors = [abs(e) for e in self._period_errors]
+    return {
+      'frames': self._frame,
+      'overruns': self._overruns,
+      'jitter_ms': sum(errors) / len(errors) * 1e3 if errors else 0.,
+      'jitter_max_ms': max(errors) * 1e3 if errors else 0.,
+      'wake_late_max_ms': max(self._wake_late) * 1e3 if self._wake_late else 0.,
+    }
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Time a scalar lookup in the kind of small tables controlsd interpolates every cycle, with the interp
+before bisect, interp, Interp1D and np.interp. Also a 192 point array with Interp1D and np.interp."""
+import random
+import timeit
+import numpy as np
+
+from common.numpy_fast import interp, Interp1D
+from common.tests.test_numpy_fast import interp_linear
+
+N = 100000
+
+
+if __name__ == "__main__":
+  random.seed(0)
+  for n in [2, 5, 10]:
+    xp = sorted(random.uniform(0., 40.) for _ in range(n))
+    fp = [random.uniform(-1., 1.) for _ in range(n)]
+    f = Interp1D(xp, fp)
+    xs = [random.uniform(-5., 45.) for _ in range(100)]
+
+    print("%d breakpoints" % n)
+    for name, g in [("linear scan", lambda x: interp_linear(x, xp, fp)),
+                    ("interp", lambda x: interp(x, xp, fp)),
+                    ("Interp1D", f),
+                    ("np.interp", lambda x: np.interp(x, xp, fp))]:
+      dt = timeit.timeit(lambda: [g(x) for x in xs], number=N // len(xs))
+      print("  %-12s %6.3f us/lookup" % (name, dt / N * 1e6))
+
+  x = np.linspace(-5., 45., 192)
+  for name, g in [("Interp1D", f), ("np.interp", lambda x: np.interp(x, xp, fp))]:
+    dt = timeit.timeit(lambda: g(x), number=N // 100)
+    print("192 points %-12s %6.3f us/array" % (name, dt / (N // 100) * 1e6))
@@ -0,0 +1,61 @@
+import random
+import unittest
+import numpy as np
+
+from common.numpy_fast import interp, Interp1D
+
+
+def interp_linear(x, xp, fp):
+  """interp as it was, with a linear scan over xp"""
+  N = len(xp)
+  def get_interp(xv):
+    hi = 0
+    while hi < N and xv > xp[hi]:
+      hi += 1
+    low = hi - 1
+    return fp[-1] if hi == N and xv > xp[low] else (
+      fp[0] if hi == 0 else
+      (xv - xp[low]) * (fp[hi] - fp[low]) / (xp[hi] - xp[low]) + fp[low])
+  return [get_interp(v) for v in x] if hasattr(
+    x, '__iter__') else get_interp(x)
+
+
+def random_table():
+  n = random.randint(1, 6)
+  xp = sorted(random.choice([random.uniform(-10., 40.), float(random.randint(-2, 5))]) for _ in range(n))
+  fp = [random.uniform(-5., 5.) for _ in range(n)]
+  return xp, fp
+
+
+class TestInterp(unittest.TestCase):
+  def test_matches_linear_scan(self):
+    random.seed(0)
+    for _ in range(2000):
+      xp, fp = random_table()
+      f = Interp1D(xp, fp)
+      xs = [random.uniform(-15., 45.) for _ in range(10)] + xp + [float('nan'), float('inf'), -float('inf')]
+      for x in xs:
+        expected = interp_linear(x, xp, fp)
+        for y in (interp(x, xp, fp), f(x)):
+          if expected != expected:
+            self.assertNotEqual(y, y)
+          else:
+            self.assertEqual(y, expected, (x, xp, fp))
+      self.assertEqual(f(xs[:10]), interp_linear(xs[:10], xp, fp))
+
+  def test_numpy_arrays(self):
+    f = Interp1D([0., 10., 20.], [1., 3., 2.])
+    x = np.linspace(-5., 25., 31)
+    out = f(x)
+    self.assertIsInstance(out, np.ndarray)
+    np.testing.assert_allclose(out, interp_linear(list(x), [0., 10., 20.], [1., 3., 2.]))
+    self.assertEqual(f(np.float64(5.)), 2.)
+
+  def test_keeps_endpoint_values(self):
+    f = Interp1D([0, 5], [10, 20])
+    self.assertIs(f(-1), 10)
+    self.assertIs(f(6), 20)
+
+
+if __name__ == "__main__":
+  unittest.main()
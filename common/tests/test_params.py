@@ -0,0 +1,212 @@
+from common.params import Params, UnknownKeyName, put_nonblocking, flush_nonblocking
+import os
+import json
+import threading
+import time
+import tempfile
+import shutil
+import unittest
+
+
+class TestParams(unittest.TestCase):
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+    self.params = Params(self.tmpdir)
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def test_params_put_and_get(self):
+    self.params.put("DongleId", "cb38263377b873ee")
+    assert self.params.get("DongleId") == b"cb38263377b873ee"
+    assert self.params.get("DongleId", encoding="utf8") == "cb38263377b873ee"
+
+  def test_params_non_ascii(self):
+    st = b"\xe1\x90\xff"
+    self.params.put("CarParams", st)
+    assert self.params.get("CarParams") == st
+
+  def test_params_get_cleared_panda_disconnect(self):
+    self.params.put("CarParams", "test")
+    self.params.put("DongleId", "cb38263377b873ee")
+    assert self.params.get("CarParams") == b"test"
+    self.params.panda_disconnect()
+    assert self.params.get("CarParams") is None
+    assert self.params.get("DongleId") is not None
+
+  def test_params_get_cleared_manager_start(self):
+    self.params.put("CarParams", "test")
+    self.params.put("DongleId", "cb38263377b873ee")
+    assert self.params.get("CarParams") == b"test"
+    self.params.manager_start()
+    assert self.params.get("CarParams") is None
+    assert self.params.get("DongleId") is not None
+
+  def test_params_two_things(self):
+    self.params.put("DongleId", "bob")
+    self.params.put("AthenadPid", "123")
+    assert self.params.get("DongleId") == b"bob"
+    assert self.params.get("AthenadPid") == b"123"
+
+  def test_params_get_block(self):
+    def _delayed_writer():
+      time.sleep(0.1)
+      self.params.put("CarParams", "test")
+    threading.Thread(target=_delayed_writer).start()
+    assert self.params.get("CarParams") is None
+    assert self.params.get("CarParams", block=True) == b"test"
+
+  def test_params_get_block_wakes_on_write(self):
+    def _delayed_writer():
+      time.sleep(0.2)
+      self.params.put("CarParams", "test")
+    threading.Thread(target=_delayed_writer).start()
+    t = time.monotonic()
+    assert self.params.get("CarParams", block=True, timeout=5.) == b"test"
+    assert time.monotonic() - t < 1.
+
+  def test_params_get_block_after_symlink_swap(self):
+    data_path = os.path.join(self.tmpdir, "d")
+    targets = [os.readlink(data_path)]
+    def _delayed_writer():
+      time.sleep(0.1)
+      # a write transaction rewrites all values and swaps the d symlink
+      with self.params.transaction(write=True) as txn:
+        txn.delete("DongleId")
+      targets.append(os.readlink(data_path))
+      time.sleep(0.1)
+      self.params.put("CarParams", "test")
+    threading.Thread(target=_delayed_writer).start()
+    assert self.params.get("CarParams", block=True, timeout=5.) == b"test"
+    assert targets[0] != targets[1]
+
+  def test_params_get_block_timeout(self):
+    t = time.monotonic()
+    assert self.params.get("CarParams", block=True, timeout=0.1) is None
+    assert time.monotonic() - t >= 0.1
+
+  def test_params_cache(self):
+    cached = Params(self.tmpdir, cache=True)
+    self.params.put("DongleId", "bob")
+    assert cached.get("DongleId") == b"bob"
+    hits, misses = cached.cache.hits, cached.cache.misses
+    assert cached.get("DongleId") == b"bob"
+    assert cached.cache.hits == hits + 1
+    assert cached.cache.misses == misses
+
+    # writes from this process invalidate right away
+    self.params.put("DongleId", "alice")
+    assert cached.get("DongleId") == b"alice"
+    self.params.delete("DongleId")
+    assert cached.get("DongleId") is None
+
+  def test_params_cache_external_write(self):
+    cached = Params(self.tmpdir, cache=True)
+    assert cached.get("DongleId") is None
+    assert cached.get("DongleId") is None
+
+    # simulate a write from another process
+    with open(os.path.join(self.tmpdir, "d", ".tmpwrite"), "wb") as f:
+      f.write(b"bob")
+    os.rename(os.path.join(self.tmpdir, "d", ".tmpwrite"), os.path.join(self.tmpdir, "d", "DongleId"))
+    for _ in range(100):
+      if cached.get("DongleId") is not None:
+        break
+      time.sleep(0.01)
+    assert cached.get("DongleId") == b"bob"
+
+  def test_params_cache_clear_all(self):
+    cached = Params(self.tmpdir, cache=True)
+    old_cache = cached.cache
+    cached.clear_all()
+    assert cached.cache is not old_cache
+    if old_cache._thread is not None:
+      # the old watcher thread and its inotify fd are released
+      assert not old_cache._thread.is_alive()
+      assert old_cache._ino.fd is None
+
+    self.params.put("DongleId", "bob")
+    assert cached.get("DongleId") == b"bob"
+
+  def test_params_cache_clear_all_other_instance(self):
+    cached = Params(self.tmpdir, cache=True)
+    self.params.put("DongleId", "bob")
+    assert cached.get("DongleId") == b"bob"
+
+    # clearing through an instance without cache replaces the process cache for all instances
+    self.params.clear_all()
+    assert cached.get("DongleId") is None
+
+    # and the new cache sees writes from other processes
+    with open(os.path.join(self.tmpdir, "d", ".tmpwrite"), "wb") as f:
+      f.write(b"alice")
+    os.rename(os.path.join(self.tmpdir, "d", ".tmpwrite"), os.path.join(self.tmpdir, "d", "DongleId"))
+    for _ in range(100):
+      if cached.get("DongleId") is not None:
+        break
+      time.sleep(0.01)
+    assert cached.get("DongleId") == b"alice"
+
+  def test_put_nonblocking(self):
+    put_nonblocking("CarParams", "test", db=self.tmpdir)
+    assert flush_nonblocking(db=self.tmpdir, timeout=5.)
+    assert self.params.get("CarParams") == b"test"
+
+  def test_put_nonblocking_coalesces(self):
+    for i in range(100):
+      put_nonblocking("DongleId", str(i), db=self.tmpdir)
+      put_nonblocking("AthenadPid", str(i), db=self.tmpdir)
+    assert flush_nonblocking(db=self.tmpdir, timeout=5.)
+    assert self.params.get("DongleId") == b"99"
+    assert self.params.get("AthenadPid") == b"99"
+
+  def test_put_nonblocking_unknown_key_fails(self):
+    with self.assertRaises(UnknownKeyName):
+      put_nonblocking("swag", "1", db=self.tmpdir)
+
+  def test_params_put_many(self):
+    self.params.put("DongleId", "bob")
+    self.params.put_many({"CarParams": "test", "AthenadPid": b"123", "DongleId": None})
+    assert self.params.get("CarParams") == b"test"
+    assert self.params.get("AthenadPid") == b"123"
+    assert self.params.get("DongleId") is None
+    assert not os.path.exists(os.path.join(self.tmpdir, ".journal"))
+
+  def test_params_put_many_does_not_copy(self):
+    d = os.path.realpath(os.path.join(self.tmpdir, "d"))
+    self.params.put("DongleId", "bob")
+    self.params.put("CarParams", "test")
+    self.params.panda_disconnect()
+    assert os.path.realpath(os.path.join(self.tmpdir, "d")) == d
+    assert self.params.get("CarParams") is None
+    assert self.params.get("DongleId") == b"bob"
+
+  def test_params_journal_replay(self):
+    self.params.put("DongleId", "bob")
+    self.params.put("AthenadPid", "123")
+
+    # simulate a crash right after the journal was committed
+    with open(os.path.join(self.tmpdir, ".tmpstaged"), "wb") as f:
+      f.write(b"test")
+    with open(os.path.join(self.tmpdir, ".journal"), "w") as f:
+      json.dump([["CarParams", ".tmpstaged"], ["DongleId", None]], f)
+    os.remove(os.path.join(self.tmpdir, "d", "DongleId"))  # partially applied
+
+    self.params.put("AthenadPid", "456")
+    assert self.params.get("CarParams") == b"test"
+    assert self.params.get("DongleId") is None
+    assert self.params.get("AthenadPid") == b"456"
+    assert not os.path.exists(os.path.join(self.tmpdir, ".journal"))
+
+  def test_params_unknown_key_fails(self):
+    with self.assertRaises(UnknownKeyName):
+      self.params.get("swag")
+
+  def test_params_permissions(self):
+    self.params.put("DongleId", "cb38263377b873ee")
+    self.params.delete("DongleId")
+    assert self.params.get("DongleId") is None
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+
+from common.profiler import StageTimer
+
+
+class FakePubMaster():
+  def __init__(self, services):
+    self.sock = {s: None for s in services}
+    self.sent = []
+
+  def send(self, s, dat):
+    self.sent.append((s, dat))
+
+
+class TestStageTimer(unittest.TestCase):
+  def run_cycles(self, timer, durations, pm=None):
+    t = [0.]
+    with mock.patch('common.profiler.time.monotonic', lambda: t[0]):
+      for wait, work in durations:
+        timer.start()
+        t[0] += wait
+        timer.checkpoint("wait", ignore=True)
+        t[0] += work
+        timer.checkpoint("work")
+        timer.end(pm)
+
+  def test_stats(self):
+    timer = StageTimer("test", window=100, report_every=1000)
+    # the oldest samples fall out of the window
+    self.run_cycles(timer, [(0.5, 0.5)] * 50 + [(0.01, i / 1000.) for i in range(1, 101)])
+
+    stats = {name: s for name, *s in timer.stats()}
+    self.assertEqual(list(stats.keys()), ["wait", "work", "cycle"])
+    count, p50, p99, max_ms = stats["work"]
+    self.assertEqual(count, 100)
+    self.assertAlmostEqual(p50, 51.)
+    self.assertAlmostEqual(p99, 100.)
+    self.assertAlmostEqual(max_ms, 100.)
+    # ignored stages don't count in the cycle time
+    self.assertEqual(stats["cycle"], stats["work"])
+    self.assertAlmostEqual(stats["wait"][3], 10.)
+
+  def test_partial_window(self):
+    timer = StageTimer("test", window=100, report_every=1000)
+    self.run_cycles(timer, [(0., 0.002)] * 3)
+    self.assertEqual(timer.stats()[1], ("work", 3, 2., 2., 2.))
+
+  def test_reports(self):
+    timer = StageTimer("test", window=10, report_every=5)
+    with mock.patch('selfdrive.swaglog.cloudlog') as cloudlog:
+      self.run_cycles(timer, [(0., 0.001)] * 12, pm=FakePubMaster(['plan']))
+    self.assertEqual(cloudlog.event.call_count, 2)
+
+    pm = FakePubMaster(['processStats'])
+    self.run_cycles(timer, [(0., 0.001)] * 3, pm=pm)
+    self.assertEqual(len(pm.sent), 1)
+    s, dat = pm.sent[0]
+    self.assertEqual(s, 'processStats')
+    self.assertEqual(dat.processStats.name, "test")
+    self.assertEqual(dat.processStats.cycles, 15)
+    self.assertEqual([stage.name for stage in dat.processStats.stages], ["wait", "work", "cycle"])
+    self.assertAlmostEqual(dat.processStats.stages[1].maxMs, 1., places=5)
+
+
+if __name__ == "__main__":
+  unittest.main()
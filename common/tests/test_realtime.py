@@ -0,0 +1,78 @@
+import os
+import time
+import unittest
+
+from common.realtime import Ratekeeper, HAS_ABS_SLEEP, sec_since_boot, sleep_until
+
+RATE = 100
+FRAMES = 50
+
+
+class TestRatekeeper(unittest.TestCase):
+  def run_loop(self, **kwargs):
+    rk = Ratekeeper(RATE, print_delay_threshold=None, **kwargs)
+    start = sec_since_boot()
+    for i in range(FRAMES):
+      # uneven work doesn't move the deadlines
+      time.sleep(0.004 if i % 2 else 0.)
+      rk.keep_time()
+    return rk, sec_since_boot() - start
+
+  def check_rate(self, **kwargs):
+    rk, elapsed = self.run_loop(**kwargs)
+    self.assertAlmostEqual(elapsed, FRAMES / RATE, delta=2. / RATE)
+    stats = rk.stats()
+    self.assertEqual(stats['frames'], FRAMES)
+    self.assertLess(stats['wake_late_max_ms'], 20.)
+    return stats
+
+  def test_relative(self):
+    self.check_rate(sleep="relative")
+
+  @unittest.skipUnless(HAS_ABS_SLEEP, "no clock_nanosleep")
+  def test_clock_nanosleep(self):
+    self.check_rate(sleep="clock_nanosleep")
+
+  @unittest.skipUnless(HAS_ABS_SLEEP, "no timerfd")
+  def test_timerfd(self):
+    self.check_rate(sleep="timerfd")
+
+  @unittest.skipUnless(HAS_ABS_SLEEP, "no timerfd")
+  def test_timerfd_close(self):
+    rk = Ratekeeper(RATE, sleep="timerfd")
+    fd = rk._timerfd
+    os.fstat(fd)
+    rk.close()
+    with self.assertRaises(OSError):
+      os.fstat(fd)
+    rk.close()
+
+  def test_spin(self):
+    stats = self.check_rate(spin=0.001)
+    self.assertGreaterEqual(stats['wake_late_max_ms'], 0.)
+
+  @unittest.skipUnless(HAS_ABS_SLEEP, "no clock_nanosleep")
+  def test_sleep_until(self):
+    t = sec_since_boot() + 0.01
+    sleep_until(t)
+    self.assertGreaterEqual(sec_since_boot(), t)
+    # deadlines in the past return right away
+    sleep_until(t - 1.)
+
+  def test_overruns(self):
+    rk = Ratekeeper(RATE, print_delay_threshold=None)
+    for _ in range(5):
+      time.sleep(1.5 / RATE)
+      rk.monitor_time()
+    stats = rk.stats()
+    self.assertEqual(stats['overruns'], 5)
+    self.assertLess(rk.remaining, -2. / RATE)
+    self.assertAlmostEqual(stats['jitter_ms'], 0.5 * 1e3 / RATE, delta=2.)
+
+  def test_unknown_strategy(self):
+    with self.assertRaises(ValueError):
+      Ratekeeper(RATE, sleep="nanosleep")
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,2 +1,61 @@
-from opendbc.can.parser_pyx import CANDefine # pylint: disable=no-name-in-module, import-error
-assert CANDefine
+import os
+import pickle
+
+from opendbc.can.parser_pyx import CANDefine as CANDefineLibdbc # pylint: disable=no-name-in-module, import-error
+
+DBC_OUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dbc_out")
+
+
+class ValueDefinitions(dict):
+  """CANDefine.dv, indexable by message address or name. A message's table is unpickled on first access."""
+  def __init__(self, tables):
+    super().__init__()
+    self.index = {}
+    for address, (msg_name, blob) in tables.items():
+      self.index[address] = self.index[msg_name] = (address, msg_name, blob)
+
+  def __missing__(self, key):
+    address, msg_name, blob = self.index[key]
+    msg_vals = pickle.loads(blob)
+    self[address] = self[msg_name] = msg_vals
+    return msg_vals
+
+  def __contains__(self, key):
+    return key in self.index
+
+  def load_all(self):
+    for key in self.index:
+      self[key]  # pylint: disable=pointless-statement
+
+  def __iter__(self):
+    self.load_all()
+    return super().__iter__()
+
+  def __len__(self):
+    return len(self.index)
+
+  def keys(self):
+    self.load_all()
+    return super().keys()
+
+  def values(self):
+    self.load_all()
+    return super().values()
+
+  def items(self):
+    self.load_all()
+    return super().items()
+
+  def get(self, key, default=None):
+    return self[key] if key in self.index else default
+
+
+class CANDefine():
+  def __init__(self, dbc_name):
+    self.dbc_name = dbc_name
+    try:
+      with open(os.path.join(DBC_OUT_PATH, dbc_name + ".vals"), "rb") as f:
+        self.dv = ValueDefinitions(pickle.load(f))
+    except (OSError, pickle.UnpicklingError, EOFError):
+      # tables not generated, build them from libdbc
+      self.dv = CANDefineLibdbc(dbc_name).dv
@@ -21,6 +21,15 @@ unsigned int pedal_checksum(uint64_t d, int l);
 uint64_t read_u64_be(const uint8_t* v);
 uint64_t read_u64_le(const uint8_t* v);
 
+struct MessageHistory {
+  uint32_t address;
+  uint16_t latest_ts; // bus time of the last entry
+  std::vector<const char*> sig_names;
+  std::vector<int> slots;
+  std::vector<uint64_t> ts;
+  std::vector<double> vals; // one row of sig_names.size() values per entry in ts
+};
+
 class MessageState {
 public:
   uint32_t address;
@@ -28,6 +37,11 @@ public:
 
   std::vector<Signal> parse_sigs;
   std::vector<double> vals;
+  std::vector<int> slots; // index of each parse_sig in the requested signals, -1 if not requested
+
+  // every successful parse, only recorded by CANParser::update_strings_batch
+  std::vector<uint64_t> hist_ts;
+  std::vector<double> hist_vals;
 
   uint16_t ts;
   uint64_t seen;
@@ -42,12 +56,12 @@ public:
 
 class CANParser {
 private:
-  const int bus;
-
   const DBC *dbc = NULL;
   std::unordered_map<uint32_t, MessageState> message_states;
+  bool record_history = false;
 
 public:
+  const int bus;
   bool can_valid = false;
   uint64_t last_sec = 0;
 
@@ -55,9 +69,21 @@ public:
             const std::vector<MessageParseOptions> &options,
             const std::vector<SignalParseOptions> &sigoptions);
   void UpdateCans(uint64_t sec, const capnp::List<cereal::CanData>::Reader& cans);
+  void UpdateFrame(uint64_t sec, const cereal::CanData::Reader& cmsg);
   void UpdateValid(uint64_t sec);
-  void update_string(std::string data, bool sendcan);
+  void update_string(const std::string &data, bool sendcan);
+  std::vector<MessageHistory> update_strings_batch(const std::vector<std::string> &data, bool sendcan, std::vector<uint8_t> &valid);
   std::vector<SignalValue> query_latest();
+  std::vector<uint32_t> query_latest_slots(double *vals);
+};
+
+class CANParserGroup {
+private:
+  std::vector<CANParser*> parsers;
+
+public:
+  void add(CANParser *parser);
+  void update_string(const std::string &data, bool sendcan);
 };
 
 class CANPacker {
@@ -1,7 +1,7 @@
 # distutils: language = c++
 #cython: language_level=3
 
-from libc.stdint cimport uint32_t, uint64_t, uint16_t
+from libc.stdint cimport uint8_t, uint32_t, uint64_t, uint16_t
 from libcpp.vector cimport vector
 from libcpp.map cimport map
 from libcpp.string cimport string
@@ -73,11 +73,26 @@ cdef extern from "common_dbc.h":
 cdef extern from "common.h":
   cdef const DBC* dbc_lookup(const string);
 
+  cdef cppclass MessageHistory:
+    uint32_t address
+    uint16_t latest_ts
+    vector[const char*] sig_names
+    vector[int] slots
+    vector[uint64_t] ts
+    vector[double] vals
+
   cdef cppclass CANParser:
     bool can_valid
     CANParser(int, string, vector[MessageParseOptions], vector[SignalParseOptions])
     void update_string(string, bool)
+    vector[MessageHistory] update_strings_batch(vector[string], bool, vector[uint8_t]&)
     vector[SignalValue] query_latest()
+    vector[uint32_t] query_latest_slots(double *)
+
+  cdef cppclass CANParserGroup:
+    CANParserGroup()
+    void add(CANParser *)
+    void update_string(string, bool)
 
   cdef cppclass CANPacker:
    CANPacker(string)
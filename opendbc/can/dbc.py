@@ -1,8 +1,11 @@
 import re
 import os
-import struct
 import sys
+import json
+import stat
+import hashlib
 import numbers
+import tempfile
 from collections import namedtuple, defaultdict
 
 def int_or_float(s):
@@ -16,6 +19,135 @@ DBCSignal = namedtuple(
   "DBCSignal", ["name", "start_bit", "size", "is_little_endian", "is_signed",
                 "factor", "offset", "tmin", "tmax", "units"])
 
+# bump when the parsed representation changes
+CACHE_VERSION = 2
+CACHE_DIR = os.getenv("OPENDBC_CACHE_DIR", os.path.join(tempfile.gettempdir(), "opendbc_cache_%d" % os.getuid()))
+
+
+def _private_cache_dir():
+  """Creates CACHE_DIR if needed. Returns False unless it's a directory only the current user can write to"""
+  try:
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    st = os.lstat(CACHE_DIR)
+  except OSError:
+    return False
+  return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not (st.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+
+def reverse_bytes(x):
+  return int.from_bytes((x & 0xffffffffffffffff).to_bytes(8, 'little'), 'big')
+
+
+class MessageCodec():
+  """Per-message encode/decode plan, with shifts, masks and signs computed once.
+
+  Each signal is a tuple (name, is_little_endian, shift, size, mask, sign_bit, factor, offset),
+  where shift is counted in the little endian or big endian 64 bit representation of the data.
+  """
+  def __init__(self, name, size, signals):
+    self.name = name
+    self.size = size
+    self.sigs = []
+    for s in signals:
+      if s.is_little_endian:
+        shift = s.start_bit
+      else:
+        b1 = (s.start_bit // 8) * 8 + (-s.start_bit - 1) % 8
+        shift = 64 - (b1 + s.size)
+      mask = (1 << s.size) - 1
+      sign_bit = (1 << (s.size - 1)) if s.is_signed else 0
+      self.sigs.append((s.name, s.is_little_endian, shift, s.size, mask, sign_bit, s.factor, s.offset))
+
+    self.all_little_endian = all(sig[1] for sig in self.sigs)
+    self.has_little_endian = any(sig[1] for sig in self.sigs)
+    self.has_big_endian = not self.all_little_endian
+    self._out_plans = {}
+
+  def out_plan(self, arr):
+    """Signals to decode with their output slot, for a given list of requested signals"""
+    key = tuple(arr)
+    plan = self._out_plans.get(key)
+    if plan is None:
+      slots = {}
+      for i, sig_name in enumerate(arr):
+        slots.setdefault(sig_name, i)
+      plan = self._out_plans[key] = [(sig, slots[sig[0]]) for sig in self.sigs if sig[0] in slots]
+    return plan
+
+  def decode(self, dat, arr=None):
+    st = dat.ljust(8, b'\x00')
+    le = int.from_bytes(st[:8], 'little') if self.has_little_endian else 0
+    be = int.from_bytes(st[:8], 'big') if self.has_big_endian else 0
+
+    if arr is None:
+      out = {}
+      plan = ((sig, sig[0]) for sig in self.sigs)
+    else:
+      out = [None] * len(arr)
+      plan = self.out_plan(arr)
+
+    for (_, little_endian, shift, _, mask, sign_bit, factor, offset), slot in plan:
+      if shift < 0:
+        continue
+
+      tmp = ((le if little_endian else be) >> shift) & mask
+      if tmp & sign_bit:
+        tmp -= mask + 1
+      out[slot] = tmp * factor + offset
+    return out
+
+  def encode(self, dd):
+    # all little endian messages are built directly in little endian order
+    result = 0
+    for name, little_endian, shift, _, mask, sign_bit, factor, offset in self.sigs:
+      ival = dd.get(name)
+      if ival is None:
+        continue
+
+      ival = int(round((ival / factor) - offset))
+      if sign_bit and ival < 0:
+        ival = (mask + 1) + ival
+
+      dat = (ival & mask) << shift
+      shifted_mask = mask << shift
+      if little_endian and not self.all_little_endian:
+        dat = reverse_bytes(dat)
+        shifted_mask = reverse_bytes(shifted_mask)
+
+      result &= ~shifted_mask
+      result |= dat
+
+    order = 'little' if self.all_little_endian else 'big'
+    return (result & 0xffffffffffffffff).to_bytes(8, order)[:self.size]
+
+  def decode_array(self, dat, arr=None):
+    """Vectorized decode of many frames. dat is a (N, size) uint8 array, or a sequence of bytes.
+    Returns a dict of signal name to float64 array of length N."""
+    import numpy as np
+
+    if not isinstance(dat, np.ndarray):
+      dat = np.frombuffer(b"".join(d.ljust(8, b'\x00')[:8] for d in dat), dtype=np.uint8).reshape(-1, 8)
+    if dat.shape[1] < 8:
+      dat = np.hstack([dat, np.zeros((dat.shape[0], 8 - dat.shape[1]), dtype=np.uint8)])
+    dat = np.ascontiguousarray(dat[:, :8], dtype=np.uint8)
+
+    le = dat.view('<u8')[:, 0]
+    be = dat.view('>u8')[:, 0].astype(np.uint64)
+
+    out = {}
+    for name, little_endian, shift, size, mask, sign_bit, factor, offset in self.sigs:
+      if shift < 0 or (arr is not None and name not in arr):
+        continue
+
+      tmp = ((le if little_endian else be) >> np.uint64(shift)) & np.uint64(mask)
+      if sign_bit and size < 64:
+        tmp = tmp.astype(np.int64)
+        tmp -= ((tmp >> (size - 1)) & 1) << size
+      else:
+        tmp = tmp.view(np.int64) if sign_bit else tmp
+      out[name] = tmp.astype(np.float64) * factor + offset
+    return out
+
 
 class dbc():
   def __init__(self, fn):
@@ -24,6 +156,48 @@ class dbc():
       self.txt = f.readlines()
     self._warned_addresses = set()
 
+    digest = hashlib.sha1("".join(self.txt).encode('ascii')).hexdigest()
+    self._cache_fn = os.path.join(CACHE_DIR, "%s_%s_v%d.json" % (self.name, digest, CACHE_VERSION))
+    if not self._load_cache():
+      self._parse()
+      self._save_cache()
+
+    self.msg_name_to_address = {}
+    for address, m in self.msgs.items():
+      name = m[0][0]
+      self.msg_name_to_address[name] = address
+
+    self.codecs = {address: MessageCodec(m[0][0], m[0][1], m[1]) for address, m in self.msgs.items()}
+
+  def _load_cache(self):
+    if not _private_cache_dir():
+      return False
+    try:
+      with open(self._cache_fn, encoding="ascii") as f:
+        cache = json.load(f)
+      self.msgs = {address: ((name, size), [DBCSignal(*sig) for sig in sigs])
+                   for address, name, size, sigs in cache["msgs"]}
+      self.def_vals = defaultdict(list, {address: [tuple(v) for v in vals] for address, vals in cache["def_vals"]})
+      return True
+    except Exception:
+      return False
+
+  def _save_cache(self):
+    if not _private_cache_dir():
+      return
+    cache = {
+      "msgs": [(address, name, size, sigs) for address, ((name, size), sigs) in self.msgs.items()],
+      "def_vals": list(self.def_vals.items()),
+    }
+    try:
+      fd, tmp_fn = tempfile.mkstemp(dir=CACHE_DIR)
+      with os.fdopen(fd, "w", encoding="ascii") as f:
+        json.dump(cache, f)
+      os.rename(tmp_fn, self._cache_fn)
+    except OSError:
+      pass
+
+  def _parse(self):
     # regexps from https://github.com/ebroecker/canmatrix/blob/master/canmatrix/importdbc.py
     bo_regexp = re.compile(r"^BO\_ (\w+) (\w+) *: (\w+) (\w+)")
     sg_regexp = re.compile(r"^SG\_ (\w+) : (\d+)\|(\d+)@(\d+)([\+|\-]) \(([0-9.+\-eE]+),([0-9.+\-eE]+)\) \[([0-9.+\-eE]+)\|([0-9.+\-eE]+)\] \"(.*)\" (.*)")
@@ -40,9 +214,6 @@ class dbc():
     # A dictionary which maps message ids to a list of tuples (signal name, definition value pairs)
     self.def_vals = defaultdict(list)
 
-    # lookup to bit reverse each byte
-    self.bits_index = [(i & ~0b111) + ((-i-1) & 0b111) for i in range(64)]
-
     for l in self.txt:
       l = l.strip()
 
@@ -110,25 +281,13 @@ class dbc():
     for msg in self.msgs.values():
       msg[1].sort(key=lambda x: x.start_bit)
 
-    self.msg_name_to_address = {}
-    for address, m in self.msgs.items():
-      name = m[0][0]
-      self.msg_name_to_address[name] = address
-
   def lookup_msg_id(self, msg_id):
     if not isinstance(msg_id, numbers.Number):
       msg_id = self.msg_name_to_address[msg_id]
     return msg_id
 
   def reverse_bytes(self, x):
-    return ((x & 0xff00000000000000) >> 56) | \
-           ((x & 0x00ff000000000000) >> 40) | \
-           ((x & 0x0000ff0000000000) >> 24) | \
-           ((x & 0x000000ff00000000) >> 8) | \
-           ((x & 0x00000000ff000000) << 8) | \
-           ((x & 0x0000000000ff0000) << 24) | \
-           ((x & 0x000000000000ff00) << 40) | \
-           ((x & 0x00000000000000ff) << 56)
+    return reverse_bytes(x)
 
   def encode(self, msg_id, dd):
     """Encode a CAN message using the dbc.
@@ -138,39 +297,7 @@ class dbc():
         dd: A dictionary mapping signal name to signal data.
     """
     msg_id = self.lookup_msg_id(msg_id)
-
-    msg_def = self.msgs[msg_id]
-    size = msg_def[0][1]
-
-    result = 0
-    for s in msg_def[1]:
-      ival = dd.get(s.name)
-      if ival is not None:
-
-        ival = (ival / s.factor) - s.offset
-        ival = int(round(ival))
-
-        if s.is_signed and ival < 0:
-          ival = (1 << s.size) + ival
-
-        if s.is_little_endian:
-          shift = s.start_bit
-        else:
-          b1 = (s.start_bit // 8) * 8 + (-s.start_bit - 1) % 8
-          shift = 64 - (b1 + s.size)
-
-        mask = ((1 << s.size) - 1) << shift
-        dat = (ival & ((1 << s.size) - 1)) << shift
-
-        if s.is_little_endian:
-          mask = self.reverse_bytes(mask)
-          dat = self.reverse_bytes(dat)
-
-        result &= ~mask
-        result |= dat
-
-    result = struct.pack('>Q', result)
-    return result[:size]
+    return self.codecs[msg_id].encode(dd)
 
   def decode(self, x, arr=None, debug=False):
     """Decode a CAN message using the dbc.
@@ -189,66 +316,31 @@ class dbc():
 
         Returns (None, None) if the message could not be decoded.
     """
-
-    if arr is None:
-      out = {}
-    else:
-      out = [None]*len(arr)
-
-    msg = self.msgs.get(x[0])
-    if msg is None:
+    codec = self.codecs.get(x[0])
+    if codec is None:
       if x[0] not in self._warned_addresses:
         #print("WARNING: Unknown message address {}".format(x[0]))
         self._warned_addresses.add(x[0])
       return None, None
 
-    name = msg[0][0]
     if debug:
-      print(name)
+      print(codec.name)
 
-    st = x[2].ljust(8, b'\x00')
-    le, be = None, None
+    return codec.name, codec.decode(x[2], arr)
 
-    for s in msg[1]:
-      if arr is not None and s[0] not in arr:
-        continue
-
-      start_bit = s[1]
-      signal_size = s[2]
-      little_endian = s[3]
-      signed = s[4]
-      factor = s[5]
-      offset = s[6]
-
-      if little_endian:
-        if le is None:
-          le = struct.unpack("<Q", st)[0]
-        tmp = le
-        shift_amount = start_bit
-      else:
-        if be is None:
-          be = struct.unpack(">Q", st)[0]
-        tmp = be
-        b1 = (start_bit // 8) * 8 + (-start_bit - 1) % 8
-        shift_amount = 64 - (b1 + signal_size)
+  def decode_array(self, msg_id, dat, arr=None):
+    """Decode many frames of one message at once with NumPy.
 
-      if shift_amount < 0:
-        continue
-
-      tmp = (tmp >> shift_amount) & ((1 << signal_size) - 1)
-      if signed and (tmp >> (signal_size - 1)):
-        tmp -= (1 << signal_size)
-
-      tmp = tmp * factor + offset
-
-      # if debug:
-      #   print("%40s  %2d %2d  %7.2f %s" % (s[0], s[1], s[2], tmp, s[-1]))
+       Inputs:
+        msg_id: The message ID or name.
+        dat: A (N, size) uint8 array, or a sequence of N bytes objects.
+        arr: Optional list of signals which should be decoded.
 
-      if arr is None:
-        out[s[0]] = tmp
-      else:
-        out[arr.index(s[0])] = tmp
-    return name, out
+       Returns:
+        A dict mapping signal name to a float64 array of length N.
+    """
+    msg_id = self.lookup_msg_id(msg_id)
+    return self.codecs[msg_id].decode_array(dat, arr)
 
   def get_signals(self, msg):
     msg = self.lookup_msg_id(msg)
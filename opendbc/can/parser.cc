@@ -165,13 +165,23 @@ CANParser::CANParser(int abus, const std::string& dbc_name,
 
     }
 
+    for (const auto& sig : state.parse_sigs) {
+      int slot = -1;
+      for (int i=0; i<sigoptions.size(); i++) {
+        if (sigoptions[i].address == op.address && strcmp(sigoptions[i].name, sig.name) == 0) {
+          slot = i;
+          break;
+        }
+      }
+      state.slots.push_back(slot);
+    }
+
     message_states[state.address] = state;
   }
 }
 
 void CANParser::UpdateCans(uint64_t sec, const capnp::List<cereal::CanData>::Reader& cans) {
     int msg_count = cans.size();
-    uint64_t p;
 
     DEBUG("got %d messages\n", msg_count);
 
@@ -182,18 +192,26 @@ void CANParser::UpdateCans(uint64_t sec, const capnp::List<cereal::CanData>::Rea
         // DEBUG("skip %d: wrong bus\n", cmsg.getAddress());
         continue;
       }
-      auto state_it = message_states.find(cmsg.getAddress());
-      if (state_it == message_states.end()) {
-        // DEBUG("skip %d: not specified\n", cmsg.getAddress());
-        continue;
-      }
+      UpdateFrame(sec, cmsg);
+    }
+}
+
+void CANParser::UpdateFrame(uint64_t sec, const cereal::CanData::Reader& cmsg) {
+  auto state_it = message_states.find(cmsg.getAddress());
+  if (state_it == message_states.end()) {
+    // DEBUG("skip %d: not specified\n", cmsg.getAddress());
+    return;
+  }
 
-      if (cmsg.getDat().size() > 8) continue; //shouldnt ever happen
-      uint8_t dat[8] = {0};
-      memcpy(dat, cmsg.getDat().begin(), cmsg.getDat().size());
+  if (cmsg.getDat().size() > 8) return; //shouldnt ever happen
+  uint8_t dat[8] = {0};
+  memcpy(dat, cmsg.getDat().begin(), cmsg.getDat().size());
 
-      state_it->second.parse(sec, cmsg.getBusTime(), dat);
-    }
+  auto &state = state_it->second;
+  if (state.parse(sec, cmsg.getBusTime(), dat) && record_history) {
+    state.hist_ts.push_back(sec);
+    state.hist_vals.insert(state.hist_vals.end(), state.vals.begin(), state.vals.end());
+  }
 }
 
 void CANParser::UpdateValid(uint64_t sec) {
@@ -209,7 +227,7 @@ void CANParser::UpdateValid(uint64_t sec) {
   }
 }
 
-void CANParser::update_string(std::string data, bool sendcan) {
+void CANParser::update_string(const std::string &data, bool sendcan) {
   // format for board, make copy due to alignment issues, will be freed on out of scope
   auto amsg = kj::heapArray<capnp::word>((data.length() / sizeof(capnp::word)) + 1);
   memcpy(amsg.begin(), data.data(), data.length());
@@ -226,6 +244,34 @@ void CANParser::update_string(std::string data, bool sendcan) {
   UpdateValid(last_sec);
 }
 
+// Also fills valid with can_valid after each event
+std::vector<MessageHistory> CANParser::update_strings_batch(const std::vector<std::string> &data, bool sendcan, std::vector<uint8_t> &valid) {
+  valid.clear();
+  record_history = true;
+  for (const auto& d : data) {
+    update_string(d, sendcan);
+    valid.push_back(can_valid);
+  }
+  record_history = false;
+
+  std::vector<MessageHistory> ret;
+  for (auto& kv : message_states) {
+    auto& state = kv.second;
+
+    MessageHistory hist;
+    hist.address = state.address;
+    hist.latest_ts = state.ts;
+    for (const auto& sig : state.parse_sigs) {
+      hist.sig_names.push_back(sig.name);
+    }
+    hist.slots = state.slots;
+    hist.ts.swap(state.hist_ts);
+    hist.vals.swap(state.hist_vals);
+    ret.push_back(std::move(hist));
+  }
+
+  return ret;
+}
 
 std::vector<SignalValue> CANParser::query_latest() {
   std::vector<SignalValue> ret;
@@ -247,3 +293,52 @@ std::vector<SignalValue> CANParser::query_latest() {
 
   return ret;
 }
+
+// Writes the latest values of requested signals into vals, indexed by their position in the
+// requested signals. Returns the addresses of the updated messages.
+std::vector<uint32_t> CANParser::query_latest_slots(double *vals) {
+  std::vector<uint32_t> updated;
+
+  for (const auto& kv : message_states) {
+    const auto& state = kv.second;
+    if (last_sec != 0 && state.seen != last_sec) continue;
+
+    updated.push_back(state.address);
+    for (int i=0; i<state.parse_sigs.size(); i++) {
+      if (state.slots[i] >= 0) {
+        vals[state.slots[i]] = state.vals[i];
+      }
+    }
+  }
+
+  return updated;
+}
+
+void CANParserGroup::add(CANParser *parser) {
+  parsers.push_back(parser);
+}
+
+// Decodes the event once and hands each frame only to the parsers listening on its bus
+void CANParserGroup::update_string(const std::string &data, bool sendcan) {
+  auto amsg = kj::heapArray<capnp::word>((data.length() / sizeof(capnp::word)) + 1);
+  memcpy(amsg.begin(), data.data(), data.length());
+
+  capnp::FlatArrayMessageReader cmsg(amsg);
+  cereal::Event::Reader event = cmsg.getRoot<cereal::Event>();
+
+  uint64_t sec = event.getLogMonoTime();
+  auto cans = sendcan? event.getSendcan() : event.getCan();
+
+  for (const auto frame : cans) {
+    for (auto parser : parsers) {
+      if (frame.getSrc() == parser->bus) {
+        parser->UpdateFrame(sec, frame);
+      }
+    }
+  }
+
+  for (auto parser : parsers) {
+    parser->last_sec = sec;
+    parser->UpdateValid(sec);
+  }
+}
@@ -1,2 +1,3 @@
-from opendbc.can.parser_pyx import CANParser # pylint: disable=no-name-in-module, import-error
+from opendbc.can.parser_pyx import CANParser, CANParserGroup # pylint: disable=no-name-in-module, import-error
 assert CANParser
+assert CANParserGroup
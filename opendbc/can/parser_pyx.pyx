@@ -5,18 +5,21 @@ from libcpp.string cimport string
 from libcpp.vector cimport vector
 from libcpp cimport bool
 from libcpp.unordered_set cimport unordered_set
-from libc.stdint cimport uint32_t, uint64_t, uint16_t
+from libc.stdint cimport uint8_t, uint32_t, uint64_t, uint16_t
 from libcpp.map cimport map
 
 from collections import defaultdict
+from array import array
 
 from common cimport CANParser as cpp_CANParser
-from common cimport SignalParseOptions, MessageParseOptions, dbc_lookup, SignalValue, DBC
+from common cimport CANParserGroup as cpp_CANParserGroup
+from common cimport SignalParseOptions, MessageParseOptions, dbc_lookup, SignalValue, DBC, MessageHistory
 
 
 from libcpp cimport bool
 import os
 import numbers
+import numpy as np
 
 cdef int CAN_INVALID_CNT = 5
 
@@ -29,6 +32,8 @@ cdef class CANParser:
     map[uint32_t, string] address_to_msg_name
     vector[SignalValue] can_values
     bool test_mode_enabled
+    bool use_slots
+    double[:] values_view
 
   cdef public:
     string dbc_name
@@ -36,8 +41,16 @@ cdef class CANParser:
     dict ts
     bool can_valid
     int can_invalid_cnt
-
-  def __init__(self, dbc_name, signals, checks=None, bus=0):
+    object values
+    dict slots
+    object sig
+
+  def __init__(self, dbc_name, signals, checks=None, bus=0, use_slots=False):
+    """With use_slots, vl and ts are not filled. Instead the latest value of every requested
+    signal is written into the flat array('d') values, at the position of the signal in
+    signals. slots maps (message name or address, signal name) to that position, and
+    sig.<message>.<signal> reads it through generated properties. Without use_slots,
+    values, slots and sig are None."""
     if checks is None:
       checks = []
 
@@ -94,22 +107,50 @@ cdef class CANParser:
       mpo.check_frequency = freq
       message_options_v.push_back(mpo)
 
-    self.can = new cpp_CANParser(bus, dbc_name, message_options_v, signal_options_v)
-    self.update_vl()
+    self.use_slots = use_slots
+    if use_slots:
+      self.slots = {}
+      self.values = array('d', [sig_default for _, _, sig_default in signals])
+      self.values_view = self.values
+      for i, (sig_name, sig_address, _) in enumerate(signals):
+        name = <unicode>self.address_to_msg_name[sig_address].c_str()
+        self.slots.setdefault((sig_address, sig_name), i)
+        self.slots.setdefault((name, sig_name), i)
+      self.sig = SignalAccessors(self.values, self.slots)
 
-  cdef unordered_set[uint32_t] update_vl(self):
-    cdef string sig_name
-    cdef unordered_set[uint32_t] updated_val
+    self.can = new cpp_CANParser(bus, dbc_name, message_options_v, signal_options_v)
+    self.update()
 
-    can_values = self.can.query_latest()
-    valid = self.can.can_valid
+  cdef unordered_set[uint32_t] update(self):
+    if self.use_slots:
+      return self.update_slots()
+    return self.update_vl()
 
+  cdef void update_valid(self, bool valid):
     # Update invalid flag
     self.can_invalid_cnt += 1
     if valid:
         self.can_invalid_cnt = 0
     self.can_valid = self.can_invalid_cnt < CAN_INVALID_CNT
 
+  cdef unordered_set[uint32_t] update_slots(self):
+    cdef unordered_set[uint32_t] updated_val
+    cdef vector[uint32_t] updated
+
+    if self.values_view.shape[0] > 0:
+      updated = self.can.query_latest_slots(&self.values_view[0])
+    self.update_valid(self.can.can_valid)
+
+    for address in updated:
+      updated_val.insert(address)
+    return updated_val
+
+  cdef unordered_set[uint32_t] update_vl(self):
+    cdef string sig_name
+    cdef unordered_set[uint32_t] updated_val
+
+    can_values = self.can.query_latest()
+    self.update_valid(self.can.can_valid)
 
     for cv in can_values:
       # Cast char * directly to unicde
@@ -128,7 +169,7 @@ cdef class CANParser:
 
   def update_string(self, dat, sendcan=False):
     self.can.update_string(dat, sendcan)
-    return self.update_vl()
+    return self.update()
 
   def update_strings(self, strings, sendcan=False):
     updated_vals = set()
@@ -139,6 +180,102 @@ cdef class CANParser:
 
     return updated_vals
 
+  def update_strings_batch(self, strings, sendcan=False):
+    """Decode many can events in one call, e.g. a whole log segment.
+
+    Returns vl and ts dicts keyed like self.vl and self.ts, with a NumPy array per signal
+    holding one entry for every frame that parsed correctly. ts holds the logMonoTime of the
+    event the frame came from. The parser state is updated as if update_strings was called."""
+    cdef vector[string] data = strings
+    cdef vector[uint8_t] valid
+    cdef vector[MessageHistory] hist = self.can.update_strings_batch(data, sendcan, valid)
+    cdef size_t i, j, n, m
+    cdef int slot
+    cdef const char* c_sig_name
+
+    for i in range(valid.size()):
+      self.update_valid(valid[i])
+
+    vl = {}
+    ts = {}
+    for i in range(hist.size()):
+      address = hist[i].address
+      name = <unicode>self.address_to_msg_name[address].c_str()
+      n = hist[i].ts.size()
+      m = hist[i].sig_names.size()
+
+      if n > 0:
+        t = np.array(<uint64_t[:n]> hist[i].ts.data())
+        cols = np.array(<double[:n * m]> hist[i].vals.data()).reshape(n, m).T.copy()
+      else:
+        t = np.zeros(0, dtype=np.uint64)
+        cols = np.zeros((m, 0))
+
+      vl[address] = vl[name] = {}
+      ts[address] = ts[name] = {}
+      for j in range(m):
+        c_sig_name = hist[i].sig_names[j]
+        sig_name = <unicode>c_sig_name
+        vl[name][sig_name] = cols[j]
+        ts[name][sig_name] = t
+
+        # latest values of the messages seen in the batch, like update_vl and update_slots
+        if n == 0:
+          continue
+        if self.use_slots:
+          slot = hist[i].slots[j]
+          if slot >= 0:
+            self.values_view[slot] = hist[i].vals[(n - 1) * m + j]
+        else:
+          self.vl[address][sig_name] = self.vl[name][sig_name] = hist[i].vals[(n - 1) * m + j]
+          self.ts[address][sig_name] = self.ts[name][sig_name] = hist[i].latest_ts
+
+    return vl, ts
+
+cdef class CANParserGroup:
+  """Parses every can event once for several parsers, e.g. the powertrain and camera bus
+  parsers of a car. Each member keeps its own vl, ts and can_valid."""
+  cdef:
+    cpp_CANParserGroup *group
+
+  cdef public:
+    list parsers
+
+  def __init__(self, parsers):
+    cdef CANParser parser
+
+    self.group = new cpp_CANParserGroup()
+    self.parsers = list(parsers)
+    for parser in self.parsers:
+      self.group.add(parser.can)
+
+  def __dealloc__(self):
+    del self.group
+
+  def update_strings(self, strings, sendcan=False):
+    """Returns the set of updated addresses for each member parser"""
+    cdef CANParser parser
+    updated_vals = [set() for _ in self.parsers]
+
+    for s in strings:
+      self.group.update_string(s, sendcan)
+      for i, parser in enumerate(self.parsers):
+        updated_vals[i].update(parser.update())
+
+    return updated_vals
+
+
+class SignalAccessors():
+  """sig.<message>.<signal> properties reading from a CANParser values array"""
+  def __init__(self, values, slots):
+    msgs = defaultdict(dict)
+    for (msg, sig_name), i in slots.items():
+      if not isinstance(msg, numbers.Number):
+        msgs[msg][sig_name] = property(lambda _, i=i: values[i])
+
+    for msg, props in msgs.items():
+      setattr(self, msg, type(msg, (), props)())
+
 cdef class CANDefine():
   cdef:
     const DBC *dbc
@@ -2,12 +2,36 @@
 from __future__ import print_function
 import os
 import sys
+import pickle
 
 import jinja2
 
 from collections import Counter
 from opendbc.can.dbc import dbc
 
+def parse_def_val(def_val):
+  # undo the C++ string quoting done by the dbc parser
+  def_val = def_val.strip('"').replace(r"\?", "?").split()
+  return dict(zip([int(v) for v in def_val[::2]], def_val[1::2]))
+
+
+def process_vals(in_fn, out_fn):
+  """Writes the CANDefine value tables as a pickled {address: (msg_name, pickled {sig: {val: name}})},
+  so a message's table is only unpickled the first time it's used."""
+  can_dbc = dbc(in_fn)
+
+  tables = {}
+  for address, sigs in sorted(can_dbc.def_vals.items()):
+    if address not in can_dbc.msgs:
+      continue
+    msg_name = can_dbc.msgs[address][0][0]
+    msg_vals = {sgname: parse_def_val(def_val) for sgname, def_val in sorted(set(sigs))}
+    tables[address] = (msg_name, pickle.dumps(msg_vals, protocol=pickle.HIGHEST_PROTOCOL))
+
+  with open(out_fn, "wb") as out_f:
+    pickle.dump(tables, out_f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
 def process(in_fn, out_fn):
   dbc_name = os.path.split(out_fn)[-1].replace('.cc', '')
   #print("processing %s: %s -> %s" % (dbc_name, in_fn, out_fn))
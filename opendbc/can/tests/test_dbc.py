@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from opendbc import DBC_PATH
+import opendbc.can.dbc as dbc_module
+from opendbc.can.dbc import dbc
+
+
+class TestDBC(unittest.TestCase):
+  def setUp(self):
+    self.cache_dir = tempfile.mkdtemp()
+    self.prev_cache_dir = dbc_module.CACHE_DIR
+    dbc_module.CACHE_DIR = self.cache_dir
+
+  def tearDown(self):
+    dbc_module.CACHE_DIR = self.prev_cache_dir
+    shutil.rmtree(self.cache_dir)
+
+  def test_encode_decode_big_endian(self):
+    dbc_test = dbc(os.path.join(DBC_PATH, 'toyota_prius_2017_pt_generated.dbc'))
+    msg = ('STEER_ANGLE_SENSOR', {'STEER_ANGLE': -6.0, 'STEER_RATE': 4, 'STEER_FRACTION': -0.2})
+    encoded = dbc_test.encode(*msg)
+    self.assertEqual(dbc_test.decode((0x25, 0, encoded)), msg)
+
+  def test_encode_decode_little_endian(self):
+    dbc_test = dbc(os.path.join(DBC_PATH, 'subaru_global_2017.dbc'))
+    vals = {'Counter': 3, 'LKAS_Output': -200, 'LKAS_Request': 1, 'SET_1': 1}
+    encoded = dbc_test.encode('ES_LKAS', vals)
+    name, decoded = dbc_test.decode((dbc_test.lookup_msg_id('ES_LKAS'), 0, encoded))
+    self.assertEqual(name, 'ES_LKAS')
+    for k, v in vals.items():
+      self.assertEqual(decoded[k], v)
+
+  def test_decode_arr(self):
+    dbc_test = dbc(os.path.join(DBC_PATH, 'toyota_prius_2017_pt_generated.dbc'))
+    encoded = dbc_test.encode('STEER_ANGLE_SENSOR', {'STEER_ANGLE': -6.0, 'STEER_RATE': 4})
+    name, out = dbc_test.decode((0x25, 0, encoded), arr=['STEER_RATE', 'NOT_A_SIGNAL', 'STEER_ANGLE'])
+    self.assertEqual(name, 'STEER_ANGLE_SENSOR')
+    self.assertEqual(out, [4, None, -6.0])
+
+  def test_decode_array(self):
+    dbc_test = dbc(os.path.join(DBC_PATH, 'toyota_prius_2017_pt_generated.dbc'))
+    frames = [dbc_test.encode('STEER_ANGLE_SENSOR', {'STEER_ANGLE': a, 'STEER_RATE': -a}) for a in range(-50, 50)]
+    out = dbc_test.decode_array('STEER_ANGLE_SENSOR', frames)
+    for i, f in enumerate(frames):
+      _, expected = dbc_test.decode((0x25, 0, f))
+      for sig, v in expected.items():
+        self.assertAlmostEqual(out[sig][i], v)
+
+    dat = np.frombuffer(b"".join(frames), dtype=np.uint8).reshape(len(frames), -1)
+    out_np = dbc_test.decode_array(0x25, dat, arr=['STEER_ANGLE'])
+    self.assertEqual(list(out_np.keys()), ['STEER_ANGLE'])
+    np.testing.assert_allclose(out_np['STEER_ANGLE'], out['STEER_ANGLE'])
+
+  def test_decode_array_integer_factor(self):
+    # factor 1 and offset 0 are parsed as ints, the result is float64 anyway
+    dbc_test = dbc(os.path.join(DBC_PATH, 'toyota_prius_2017_pt_generated.dbc'))
+    frames = [dbc_test.encode('GEAR_PACKET', {'GEAR': g % 16, 'CAR_MOVEMENT': g - 50}) for g in range(100)]
+    out = dbc_test.decode_array('GEAR_PACKET', frames)
+    for sig in ['GEAR', 'CAR_MOVEMENT']:
+      self.assertEqual(out[sig].dtype, np.float64)
+      for i, f in enumerate(frames):
+        self.assertEqual(out[sig][i], dbc_test.decode((0x127, 0, f))[1][sig])
+
+  def test_cache(self):
+    fn = os.path.join(DBC_PATH, 'honda_civic_touring_2016_can_generated.dbc')
+    parsed = dbc(fn)
+    self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+    cached = dbc(fn)
+    self.assertEqual(parsed.msgs, cached.msgs)
+    self.assertEqual(parsed.def_vals, cached.def_vals)
+
+  def test_cache_not_private(self):
+    fn = os.path.join(DBC_PATH, 'honda_civic_touring_2016_can_generated.dbc')
+    os.chmod(self.cache_dir, 0o777)
+    dbc(fn)
+    self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == "__main__":
+  unittest.main()
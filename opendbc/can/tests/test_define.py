@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import unittest
 
-from opendbc.can.can_define import CANDefine
+from opendbc.can.can_define import CANDefine, CANDefineLibdbc
 
 
 class TestCADNDefine(unittest.TestCase):
@@ -22,6 +22,11 @@ class TestCADNDefine(unittest.TestCase):
                           }
                          )
 
+  def test_tables_match_libdbc(self):
+    for dbc_file in ["honda_civic_touring_2016_can_generated", "toyota_rav4_2017_pt_generated", "vw_mqb_2010"]:
+      defs = CANDefine(dbc_file)
+      self.assertDictEqual(dict(defs.dv.items()), CANDefineLibdbc(dbc_file).dv)
+
 
 if __name__ == "__main__":
   unittest.main()
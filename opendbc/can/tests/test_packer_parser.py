@@ -2,15 +2,17 @@
 
 import unittest
 
-from opendbc.can.parser import CANParser
+from opendbc.can.parser import CANParser, CANParserGroup
 from opendbc.can.packer import CANPacker
 import cereal.messaging as messaging
 
 
 # Python implementation so we don't have to depend on boardd
-def can_list_to_can_capnp(can_msgs, msgtype='can'):
+def can_list_to_can_capnp(can_msgs, msgtype='can', log_mono_time=None):
   dat = messaging.new_message()
   dat.init(msgtype, len(can_msgs))
+  if log_mono_time is not None:
+    dat.logMonoTime = log_mono_time
 
   for i, can_msg in enumerate(can_msgs):
     if msgtype == 'sendcan':
@@ -100,6 +102,117 @@ class TestCanParserPacker(unittest.TestCase):
 
         idx += 1
 
+  def test_batch(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+
+    signals = [
+      ("STEER_TORQUE", "STEERING_CONTROL", 0),
+      ("STEER_TORQUE_REQUEST", "STEERING_CONTROL", 0),
+    ]
+
+    parser = CANParser(dbc_file, list(signals), [], 0)
+    batch_parser = CANParser(dbc_file, list(signals), [], 0)
+    packer = CANPacker(dbc_file)
+
+    strings = []
+    for idx, steer in enumerate(range(-256, 255)):
+      msgs = packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": steer, "STEER_TORQUE_REQUEST": 1}, idx)
+      strings.append(can_list_to_can_capnp([msgs]))
+
+    expected = []
+    for bts in strings:
+      parser.update_string(bts)
+      expected.append(parser.vl["STEERING_CONTROL"]["STEER_TORQUE"])
+
+    vl, ts = batch_parser.update_strings_batch(strings)
+    self.assertEqual(list(vl["STEERING_CONTROL"]["STEER_TORQUE"]), expected)
+    self.assertEqual(list(vl["STEERING_CONTROL"]["COUNTER"]), [i % 4 for i in range(len(strings))])
+    self.assertEqual(len(ts["STEERING_CONTROL"]["STEER_TORQUE"]), len(strings))
+    self.assertIs(vl[0xe4], vl["STEERING_CONTROL"])
+    self.assertEqual(batch_parser.vl["STEERING_CONTROL"]["STEER_TORQUE"], expected[-1])
+
+  def test_batch_state(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+
+    signals = [
+      ("STEER_TORQUE", "STEERING_CONTROL", 0),
+      ("STEER_ANGLE_RATE", "STEER_STATUS", 0),
+    ]
+    checks = [("STEERING_CONTROL", 100), ("STEER_STATUS", 100)]
+    packer = CANPacker(dbc_file)
+
+    # STEER_STATUS comes every 150 ms, so it times out in between, and stops before the end
+    strings = []
+    for idx, steer in enumerate(range(-256, 255)):
+      msgs = [packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": steer}, idx)]
+      if idx % 15 == 0 and idx < 400:
+        msgs.append(packer.make_can_msg("STEER_STATUS", 0, {"STEER_ANGLE_RATE": idx}, idx // 15))
+      strings.append(can_list_to_can_capnp(msgs, log_mono_time=(idx + 1) * 10000000))
+
+    for use_slots in (False, True):
+      for chunk in (1, 7, len(strings)):
+        parser = CANParser(dbc_file, list(signals), list(checks), 0, use_slots=use_slots)
+        batch_parser = CANParser(dbc_file, list(signals), list(checks), 0, use_slots=use_slots)
+        for i in range(0, len(strings), chunk):
+          parser.update_strings(strings[i:i + chunk])
+          batch_parser.update_strings_batch(strings[i:i + chunk])
+
+          self.assertEqual(batch_parser.vl, parser.vl)
+          self.assertEqual(batch_parser.ts, parser.ts)
+          self.assertEqual(list(batch_parser.values), list(parser.values))
+          self.assertEqual(batch_parser.can_invalid_cnt, parser.can_invalid_cnt)
+          self.assertEqual(batch_parser.can_valid, parser.can_valid)
+
+  def test_slots(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+
+    signals = [
+      ("STEER_TORQUE", "STEERING_CONTROL", 0),
+      ("STEER_TORQUE_REQUEST", "STEERING_CONTROL", 0),
+    ]
+
+    parser = CANParser(dbc_file, list(signals), [], 0)
+    slot_parser = CANParser(dbc_file, list(signals), [], 0, use_slots=True)
+    packer = CANPacker(dbc_file)
+    torque = slot_parser.slots[("STEERING_CONTROL", "STEER_TORQUE")]
+    self.assertEqual(torque, slot_parser.slots[(0xe4, "STEER_TORQUE")])
+    self.assertIsNone(parser.values)
+    self.assertIsNone(parser.sig)
+
+    for idx, steer in enumerate(range(-256, 255)):
+      msgs = packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": steer, "STEER_TORQUE_REQUEST": idx % 2}, idx)
+      bts = can_list_to_can_capnp([msgs])
+
+      self.assertEqual(parser.update_string(bts), slot_parser.update_string(bts))
+      self.assertEqual(slot_parser.values[torque], parser.vl["STEERING_CONTROL"]["STEER_TORQUE"])
+      self.assertEqual(slot_parser.sig.STEERING_CONTROL.STEER_TORQUE_REQUEST,
+                       parser.vl["STEERING_CONTROL"]["STEER_TORQUE_REQUEST"])
+      self.assertEqual(slot_parser.can_valid, parser.can_valid)
+
+  def test_group(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+
+    signals = [
+      ("STEER_TORQUE", "STEERING_CONTROL", 0),
+      ("STEER_TORQUE_REQUEST", "STEERING_CONTROL", 0),
+    ]
+
+    parsers = [CANParser(dbc_file, list(signals), [], bus) for bus in (0, 2)]
+    group_parsers = [CANParser(dbc_file, list(signals), [], bus) for bus in (0, 2)]
+    group = CANParserGroup(group_parsers)
+    packer = CANPacker(dbc_file)
+
+    for idx, steer in enumerate(range(-256, 255)):
+      msgs = [packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": steer, "STEER_TORQUE_REQUEST": 1}, idx),
+              packer.make_can_msg("STEERING_CONTROL", 2, {"STEER_TORQUE": -steer, "STEER_TORQUE_REQUEST": 0}, idx)]
+      bts = can_list_to_can_capnp(msgs[:1] if idx % 3 == 0 else msgs)
+
+      expected = [p.update_strings([bts]) for p in parsers]
+      self.assertEqual(group.update_strings([bts]), expected)
+      for p, gp in zip(parsers, group_parsers):
+        self.assertEqual(p.vl["STEERING_CONTROL"], gp.vl["STEERING_CONTROL"])
+        self.assertEqual(p.can_valid, gp.can_valid)
+
 
 if __name__ == "__main__":
   unittest.main()
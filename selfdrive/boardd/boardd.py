@@ -1,10 +1,17 @@
 # pylint: skip-file
 
 # Cython, now uses scons to build
-from selfdrive.boardd.boardd_api_impl import can_list_to_can_capnp
+from selfdrive.boardd.boardd_api_impl import can_list_to_can_capnp, can_list_to_can_capnp_many
+from selfdrive.boardd.boardd_api_impl import can_capnp_bytes_to_can_list, can_capnp_bytes_to_can_list_many
 assert can_list_to_can_capnp
+assert can_list_to_can_capnp_many
+assert can_capnp_bytes_to_can_list_many
 
 def can_capnp_to_can_list(can, src_filter=None):
+  # serialized events are parsed natively, without going through capnp readers
+  if isinstance(can, (bytes, bytearray, memoryview)):
+    return can_capnp_bytes_to_can_list(can, src_filter)
+
   ret = []
   for msg in can:
     if src_filter is None or msg.src in src_filter:
@@ -11,16 +11,75 @@ cdef struct can_frame:
   long src
 
 cdef extern void can_list_to_can_capnp_cpp(const vector[can_frame] &can_list, string &out, bool sendCan, bool valid)
+cdef extern size_t can_capnp_to_can_list_cpp(const char *dat, size_t size, vector[can_frame] &can_list, bool has_filter, const vector[long] &src_filter) except +
 
-def can_list_to_can_capnp(can_msgs, msgtype='can', valid=True):
-  cdef vector[can_frame] can_list
+
+cdef int fill_can_list(can_msgs, vector[can_frame] &can_list) except -1:
   cdef can_frame f
-  for can_msg in can_msgs:
-    f.address = can_msg[0]
-    f.busTime = can_msg[1]
-    f.dat = can_msg[2]
-    f.src = can_msg[3]
+  if isinstance(can_msgs, (list, tuple)):
+    can_list.reserve(len(can_msgs))
+  for address, busTime, dat, src in can_msgs:
+    f.address = address
+    f.busTime = busTime
+    f.dat = dat
+    f.src = src
     can_list.push_back(f)
+  return 0
+
+
+def can_list_to_can_capnp(can_msgs, msgtype='can', valid=True):
+  cdef vector[can_frame] can_list
+  fill_can_list(can_msgs, can_list)
   cdef string out
   can_list_to_can_capnp_cpp(can_list, out, msgtype == 'sendcan', valid)
   return out
+
+
+def can_list_to_can_capnp_many(can_msgs_list, msgtype='can', valid=True):
+  """Serializes a list of can lists, returns a list of events"""
+  cdef vector[can_frame] can_list
+  cdef string out
+  cdef bool send_can = msgtype == 'sendcan'
+  ret = []
+  for can_msgs in can_msgs_list:
+    can_list.clear()
+    fill_can_list(can_msgs, can_list)
+    out.clear()
+    can_list_to_can_capnp_cpp(can_list, out, send_can, valid)
+    ret.append(out)
+  return ret
+
+
+cdef size_t parse_can(const unsigned char[::1] dat, vector[can_frame] &can_list, bool has_filter, const vector[long] &src_filter) except? 0:
+  if dat.shape[0] == 0:
+    return 0
+  return can_capnp_to_can_list_cpp(<const char *>&dat[0], dat.shape[0], can_list, has_filter, src_filter)
+
+
+cdef list frames_to_list(vector[can_frame] &can_list, size_t start, size_t end):
+  cdef size_t i
+  return [(can_list[i].address, can_list[i].busTime, can_list[i].dat, can_list[i].src) for i in range(start, end)]
+
+
+def can_capnp_bytes_to_can_list(dat, src_filter=None):
+  """Returns the (address, busTime, dat, src) tuples of a serialized can or sendcan event,
+  given as bytes or any contiguous buffer"""
+  cdef vector[can_frame] can_list
+  cdef bool has_filter = src_filter is not None
+  cdef vector[long] srcs = src_filter if has_filter else []
+  parse_can(dat, can_list, has_filter, srcs)
+  return frames_to_list(can_list, 0, can_list.size())
+
+
+def can_capnp_bytes_to_can_list_many(strings, src_filter=None):
+  """can_capnp_bytes_to_can_list for a list of serialized events, returns a list of can lists"""
+  cdef vector[can_frame] can_list
+  cdef bool has_filter = src_filter is not None
+  cdef vector[long] srcs = src_filter if has_filter else []
+  cdef size_t n
+  ret = []
+  for dat in strings:
+    can_list.clear()
+    n = parse_can(dat, can_list, has_filter, srcs)
+    ret.append(frames_to_list(can_list, 0, n))
+  return ret
@@ -1,6 +1,8 @@
 #include <vector>
 #include <tuple>
 #include <string>
+#include <cstring>
+#include <algorithm>
 #include "common/timing.h"
 #include <capnp/serialize.h>
 #include "cereal/gen/cpp/log.capnp.h"
@@ -29,9 +31,58 @@ void can_list_to_can_capnp_cpp(const std::vector<can_frame> &can_list, std::stri
     canData[j].setDat(kj::arrayPtr((uint8_t*)it->dat.data(), it->dat.size()));
     canData[j].setSrc(it->src);
   }
-  auto words = capnp::messageToFlatArray(msg);
-  auto bytes = words.asBytes();
-  out.append((const char *)bytes.begin(), bytes.size());
+
+  // serialize straight into out, without an intermediate flat array
+  size_t size = capnp::computeSerializedSizeInWords(msg) * sizeof(capnp::word);
+  size_t offset = out.size();
+  out.resize(offset + size);
+  kj::ArrayOutputStream stream(kj::arrayPtr((kj::byte *)&out[offset], size));
+  capnp::writeMessage(stream, msg);
+}
+
+// Appends the frames of a serialized can or sendcan event to can_list. With has_filter,
+// only frames from the buses in src_filter are kept. Returns the number of frames added.
+size_t can_capnp_to_can_list_cpp(const char *dat, size_t size, std::vector<can_frame> &can_list, bool has_filter, const std::vector<long> &src_filter) {
+  size_t num_words = size / sizeof(capnp::word);
+  kj::Array<capnp::word> aligned;
+  kj::ArrayPtr<const capnp::word> words;
+  if (reinterpret_cast<uintptr_t>(dat) % sizeof(capnp::word) == 0) {
+    words = kj::arrayPtr((const capnp::word *)dat, num_words);
+  } else {
+    aligned = kj::heapArray<capnp::word>(num_words);
+    memcpy(aligned.begin(), dat, num_words * sizeof(capnp::word));
+    words = aligned.asPtr();
+  }
+
+  capnp::FlatArrayMessageReader cmsg(words);
+  cereal::Event::Reader event = cmsg.getRoot<cereal::Event>();
+
+  capnp::List<cereal::CanData>::Reader frames;
+  if (event.isCan()) {
+    frames = event.getCan();
+  } else if (event.isSendcan()) {
+    frames = event.getSendcan();
+  } else {
+    return 0;
+  }
+
+  size_t start = can_list.size();
+  can_list.reserve(start + frames.size());
+  for (auto frame : frames) {
+    long src = frame.getSrc();
+    if (has_filter && std::find(src_filter.begin(), src_filter.end(), src) == src_filter.end()) {
+      continue;
+    }
+
+    auto frame_dat = frame.getDat();
+    can_list.emplace_back();
+    can_frame &f = can_list.back();
+    f.address = frame.getAddress();
+    f.busTime = frame.getBusTime();
+    f.dat.assign((const char *)frame_dat.begin(), frame_dat.size());
+    f.src = src;
+  }
+  return can_list.size() - start;
 }
 
 }
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Time can list <-> capnp conversions: the capnp reader path against the native ones on serialized
+events, for one event at a time and in bulk, with the frame counts seen from boardd and controlsd."""
+import random
+import time
+
+from cereal import log
+import selfdrive.boardd.boardd as boardd
+
+N = 2000
+
+
+def random_can_list(cnt):
+  return [(random.randint(0, 0x7ff), random.randint(0, 0xffff), bytes(random.getrandbits(8) for _ in range(8)), random.randint(0, 2))
+          for _ in range(cnt)]
+
+
+def bench(name, f, n_events):
+  t = time.monotonic()
+  f()
+  dt = time.monotonic() - t
+  print("%-40s %8.2f us/event" % (name, dt / n_events * 1e6))
+
+
+if __name__ == "__main__":
+  random.seed(0)
+  for cnt in [8, 64, 256]:
+    print("%d frames per event" % cnt)
+    can_lists = [random_can_list(cnt) for _ in range(N)]
+    strings = [boardd.can_list_to_can_capnp(can_list) for can_list in can_lists]
+
+    bench("can_list_to_can_capnp", lambda: [boardd.can_list_to_can_capnp(c) for c in can_lists], N)
+    bench("can_list_to_can_capnp_many", lambda: boardd.can_list_to_can_capnp_many(can_lists), N)
+
+    bench("can_capnp_to_can_list (capnp reader)",
+          lambda: [boardd.can_capnp_to_can_list(log.Event.from_bytes(s).can) for s in strings], N)
+    bench("can_capnp_to_can_list (bytes)", lambda: [boardd.can_capnp_to_can_list(s) for s in strings], N)
+    bench("can_capnp_bytes_to_can_list_many", lambda: boardd.can_capnp_bytes_to_can_list_many(strings), N)
+    bench("can_capnp_bytes_to_can_list_many bus 0", lambda: boardd.can_capnp_bytes_to_can_list_many(strings, [0]), N)
+    print()
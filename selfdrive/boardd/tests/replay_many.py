@@ -34,9 +34,7 @@ def send_thread(sender_serial):
       can_sock = messaging.sub_sock('can')
 
       while True:
-        tsc = messaging.recv_one(can_sock)
-        snd = can_capnp_to_can_list(tsc.can)
-        snd = list(filter(lambda x: x[-1] <= 2, snd))
+        snd = can_capnp_to_can_list(can_sock.receive(), src_filter=[0, 1, 2])
 
         try:
           sender.can_send_many(snd)
@@ -53,6 +53,38 @@ class TestBoarddApiMethods(unittest.TestCase):
         for attr in attrs:
           self.assertEqual(getattr(ev.can[i], attr, 'new'), getattr(ev_old.can[i], attr, 'old'))
 
+  def test_can_list_roundtrip(self):
+    for _ in range(100):
+      can_list, _ = generate_random_can_data_list()
+      can_list = [tuple(m) for m in can_list]
+      ev = log.Event.from_bytes(boardd.can_list_to_can_capnp(can_list, 'sendcan'))
+
+      for msgtype in ['can', 'sendcan']:
+        m = boardd.can_list_to_can_capnp(can_list, msgtype)
+        self.assertEqual(boardd.can_capnp_to_can_list(m), can_list)
+        self.assertEqual(boardd.can_capnp_to_can_list(m), boardd.can_capnp_to_can_list(ev.sendcan))
+
+        # unaligned buffer
+        self.assertEqual(boardd.can_capnp_to_can_list(memoryview(b"\x00" + m)[1:]), can_list)
+
+        src_filter = [0, 1, 2, can_list[0][3]]
+        self.assertEqual(boardd.can_capnp_to_can_list(m, src_filter), boardd.can_capnp_to_can_list(ev.sendcan, src_filter))
+
+        # an empty filter keeps nothing, like the capnp reader path
+        self.assertEqual(boardd.can_capnp_to_can_list(m, []), [])
+        self.assertEqual(boardd.can_capnp_to_can_list(ev.sendcan, []), [])
+
+  def test_many(self):
+    can_lists = [[tuple(m) for m in generate_random_can_data_list()[0]] for _ in range(10)]
+    strings = boardd.can_list_to_can_capnp_many(can_lists, 'can')
+    self.assertEqual(len(strings), len(can_lists))
+    for m in strings:
+      self.assertEqual(log.Event.from_bytes(m).which(), 'can')
+    self.assertEqual(boardd.can_capnp_bytes_to_can_list_many(strings), can_lists)
+    self.assertEqual(boardd.can_capnp_bytes_to_can_list_many(strings, [1]),
+                     [[m for m in can_list if m[3] == 1] for can_list in can_lists])
+    self.assertEqual(boardd.can_capnp_bytes_to_can_list_many(strings, []), [[] for _ in can_lists])
+
   def test_performance(self):
     can_list, cnt = generate_random_can_data_list()
     recursions = 1000
@@ -1,7 +1,8 @@
 import os
 from common.params import Params
 from common.basedir import BASEDIR
-from selfdrive.car.fingerprints import eliminate_incompatible_cars, all_known_cars
+from selfdrive.car.fingerprints import BRANDS, get_brand_values, all_known_cars, compatible_cars_mask, \
+                                       cars_from_mask, cars_to_mask, ALL_CARS_MASK
 from selfdrive.car.vin import get_vin, VIN_UNKNOWN
 from selfdrive.car.fw_versions import get_fw_versions, match_fw_to_car
 from selfdrive.swaglog import cloudlog
@@ -12,8 +13,9 @@ from cereal import car
 
 def get_startup_alert(car_recognized, controller_available):
   alert = 'startup'
-  if Params().get("GitRemote", encoding="utf8") in ['git@github.com:commaai/openpilot.git', 'https://github.com/commaai/openpilot.git']:
-    if Params().get("GitBranch", encoding="utf8") not in ['devel', 'release2-staging', 'dashcam-staging', 'release2', 'dashcam']:
+  params = Params()
+  if params.get("GitRemote", encoding="utf8") in ['git@github.com:commaai/openpilot.git', 'https://github.com/commaai/openpilot.git']:
+    if params.get("GitBranch", encoding="utf8") not in ['devel', 'release2-staging', 'dashcam-staging', 'release2', 'dashcam']:
       alert = 'startupMaster'
   if not car_recognized:
     alert = 'startupNoCar'
@@ -44,29 +46,41 @@ def load_interfaces(brand_names):
 
 
 def _get_interface_names():
-  # read all the folders in selfdrive/car and return a dict where:
+  # return a dict where:
   # - keys are all the car names that which we have an interface for
   # - values are lists of spefic car models for a given car
   brand_names = {}
-  for car_folder in [x[0] for x in os.walk(BASEDIR + '/selfdrive/car')]:
-    try:
-      brand_name = car_folder.split('/')[-1]
-      model_names = __import__('selfdrive.car.%s.values' % brand_name, fromlist=['CAR']).CAR
-      model_names = [getattr(model_names, c) for c in model_names.__dict__.keys() if not c.startswith("__")]
-      brand_names[brand_name] = model_names
-    except (ImportError, IOError):
-      pass
+  for brand_name in BRANDS:
+    model_names = get_brand_values(brand_name).CAR
+    model_names = [getattr(model_names, c) for c in model_names.__dict__.keys() if not c.startswith("__")]
+    brand_names[brand_name] = model_names
 
   return brand_names
 
 
-# imports from directory selfdrive/car/<name>/
+class InterfaceRegistry(dict):
+  """Maps car models to (CarInterface, CarController, CarState), importing a brand's modules on first lookup"""
+  def __init__(self, brand_names):
+    super().__init__()
+    self.brand_names = brand_names
+    self.model_to_brand = {m: b for b, models in brand_names.items() for m in models}
+
+  def __missing__(self, model_name):
+    brand_name = self.model_to_brand[model_name]
+    self.update(load_interfaces({brand_name: self.brand_names[brand_name]}))
+    return self[model_name]
+
+
+# imports from directory selfdrive/car/<name>/ when a model is first used
 interface_names = _get_interface_names()
-interfaces = load_interfaces(interface_names)
+interfaces = InterfaceRegistry(interface_names)
+
+
+_TOYOTA_MASK = cars_to_mask(c for c in all_known_cars() if "TOYOTA" in c or "LEXUS" in c)
 
 
-def only_toyota_left(candidate_cars):
-  return all(("TOYOTA" in c or "LEXUS" in c) for c in candidate_cars) and len(candidate_cars) > 0
+def only_toyota_left(candidate_mask):
+  return candidate_mask != 0 and (candidate_mask & ~_TOYOTA_MASK) == 0
 
 
 # **** for use live only ****
@@ -90,7 +104,7 @@ def fingerprint(logcan, sendcan, has_relay):
     else:
       cloudlog.warning("Getting VIN & FW versions")
       _, vin = get_vin(logcan, sendcan, bus)
-      car_fw = get_fw_versions(logcan, sendcan, bus)
+      car_fw = get_fw_versions(logcan, sendcan, bus, early_exit=True)
 
     fw_candidates = match_fw_to_car(car_fw)
   else:
@@ -101,7 +115,7 @@ def fingerprint(logcan, sendcan, has_relay):
   Params().put("CarVin", vin)
 
   finger = gen_empty_fingerprint()
-  candidate_cars = {i: all_known_cars() for i in [0]}  # attempt fingerprint on bus 0 only
+  candidate_cars = {i: ALL_CARS_MASK for i in [0]}  # attempt fingerprint on bus 0 only
   frame = 0
   frame_fingerprint = 10  # 0.1s
   car_fingerprint = None
@@ -121,7 +135,7 @@ def fingerprint(logcan, sendcan, has_relay):
       for b in candidate_cars:
         if (can.src == b or (only_toyota_left(candidate_cars[b]) and can.src == 2)) and \
            can.address < 0x800 and can.address not in [0x7df, 0x7e0, 0x7e8]:
-          candidate_cars[b] = eliminate_incompatible_cars(can, candidate_cars[b])
+          candidate_cars[b] &= compatible_cars_mask(can.address, len(can.dat))
 
     # if we only have one car choice and the time since we got our first
     # message has elapsed, exit
@@ -129,13 +143,14 @@ def fingerprint(logcan, sendcan, has_relay):
       # Toyota needs higher time to fingerprint, since DSU does not broadcast immediately
       if only_toyota_left(candidate_cars[b]):
         frame_fingerprint = 100  # 1s
-      if len(candidate_cars[b]) == 1:
+      # a single bit set means one car left
+      if candidate_cars[b] != 0 and candidate_cars[b] & (candidate_cars[b] - 1) == 0:
         if frame > frame_fingerprint:
           # fingerprint done
-          car_fingerprint = candidate_cars[b][0]
+          car_fingerprint = cars_from_mask(candidate_cars[b])[0]
 
     # bail if no cars left or we've been waiting for more than 2s
-    failed = all(len(cc) == 0 for cc in candidate_cars.values()) or frame > 200
+    failed = all(cc == 0 for cc in candidate_cars.values()) or frame > 200
     succeeded = car_fingerprint is not None
     done = failed or succeeded
 
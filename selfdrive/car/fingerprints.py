@@ -1,30 +1,32 @@
-import os
-from common.basedir import BASEDIR
+from collections import defaultdict
+
+# brand folders in selfdrive/car, each with a values module. Keep in sync when adding a brand,
+# selfdrive/car/tests/test_car_registry.py checks it against the directory
+BRANDS = ('chrysler', 'ford', 'gm', 'honda', 'hyundai', 'mock', 'subaru', 'toyota', 'volkswagen')
+
+
+def get_brand_values(brand_name):
+  return __import__('selfdrive.car.%s.values' % brand_name, fromlist=['CAR'])
 
 
 def get_attr_from_cars(attr, result=dict):
-  # read all the folders in selfdrive/car and return a dict where:
+  # go through the values module of all brands and return a dict where:
   # - keys are all the car models
   # - values are attr values from all car folders
   result = result()
 
-  for car_folder in [x[0] for x in os.walk(BASEDIR + '/selfdrive/car')]:
-    try:
-      car_name = car_folder.split('/')[-1]
-      values = __import__('selfdrive.car.%s.values' % car_name, fromlist=[attr])
-      if hasattr(values, attr):
-        attr_values = getattr(values, attr)
-      else:
-        continue
-
-      if isinstance(attr_values, dict):
-        for f, v in attr_values.items():
-          result[f] = v
-      elif isinstance(attr_values, list):
-        result += attr_values
+  for brand_name in BRANDS:
+    values = get_brand_values(brand_name)
+    if hasattr(values, attr):
+      attr_values = getattr(values, attr)
+    else:
+      continue
 
-    except (ImportError, IOError):
-      pass
+    if isinstance(attr_values, dict):
+      for f, v in attr_values.items():
+        result[f] = v
+    elif isinstance(attr_values, list):
+      result += attr_values
 
   return result
 
@@ -35,12 +37,52 @@ IGNORED_FINGERPRINTS = get_attr_from_cars('IGNORED_FINGERPRINTS', list)
 
 _DEBUG_ADDRESS = {1880: 8}   # reserved for debug purposes
 
+# candidate cars are tracked as bitsets, with a bit per car in all_known_cars() order
+_CAR_BITS = {car_name: 1 << i for i, car_name in enumerate(_FINGERPRINTS)}
+ALL_CARS_MASK = (1 << len(_CAR_BITS)) - 1
+
+
+def cars_to_mask(cars):
+  mask = 0
+  for car_name in cars:
+    mask |= _CAR_BITS[car_name]
+  return mask
+
+
+def cars_from_mask(mask):
+  return [car_name for car_name, bit in _CAR_BITS.items() if mask & bit]
+
+
+def _build_fingerprint_index():
+  # (address, length) -> mask of the cars with a fingerprint containing that message
+  index = defaultdict(int)
+  for car_name, car_fingerprints in _FINGERPRINTS.items():
+    if car_name in IGNORED_FINGERPRINTS:
+      continue
+    for fingerprint in car_fingerprints:
+      for adr, length in {**fingerprint, **_DEBUG_ADDRESS}.items():  # add alien debug address
+        index[(adr, length)] |= _CAR_BITS[car_name]
+  return dict(index)
+
+
+_FINGERPRINT_INDEX = _build_fingerprint_index()
+_NOT_IGNORED_MASK = ALL_CARS_MASK & ~cars_to_mask(c for c in IGNORED_FINGERPRINTS if c in _CAR_BITS)
+
+
 def is_valid_for_fingerprint(msg, car_fingerprint):
   adr = msg.address
   # ignore addresses that are more than 11 bits
   return (adr in car_fingerprint and car_fingerprint[adr] == len(msg.dat)) or adr >= 0x800
 
 
+def compatible_cars_mask(address, length):
+  """Returns the mask of cars that could have sent a message with this address and length."""
+  # ignore addresses that are more than 11 bits
+  if address >= 0x800:
+    return _NOT_IGNORED_MASK
+  return _FINGERPRINT_INDEX.get((address, length), 0)
+
+
 def eliminate_incompatible_cars(msg, candidate_cars):
   """Removes cars that could not have sent msg.
 
@@ -51,22 +93,8 @@ def eliminate_incompatible_cars(msg, candidate_cars):
      Returns:
       A list containing the subset of candidate_cars that could have sent msg.
   """
-  compatible_cars = []
-
-  for car_name in candidate_cars:
-    if car_name in IGNORED_FINGERPRINTS:
-      continue
-
-    car_fingerprints = _FINGERPRINTS[car_name]
-
-    for fingerprint in car_fingerprints:
-      fingerprint.update(_DEBUG_ADDRESS)  # add alien debug address
-
-      if is_valid_for_fingerprint(msg, fingerprint):
-        compatible_cars.append(car_name)
-        break
-
-  return compatible_cars
+  mask = compatible_cars_mask(msg.address, len(msg.dat))
+  return [car_name for car_name in candidate_cars if _CAR_BITS[car_name] & mask]
 
 
 def all_known_cars():
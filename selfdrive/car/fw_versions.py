@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import traceback
 import struct
+from collections import defaultdict
 from tqdm import tqdm
 
 from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery
@@ -70,41 +71,104 @@ def chunks(l, n=128):
     yield l[i:i + n]
 
 
-def match_fw_to_car(fw_versions):
-  candidates = FW_VERSIONS
-  invalid = []
+ESSENTIAL_ECUS = [Ecu.engine, Ecu.eps, Ecu.esp, Ecu.fwdRadar, Ecu.fwdCamera, Ecu.vsa, Ecu.electricBrakeBooster]
+
+
+def ecu_required(candidate, ecu_type):
+  """Whether a car without a response from this ECU can't be the candidate"""
+  if ecu_type == Ecu.esp and candidate in [TOYOTA.RAV4, TOYOTA.COROLLA, TOYOTA.HIGHLANDER]:
+    return False
+
+  # TODO: COROLLA_TSS2 engine can show on two different addresses
+  if ecu_type == Ecu.engine and candidate in [TOYOTA.COROLLA_TSS2, TOYOTA.CHR]:
+    return False
+
+  # ignore non essential ecus
+  return ecu_type in ESSENTIAL_ECUS
+
+
+class FwMatchIndex():
+  """Candidate sets per ECU and version, built once from a FW version database"""
+  def __init__(self, versions):
+    self.candidates = set(versions.keys())
+    self.num_ecus = {candidate: len(fws) for candidate, fws in versions.items()}
+
+    # (addr, sub_addr) -> (ecu_type, addr, sub_addr) keys using that address
+    self.ecus = defaultdict(list)
+    # (addr, sub_addr) -> cars with an ECU on that address
+    self.addr_candidates = defaultdict(set)
+    # (ecu_type, addr, sub_addr) -> cars with that ECU
+    self.ecu_candidates = defaultdict(set)
+    # (ecu_type, addr, sub_addr) -> cars that can't match if the ECU doesn't respond
+    self.required = defaultdict(set)
+    # (ecu_type, addr, sub_addr, version) -> cars with that version
+    self.version_candidates = defaultdict(set)
+
+    for candidate, fws in versions.items():
+      for ecu, expected_versions in fws.items():
+        if ecu not in self.ecu_candidates:
+          self.ecus[ecu[1:]].append(ecu)
+        self.ecu_candidates[ecu].add(candidate)
+        self.addr_candidates[ecu[1:]].add(candidate)
+        if ecu_required(candidate, ecu[0]):
+          self.required[ecu].add(candidate)
+        for version in expected_versions:
+          self.version_candidates[ecu + (version,)].add(candidate)
+
+    # cars that fail when nothing responds on an address
+    self.missing_invalid = {addr: set().union(*[self.required[ecu] for ecu in ecus]) for addr, ecus in self.ecus.items()}
+
+  def match(self, fw_versions_dict, unknown=()):
+    """Returns the cars matching all received versions, and for every car the
+    fraction of its ECUs whose received version is a known one. Addresses in
+    unknown are skipped, neither their version nor a missing response rules out a car."""
+    invalid = set()
+    matched = defaultdict(int)
+
+    for addr, ecus in self.ecus.items():
+      if addr in unknown:
+        continue
+
+      found_version = fw_versions_dict.get(addr, None)
+      if found_version is None:
+        invalid |= self.missing_invalid[addr]
+        continue
+
+      for ecu in ecus:
+        valid = self.version_candidates.get(ecu + (found_version,), set())
+        invalid |= self.ecu_candidates[ecu] - valid
+        for candidate in valid:
+          matched[candidate] += 1
 
+    scores = {candidate: matched[candidate] / self.num_ecus[candidate] for candidate in self.candidates}
+    return self.candidates - invalid, scores
+
+
+FW_MATCH_INDEX = FwMatchIndex(FW_VERSIONS)
+
+
+def get_fw_versions_dict(fw_versions):
   fw_versions_dict = {}
   for fw in fw_versions:
     addr = fw.address
     sub_addr = fw.subAddress if fw.subAddress != 0 else None
     fw_versions_dict[(addr, sub_addr)] = fw.fwVersion
+  return fw_versions_dict
 
-  for candidate, fws in candidates.items():
-    for ecu, expected_versions in fws.items():
-      ecu_type = ecu[0]
-      addr = ecu[1:]
-      found_version = fw_versions_dict.get(addr, None)
-      ESSENTIAL_ECUS = [Ecu.engine, Ecu.eps, Ecu.esp, Ecu.fwdRadar, Ecu.fwdCamera, Ecu.vsa, Ecu.electricBrakeBooster]
-      if ecu_type == Ecu.esp and candidate in [TOYOTA.RAV4, TOYOTA.COROLLA, TOYOTA.HIGHLANDER] and found_version is None:
-        continue
-
-      # TODO: COROLLA_TSS2 engine can show on two different addresses
-      if ecu_type == Ecu.engine and candidate in [TOYOTA.COROLLA_TSS2, TOYOTA.CHR] and found_version is None:
-        continue
 
-      # ignore non essential ecus
-      if ecu_type not in ESSENTIAL_ECUS and found_version is None:
-        continue
+def match_fw_to_car_scores(fw_versions, index=FW_MATCH_INDEX):
+  """Returns the set of exactly matching cars, and per car the fraction of its ECUs that match"""
+  return index.match(get_fw_versions_dict(fw_versions))
 
-      if found_version not in expected_versions:
-        invalid.append(candidate)
-        break
 
-  return set(candidates.keys()) - set(invalid)
+def match_fw_to_car(fw_versions, index=FW_MATCH_INDEX):
+  return match_fw_to_car_scores(fw_versions, index)[0]
 
 
-def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False, progress=False):
+def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False, progress=False, early_exit=False):
+  """Queries the FW versions of all known ECUs. With early_exit, stops as soon as
+  the received versions match a single car that has no ECU left to query, so the
+  remaining queries can't change the match."""
   ecu_types = {}
 
   # Extract ECU adresses to query from fingerprints
@@ -113,8 +177,10 @@ def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False,
   parallel_addrs = []
 
   versions = FW_VERSIONS
+  index = FW_MATCH_INDEX
   if extra is not None:
-    versions.update(extra)
+    versions = {**FW_VERSIONS, **extra}
+    index = FwMatchIndex(versions)
 
   for c in versions.values():
     for ecu_type, addr, sub_addr in c.keys():
@@ -131,17 +197,36 @@ def get_fw_versions(logcan, sendcan, bus, extra=None, timeout=0.1, debug=False,
 
   addrs.insert(0, parallel_addrs)
 
+  # Go through the request variants one at a time over all addresses, so a single variant
+  # (e.g. the Honda UDS request) can be enough to identify the car
+  queries = [(req_idx, i, addr_chunk) for req_idx in range(len(REQUESTS))
+                                      for i, addr in enumerate(addrs)
+                                      for addr_chunk in chunks(addr)]
+
+  # address -> index of the last query sending it a request variant
+  last_query = {a: j for j, (_, _, addr_chunk) in enumerate(queries) for a in addr_chunk}
+
   fw_versions = {}
-  for i, addr in enumerate(tqdm(addrs, disable=not progress)):
-    for addr_chunk in chunks(addr):
-      for request, response in REQUESTS:
-        try:
-          query = IsoTpParallelQuery(sendcan, logcan, bus, addr_chunk, request, response, debug=debug)
-          t = 2 * timeout if i == 0 else timeout
-          fw_versions.update(query.get_data(t))
-        except Exception:
-          cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
+  for j, (req_idx, i, addr_chunk) in enumerate(tqdm(queries, disable=not progress)):
+    request, response = REQUESTS[req_idx]
+    try:
+      query = IsoTpParallelQuery(sendcan, logcan, bus, addr_chunk, request, response, debug=debug)
+      t = 2 * timeout if i == 0 else timeout
+      fw_versions.update(query.get_data(t))
+    except Exception:
+      cloudlog.warning(f"FW query exception: {traceback.format_exc()}")
+
+    if early_exit and fw_versions:
+      # a later variant can still answer, or change the answer of, an address that has queries left
+      pending = {a for a, last in last_query.items() if last > j}
+      candidates = index.match(fw_versions, pending)[0]
+      if len(candidates) == 1 and not any(candidates & index.addr_candidates[a] for a in pending):
+        break
+
+  return build_car_fw(fw_versions, ecu_types)
+
 
+def build_car_fw(fw_versions, ecu_types):
   # Build capnp list to put into CarParams
   car_fw = []
   for addr, version in fw_versions.items():
@@ -193,7 +278,7 @@ if __name__ == "__main__":
 
   t = time.time()
   fw_vers = get_fw_versions(logcan, sendcan, 1, extra=extra, debug=args.debug, progress=True)
-  candidates = match_fw_to_car(fw_vers)
+  candidates, scores = match_fw_to_car_scores(fw_vers)
 
   print()
   print("Found FW versions")
@@ -205,4 +290,5 @@ if __name__ == "__main__":
 
   print()
   print("Possible matches:", candidates)
+  print("Closest partial matches:", sorted(scores.items(), key=lambda x: -x[1])[:5])
   print("Getting fw took %.3f s" % (time.time() - t))
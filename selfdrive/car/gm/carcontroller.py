@@ -1,6 +1,6 @@
 from cereal import car
 from common.realtime import DT_CTRL
-from common.numpy_fast import interp
+from common.numpy_fast import Interp1D
 from selfdrive.config import Conversions as CV
 from selfdrive.car import apply_std_steer_torque_limits
 from selfdrive.car.gm import gmcan
@@ -36,6 +36,8 @@ class CarControllerParams():
     self.GAS_LOOKUP_V = [self.MAX_ACC_REGEN, ZERO_GAS, MAX_GAS]
     self.BRAKE_LOOKUP_BP = [-1., -0.25]
     self.BRAKE_LOOKUP_V = [MAX_BRAKE, 0]
+    self.GAS_LOOKUP = Interp1D(self.GAS_LOOKUP_BP, self.GAS_LOOKUP_V)
+    self.BRAKE_LOOKUP = Interp1D(self.BRAKE_LOOKUP_BP, self.BRAKE_LOOKUP_V)
 
 
 def actuator_hystereses(final_pedal, pedal_steady):
@@ -106,8 +108,8 @@ class CarController():
       apply_gas = P.MAX_ACC_REGEN
       apply_brake = 0
     else:
-      apply_gas = int(round(interp(final_pedal, P.GAS_LOOKUP_BP, P.GAS_LOOKUP_V)))
-      apply_brake = int(round(interp(final_pedal, P.BRAKE_LOOKUP_BP, P.BRAKE_LOOKUP_V)))
+      apply_gas = int(round(P.GAS_LOOKUP(final_pedal)))
+      apply_brake = int(round(P.BRAKE_LOOKUP(final_pedal)))
 
     # Gas/regen and brakes - all at 25Hz
     if (frame % 4) == 0:
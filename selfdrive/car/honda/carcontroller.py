@@ -2,7 +2,7 @@ from collections import namedtuple
 from cereal import car
 from common.realtime import DT_CTRL
 from selfdrive.controls.lib.drive_helpers import rate_limit
-from common.numpy_fast import clip, interp
+from common.numpy_fast import clip, Interp1D
 from selfdrive.car import create_gas_command
 from selfdrive.car.honda import hondacan
 from selfdrive.car.honda.values import CruiseButtons, CAR, VISUAL_HUD
@@ -83,6 +83,7 @@ class CarControllerParams():
       assert(CP.lateralParams.torqueBP[0] == 0)
       self.STEER_LOOKUP_BP = [v * -1 for v in CP.lateralParams.torqueBP][1:][::-1] + list(CP.lateralParams.torqueBP)
       self.STEER_LOOKUP_V = [v * -1 for v in CP.lateralParams.torqueV][1:][::-1] + list(CP.lateralParams.torqueV)
+      self.STEER_LOOKUP = Interp1D(self.STEER_LOOKUP_BP, self.STEER_LOOKUP_V)
 
 class CarController():
   def __init__(self, dbc_name, CP, VM):
@@ -137,7 +138,7 @@ class CarController():
     # steer torque is converted back to CAN reference (positive when steering right)
     apply_gas = clip(actuators.gas, 0., 1.)
     apply_brake = int(clip(self.brake_last * P.BRAKE_MAX, 0, P.BRAKE_MAX - 1))
-    apply_steer = int(interp(-actuators.steer * P.STEER_MAX, P.STEER_LOOKUP_BP, P.STEER_LOOKUP_V))
+    apply_steer = int(P.STEER_LOOKUP(-actuators.steer * P.STEER_MAX))
 
     lkas_active = enabled and not CS.steer_not_allowed
 
@@ -1,12 +1,16 @@
 from cereal import car
 from collections import defaultdict
-from common.numpy_fast import interp
+from common.numpy_fast import Interp1D
 from opendbc.can.can_define import CANDefine
 from opendbc.can.parser import CANParser
 from selfdrive.config import Conversions as CV
 from selfdrive.car.interfaces import CarStateBase
 from selfdrive.car.honda.values import CAR, DBC, STEER_THRESHOLD, SPEED_FACTOR, HONDA_BOSCH
 
+# weight of the wheel speeds against the transmission speed. don't trust smooth speed at low values to avoid
+# premature zero snapping, smooth blending, below ~0.6m/s the smooth speed snaps to zero
+V_WEIGHT = Interp1D([1., 6.], [0., 1.])
+
 def calc_cruise_offset(offset, speed):
   # euristic formula so that speed is controlled to ~ 0.3m/s below pid_speed
   # constraints to solve for _K0, _K1, _K2 are:
@@ -170,10 +174,6 @@ class CarState(CarStateBase):
   def update(self, cp, cp_cam):
     ret = car.CarState.new_message()
 
-    # car params
-    v_weight_v = [0., 1.]  # don't trust smooth speed at low values to avoid premature zero snapping
-    v_weight_bp = [1., 6.]   # smooth blending, below ~0.6m/s the smooth speed snaps to zero
-
     # update prevs, update must run once per loop
     self.prev_cruise_buttons = self.cruise_buttons
     self.prev_cruise_setting = self.cruise_setting
@@ -214,7 +214,7 @@ class CarState(CarStateBase):
     v_wheel = (ret.wheelSpeeds.fl + ret.wheelSpeeds.fr + ret.wheelSpeeds.rl + ret.wheelSpeeds.rr)/4.
 
     # blend in transmission speed at low speed, since it has more low speed accuracy
-    v_weight = interp(v_wheel, v_weight_bp, v_weight_v)
+    v_weight = V_WEIGHT(v_wheel)
     ret.vEgoRaw = (1. - v_weight) * cp.vl["ENGINE_DATA"]['XMISSION_SPEED'] * CV.KPH_TO_MS * speed_factor + v_weight * v_wheel
     ret.vEgo, ret.aEgo = self.update_speed_kf(ret.vEgoRaw)
 
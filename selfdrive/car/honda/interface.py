@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import numpy as np
 from cereal import car
-from common.numpy_fast import clip, interp
+from common.numpy_fast import clip, Interp1D
 from common.realtime import DT_CTRL
 from selfdrive.swaglog import cloudlog
 from selfdrive.config import Conversions as CV
@@ -13,6 +13,12 @@ from selfdrive.car.interfaces import CarInterfaceBase
 
 A_ACC_MAX = max(_A_CRUISE_MAX_V_FOLLOWING)
 
+# normalized max accel. Allowing max accel at low speed causes speed overshoots
+_MAX_ACCEL = Interp1D([10, 20], [0.714, 1.0])  # m/s -> unit of max accel
+_ACCEL_LIMITER = Interp1D([0.3, 1.1], [1.0, 0.1])
+_SPEED_LIMITER = Interp1D([0.0, 0.5], [1.0, 0.1])
+_SPEED_RANGE_LIMITER = Interp1D([-1., 0.], [1., 0.])
+
 ButtonType = car.CarState.ButtonEvent.Type
 
 def compute_gb_honda(accel, speed):
@@ -83,30 +89,18 @@ class CarInterface(CarInterfaceBase):
 
   @staticmethod
   def calc_accel_override(a_ego, a_target, v_ego, v_target):
-
-    # normalized max accel. Allowing max accel at low speed causes speed overshoots
-    max_accel_bp = [10, 20]    # m/s
-    max_accel_v = [0.714, 1.0] # unit of max accel
-    max_accel = interp(v_ego, max_accel_bp, max_accel_v)
+    max_accel = _MAX_ACCEL(v_ego)
 
     # limit the pcm accel cmd if:
     # - v_ego exceeds v_target, or
     # - a_ego exceeds a_target and v_ego is close to v_target
 
     eA = a_ego - a_target
-    valuesA = [1.0, 0.1]
-    bpA = [0.3, 1.1]
-
     eV = v_ego - v_target
-    valuesV = [1.0, 0.1]
-    bpV = [0.0, 0.5]
-
-    valuesRangeV = [1., 0.]
-    bpRangeV = [-1., 0.]
 
     # only limit if v_ego is close to v_target
-    speedLimiter = interp(eV, bpV, valuesV)
-    accelLimiter = max(interp(eA, bpA, valuesA), interp(eV, bpRangeV, valuesRangeV))
+    speedLimiter = _SPEED_LIMITER(eV)
+    accelLimiter = max(_ACCEL_LIMITER(eA), _SPEED_RANGE_LIMITER(eV))
 
     # accelOverride is more or less the max throttle allowed to pcm: usually set to a constant
     # unless aTargetMax is very high and then we scale with it; this help in quicker restart
@@ -417,8 +411,7 @@ class CarInterface(CarInterfaceBase):
   # returns a car.CarState
   def update(self, c, can_strings):
     # ******************* do can recv *******************
-    self.cp.update_strings(can_strings)
-    self.cp_cam.update_strings(can_strings)
+    self.can_parsers.update_strings(can_strings)
 
     ret = self.CS.update(self.cp, self.cp_cam)
 
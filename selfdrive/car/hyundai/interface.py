@@ -5,6 +5,7 @@ from selfdrive.controls.lib.drive_helpers import EventTypes as ET, create_event
 from selfdrive.car.hyundai.values import Ecu, ECU_FINGERPRINT, CAR, FINGERPRINTS
 from selfdrive.car import STD_CARGO_KG, scale_rot_inertia, scale_tire_stiffness, is_ecu_disconnected, gen_empty_fingerprint
 from selfdrive.car.interfaces import CarInterfaceBase
+from opendbc.can.parser import CANParserGroup
 
 GearShifter = car.CarState.GearShifter
 
@@ -12,6 +13,7 @@ class CarInterface(CarInterfaceBase):
   def __init__(self, CP, CarController, CarState):
     super().__init__(CP, CarController, CarState)
     self.cp2 = self.CS.get_can2_parser(CP)
+    self.can_parsers = CANParserGroup([self.cp, self.cp2, self.cp_cam])
     self.lkas_button_alert = False
 
   @staticmethod
@@ -234,9 +236,7 @@ class CarInterface(CarInterfaceBase):
     return ret
 
   def update(self, c, can_strings):
-    self.cp.update_strings(can_strings)
-    self.cp2.update_strings(can_strings)
-    self.cp_cam.update_strings(can_strings)
+    self.can_parsers.update_strings(can_strings)
 
     ret = self.CS.update(self.cp, self.cp2, self.cp_cam)
     ret.canValid = self.cp.can_valid and self.cp2.can_valid and self.cp_cam.can_valid
@@ -6,6 +6,7 @@ from common.realtime import DT_CTRL
 from selfdrive.car import gen_empty_fingerprint
 from selfdrive.controls.lib.drive_helpers import EventTypes as ET, create_event
 from selfdrive.controls.lib.vehicle_model import VehicleModel
+from opendbc.can.parser import CANParserGroup
 
 GearShifter = car.CarState.GearShifter
 
@@ -22,6 +23,8 @@ class CarInterfaceBase():
     self.CS = CarState(CP)
     self.cp = self.CS.get_can_parser(CP)
     self.cp_cam = self.CS.get_cam_can_parser(CP)
+    # decodes every can event once for all parsers
+    self.can_parsers = CANParserGroup([cp for cp in (self.cp, self.cp_cam) if cp is not None])
 
     self.CC = None
     if CarController is not None:
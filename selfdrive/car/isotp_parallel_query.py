@@ -1,15 +1,17 @@
+import math
 import time
 from collections import defaultdict
 from functools import partial
 
 import cereal.messaging as messaging
+from cereal import log
 from selfdrive.swaglog import cloudlog
 from selfdrive.boardd.boardd import can_list_to_can_capnp
 from panda.python.uds import CanClient, IsoTpMessage, FUNCTIONAL_ADDRS, get_rx_addr_for_tx_addr
 
 
 class IsoTpParallelQuery():
-  def __init__(self, sendcan, logcan, bus, addrs, request, response, functional_addr=False, debug=False):
+  def __init__(self, sendcan, logcan, bus, addrs, request, response, functional_addr=False, debug=False, poller=None):
     self.sendcan = sendcan
     self.logcan = logcan
     self.bus = bus
@@ -18,6 +20,12 @@ class IsoTpParallelQuery():
     self.debug = debug
     self.functional_addr = functional_addr
 
+    # waits on logcan for the next frames, pass one to share it between queries
+    if poller is None:
+      poller = messaging.Poller()
+      poller.registerSocket(logcan)
+    self.poller = poller
+
     self.real_addrs = []
     for a in addrs:
       if isinstance(a, tuple):
@@ -26,21 +34,49 @@ class IsoTpParallelQuery():
         self.real_addrs.append((a, None))
 
     self.msg_addrs = {tx_addr: get_rx_addr_for_tx_addr(tx_addr[0]) for tx_addr in self.real_addrs}
+
+    # frames are sorted on arrival by (rx addr, sub addr), sub addr being the first byte for ECUs using one
+    self.rx_addrs = set(self.msg_addrs.values())
+    self.sub_addr_rx_addrs = {rx_addr for tx_addr, rx_addr in self.msg_addrs.items() if tx_addr[1] is not None}
+    self.rx_key_to_tx_addr = {}
+    for tx_addr, rx_addr in self.msg_addrs.items():
+      # rx_addr not set when using functional tx addr
+      self.rx_key_to_tx_addr[(rx_addr or tx_addr[0], tx_addr[1])] = tx_addr
     self.msg_buffer = defaultdict(list)
 
-  def rx(self):
-    """Drain can socket and sort messages into buffers based on address"""
-    can_packets = messaging.drain_sock(self.logcan, wait_for_one=True)
+  def rx(self, timeout=0.):
+    """Waits up to timeout seconds for can messages and sorts the frames from the queried ECUs into buffers.
+    Returns the tx addrs of the ECUs with new frames."""
+    updated = set()
+    if not self.poller.poll(max(math.ceil(timeout * 1000), 0)):
+      return updated
+
+    for dat in self.logcan.receive_many():
+      for msg in log.Event.from_bytes(dat).can:
+        # only the frames sent to us are copied out of the event
+        if msg.src != self.bus:
+          continue
+
+        address = msg.address
+        if self.functional_addr:
+          if (0x7E8 <= address <= 0x7EF) or (0x18DAF100 <= address <= 0x18DAF1FF):
+            key = (next(a for a in FUNCTIONAL_ADDRS if address - a <= 32), None)
+          else:
+            continue
+        elif address in self.rx_addrs:
+          key = (address, None)
+        else:
+          continue
+
+        dat = msg.dat
+        if address in self.sub_addr_rx_addrs and len(dat):
+          key = (address, dat[0])
 
-    for packet in can_packets:
-      for msg in packet.can:
-        if msg.src == self.bus:
-          if self.functional_addr:
-            if (0x7E8 <= msg.address <= 0x7EF) or (0x18DAF100 <= msg.address <= 0x18DAF1FF):
-              fn_addr = next(a for a in FUNCTIONAL_ADDRS if msg.address - a <= 32)
-              self.msg_buffer[fn_addr].append((msg.address, msg.busTime, msg.dat, msg.src))
-          elif msg.address in self.msg_addrs.values():
-            self.msg_buffer[msg.address].append((msg.address, msg.busTime, msg.dat, msg.src))
+        if key in self.rx_key_to_tx_addr:
+          self.msg_buffer[key].append((address, msg.busTime, dat, msg.src))
+          updated.add(self.rx_key_to_tx_addr[key])
+
+    return updated
 
   def _can_tx(self, tx_addr, dat, bus):
     """Helper function to send single message"""
@@ -49,25 +85,10 @@ class IsoTpParallelQuery():
 
   def _can_rx(self, addr, sub_addr=None):
     """Helper function to retrieve message with specified address and subadress from buffer"""
-    keep_msgs = []
-
-    if sub_addr is None:
-      msgs = self.msg_buffer[addr]
-    else:
-      # Filter based on subadress
-      msgs = []
-      for m in self.msg_buffer[addr]:
-        first_byte = m[2][0]
-        if first_byte == sub_addr:
-          msgs.append(m)
-        else:
-          keep_msgs.append(m)
-
-    self.msg_buffer[addr] = keep_msgs
-    return msgs
+    return self.msg_buffer.pop((addr, sub_addr), [])
 
   def _drain_rx(self):
-    messaging.drain_sock(self.logcan)
+    self.logcan.receive_many()
     self.msg_buffer = defaultdict(list)
 
   def get_data(self, timeout):
@@ -94,14 +115,19 @@ class IsoTpParallelQuery():
       request_done[tx_addr] = False
 
     results = {}
-    start_time = time.time()
-    while True:
-      self.rx()
-
-      if all(request_done.values()):
-        break
+    # ECUs that may still have buffered frames after answering a request
+    recheck = set()
+    deadline = time.monotonic() + timeout
+    while not all(request_done.values()):
+      # sleep on the socket until frames arrive for one of the ECUs, or the deadline
+      updated = self.rx(0. if recheck else deadline - time.monotonic()) | recheck
+      recheck = set()
+
+      for tx_addr in updated:
+        if request_done[tx_addr]:
+          continue
 
-      for tx_addr, msg in msgs.items():
+        msg = msgs[tx_addr]
         dat = msg.recv()
 
         if not dat:
@@ -115,6 +141,7 @@ class IsoTpParallelQuery():
           if counter + 1 < len(self.request):
             msg.send(self.request[counter + 1])
             request_counter[tx_addr] += 1
+            recheck.add(tx_addr)
           else:
             results[tx_addr] = dat[len(expected_response):]
             request_done[tx_addr] = True
@@ -122,7 +149,7 @@ class IsoTpParallelQuery():
           request_done[tx_addr] = True
           cloudlog.warning(f"iso-tp query bad response: 0x{bytes.hex(dat)}")
 
-      if time.time() - start_time > timeout:
+      if time.monotonic() > deadline:
         break
 
     return results
@@ -50,8 +50,7 @@ class CarInterface(CarInterfaceBase):
 
   # returns a car.CarState
   def update(self, c, can_strings):
-    self.cp.update_strings(can_strings)
-    self.cp_cam.update_strings(can_strings)
+    self.can_parsers.update_strings(can_strings)
 
     ret = self.CS.update(self.cp, self.cp_cam)
 
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Time CAN fingerprinting with the linear fingerprint scan it replaced against one mask lookup and AND per frame.
+
+Replays the can messages of a log when given one, otherwise each car's fingerprint is sent as frames."""
+import sys
+import time
+from collections import namedtuple
+
+from selfdrive.car.fingerprints import all_known_cars, compatible_cars_mask, ALL_CARS_MASK, _FINGERPRINTS
+from selfdrive.car.tests.test_fingerprints import eliminate_incompatible_cars_linear
+
+CanMsg = namedtuple("CanMsg", ["address", "dat"])
+N = 10
+
+
+def frames_from_fingerprints():
+  frames = []
+  for car_fingerprints in _FINGERPRINTS.values():
+    for fingerprint in car_fingerprints:
+      frames.append([CanMsg(adr, b"\x00" * length) for adr, length in fingerprint.items()])
+  return frames
+
+
+def frames_from_log(fn, max_frames=200):
+  from tools.lib.logreader import LogReader
+  frames = []
+  for msg in LogReader(fn):
+    if msg.which() == 'can':
+      frames.append([CanMsg(c.address, c.dat) for c in msg.can if c.src == 0 and c.address < 0x800])
+      if len(frames) == max_frames:
+        break
+  return [frames]
+
+
+def run_linear(routes):
+  for frames in routes:
+    candidates = all_known_cars()
+    for msgs in frames:
+      for msg in msgs:
+        candidates = eliminate_incompatible_cars_linear(msg, candidates)
+
+
+def run_mask(routes):
+  for frames in routes:
+    mask = ALL_CARS_MASK
+    for msgs in frames:
+      for msg in msgs:
+        mask &= compatible_cars_mask(msg.address, len(msg.dat))
+
+
+if __name__ == "__main__":
+  routes = frames_from_log(sys.argv[1]) if len(sys.argv) > 1 else [[msgs] for msgs in frames_from_fingerprints()]
+  n_msgs = sum(len(msgs) for frames in routes for msgs in frames)
+
+  for name, f in [("linear", run_linear), ("mask", run_mask)]:
+    t = time.monotonic()
+    for _ in range(N):
+      f(routes)
+    dt = time.monotonic() - t
+    print("%-6s %8.3f us/msg" % (name, dt / (N * n_msgs) * 1e6))
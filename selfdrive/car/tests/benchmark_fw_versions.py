@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Time match_fw_to_car over the full FW database, for the exact versions of every car and with some
+ECUs missing or answering with another car's version, against the per-car linear loop."""
+import random
+import time
+
+from selfdrive.car.fingerprints import FW_VERSIONS
+from selfdrive.car.fw_versions import match_fw_to_car, match_fw_to_car_scores, FwMatchIndex
+from selfdrive.car.tests.test_fw_versions import match_fw_to_car_linear, random_car_fw
+
+N = 20
+
+if __name__ == "__main__":
+  random.seed(0)
+  cases = [random_car_fw(c, drop, swap) for c in FW_VERSIONS for drop, swap in [(0., 0.), (0.2, 0.), (0.1, 0.1)]]
+  print("%d cars, %d cases" % (len(FW_VERSIONS), len(cases)))
+
+  t = time.monotonic()
+  FwMatchIndex(FW_VERSIONS)
+  print("%-22s %8.2f ms" % ("build index", (time.monotonic() - t) * 1e3))
+
+  for name, f in [("linear", match_fw_to_car_linear), ("index", match_fw_to_car), ("index with scores", match_fw_to_car_scores)]:
+    t = time.monotonic()
+    for _ in range(N):
+      for car_fw in cases:
+        f(car_fw)
+    dt = time.monotonic() - t
+    print("%-22s %8.2f us/match" % (name, dt / (N * len(cases)) * 1e6))
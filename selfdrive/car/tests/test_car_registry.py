@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+import os
+import sys
+import unittest
+
+from common.basedir import BASEDIR
+from selfdrive.car.fingerprints import BRANDS
+
+
+class TestCarRegistry(unittest.TestCase):
+  def test_brands_match_folders(self):
+    car_dir = os.path.join(BASEDIR, "selfdrive/car")
+    folders = [d for d in os.listdir(car_dir) if os.path.isfile(os.path.join(car_dir, d, "values.py"))]
+    self.assertEqual(sorted(folders), list(BRANDS))
+
+  def test_interfaces_imported_on_lookup(self):
+    from selfdrive.car.car_helpers import interfaces, interface_names
+    self.assertEqual(set(interface_names), set(BRANDS))
+
+    CarInterface, _, _ = interfaces["mock"]
+    self.assertEqual(CarInterface.__module__, "selfdrive.car.mock.interface")
+    self.assertIn("mock", interfaces)
+    for brand_name in set(BRANDS) - {"mock"}:
+      if not any(model in interfaces for model in interface_names[brand_name]):
+        self.assertNotIn("selfdrive.car.%s.interface" % brand_name, sys.modules)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import random
+import unittest
+from collections import namedtuple
+
+from selfdrive.car import fingerprints
+from selfdrive.car.fingerprints import eliminate_incompatible_cars, all_known_cars, \
+                                       cars_from_mask, cars_to_mask, compatible_cars_mask, ALL_CARS_MASK
+
+CanMsg = namedtuple("CanMsg", ["address", "dat"])
+
+
+def eliminate_incompatible_cars_linear(msg, candidate_cars):
+  # reference implementation, checks every fingerprint of every candidate
+  compatible_cars = []
+  for car_name in candidate_cars:
+    if car_name in fingerprints.IGNORED_FINGERPRINTS:
+      continue
+    for fingerprint in fingerprints._FINGERPRINTS[car_name]:
+      fingerprint = {**fingerprint, **fingerprints._DEBUG_ADDRESS}
+      if fingerprints.is_valid_for_fingerprint(msg, fingerprint):
+        compatible_cars.append(car_name)
+        break
+  return compatible_cars
+
+
+def fingerprint_msgs(fingerprint):
+  return [CanMsg(adr, b"\x00" * length) for adr, length in fingerprint.items()]
+
+
+class TestFingerprintIndex(unittest.TestCase):
+  def test_masks(self):
+    cars = all_known_cars()
+    self.assertEqual(cars_from_mask(ALL_CARS_MASK), cars)
+    self.assertEqual(cars_to_mask(cars), ALL_CARS_MASK)
+    self.assertEqual(cars_from_mask(cars_to_mask(cars[1::3])), cars[1::3])
+
+  def test_matches_linear(self):
+    random.seed(0)
+    for car_name, car_fingerprints in fingerprints._FINGERPRINTS.items():
+      for fingerprint in car_fingerprints:
+        msgs = fingerprint_msgs(fingerprint)
+        # wrong lengths, debug and extended addresses
+        msgs += [CanMsg(m.address, m.dat + b"\x00") for m in random.sample(msgs, min(len(msgs), 3))]
+        msgs += [CanMsg(1880, b"\x00" * 8), CanMsg(1880, b"\x00" * 2), CanMsg(0x18daf110, b"\x00" * 8)]
+
+        candidates, expected = all_known_cars(), all_known_cars()
+        mask = ALL_CARS_MASK
+        for msg in msgs:
+          expected = eliminate_incompatible_cars_linear(msg, expected)
+          candidates = eliminate_incompatible_cars(msg, candidates)
+          mask &= compatible_cars_mask(msg.address, len(msg.dat))
+          self.assertEqual(candidates, expected, car_name)
+          self.assertEqual(cars_from_mask(mask), expected, car_name)
+
+  def test_fingerprints_not_modified(self):
+    fingerprints_before = {c: [dict(f) for f in fps] for c, fps in fingerprints._FINGERPRINTS.items()}
+    candidates = all_known_cars()
+    for msg in fingerprint_msgs({1880: 8, 0x10: 8}):
+      candidates = eliminate_incompatible_cars(msg, candidates)
+    self.assertEqual(fingerprints._FINGERPRINTS, fingerprints_before)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+import random
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from selfdrive.car import fw_versions
+from selfdrive.car.fingerprints import FW_VERSIONS
+
+CarFw = namedtuple("CarFw", ["ecu", "address", "subAddress", "fwVersion"])
+
+
+def match_fw_to_car_linear(fw_versions_list):
+  # reference implementation, checks every ECU of every car
+  fw_versions_dict = fw_versions.get_fw_versions_dict(fw_versions_list)
+  invalid = []
+  for candidate, fws in FW_VERSIONS.items():
+    for ecu, expected_versions in fws.items():
+      found_version = fw_versions_dict.get(ecu[1:], None)
+      if found_version is None and not fw_versions.ecu_required(candidate, ecu[0]):
+        continue
+      if found_version not in expected_versions:
+        invalid.append(candidate)
+        break
+  return set(FW_VERSIONS.keys()) - set(invalid)
+
+
+def random_car_fw(candidate, drop=0., swap=0.):
+  # one of the known versions for every ECU, some missing or taken from other cars
+  car_fw = []
+  for (ecu, addr, sub_addr), versions in FW_VERSIONS[candidate].items():
+    if random.random() < drop:
+      continue
+    version = random.choice(versions) if versions else b""
+    if random.random() < swap:
+      other = FW_VERSIONS[random.choice(list(FW_VERSIONS))]
+      version = random.choice(random.choice(list(other.values())) or [b""])
+    car_fw.append(CarFw(ecu, addr, sub_addr or 0, version))
+  return car_fw
+
+
+class FakeQuery():
+  """Answers the version request for every ECU of a car, each ECU to one of the request variants"""
+  calls = []
+
+  def __init__(self, ecus, sendcan, logcan, bus, addrs, request, response, debug=False):
+    self.ecus = ecus
+    self.addrs = addrs
+    self.request = request
+    FakeQuery.calls.append((bus, request, list(addrs)))
+
+  def get_data(self, timeout):
+    return {a: self.ecus[a][1] for a in self.addrs if a in self.ecus and fw_versions.REQUESTS[self.ecus[a][0]][0] == self.request}
+
+
+def car_ecus(candidate):
+  # first version of every ECU of a car, answering a random request variant
+  return {(addr, sub_addr): (random.randrange(len(fw_versions.REQUESTS)), versions[0])
+          for (_, addr, sub_addr), versions in FW_VERSIONS[candidate].items() if versions}
+
+
+class TestFwVersions(unittest.TestCase):
+  def setUp(self):
+    FakeQuery.calls = []
+
+  def get_fw_versions(self, ecus, **kwargs):
+    with mock.patch.object(fw_versions, "IsoTpParallelQuery", lambda *args, **kw: FakeQuery(ecus, *args, **kw)):
+      return fw_versions.get_fw_versions(None, None, 1, **kwargs)
+
+  def test_match_index(self):
+    random.seed(0)
+    for candidate in FW_VERSIONS:
+      for drop, swap in [(0., 0.), (0.3, 0.), (0., 0.3), (0.3, 0.3)]:
+        car_fw = random_car_fw(candidate, drop, swap)
+        matches, scores = fw_versions.match_fw_to_car_scores(car_fw)
+        self.assertEqual(matches, match_fw_to_car_linear(car_fw))
+        if drop == 0. and swap == 0.:
+          self.assertIn(candidate, matches)
+          self.assertEqual(scores[candidate], 1.)
+
+  def test_early_exit(self):
+    random.seed(0)
+    skipped = 0
+    for candidate in FW_VERSIONS:
+      ecus = car_ecus(candidate)
+
+      FakeQuery.calls = []
+      full = fw_versions.match_fw_to_car(self.get_fw_versions(ecus))
+      n_calls = len(FakeQuery.calls)
+
+      # stopping early never changes the match, also for ECUs only answering a later variant
+      FakeQuery.calls = []
+      self.assertEqual(fw_versions.match_fw_to_car(self.get_fw_versions(ecus, early_exit=True)), full, candidate)
+      skipped += n_calls - len(FakeQuery.calls)
+
+    self.assertGreater(skipped, 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
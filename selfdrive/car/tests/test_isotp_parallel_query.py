@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import time
+import unittest
+
+from cereal import log
+from selfdrive.boardd.boardd import can_list_to_can_capnp
+from selfdrive.car.isotp_parallel_query import IsoTpParallelQuery
+from panda.python.uds import get_rx_addr_for_tx_addr
+
+BUS = 1
+REQUEST = b'\x22\xf1\x81'
+RESPONSE = b'\x62\xf1\x81'
+
+
+class FakeEcu():
+  """ISO-TP ECU answering a single request, splitting long responses into consecutive frames"""
+  def __init__(self, tx_addr, response, sub_addr=None):
+    self.tx_addr = tx_addr
+    self.rx_addr = get_rx_addr_for_tx_addr(tx_addr)
+    self.sub_addr = sub_addr
+    self.response = response
+    self.remaining = b""
+
+  def frames(self, dat):
+    if self.sub_addr is not None:
+      if dat[0] != self.sub_addr:
+        return []
+      dat = dat[1:]
+
+    if dat[0] >> 4 == 0x0:
+      request = dat[1:1 + dat[0]]
+      resp = self.response if request == REQUEST else b'\x7f' + request[:1] + b'\x11'
+      if len(resp) < 7:
+        frames = [bytes([len(resp)]) + resp]
+      else:
+        frames = [bytes([0x10 | (len(resp) >> 8), len(resp) & 0xFF]) + resp[:6]]
+        self.remaining = resp[6:]
+    elif dat[0] == 0x30:
+      # flow control, send everything
+      frames = [bytes([0x20 | ((i // 7 + 1) & 0xF)]) + self.remaining[i:i + 7] for i in range(0, len(self.remaining), 7)]
+      self.remaining = b""
+    else:
+      return []
+
+    if self.sub_addr is not None:
+      frames = [bytes([self.sub_addr]) + f for f in frames]
+    return [f.ljust(8, b'\x00') for f in frames]
+
+
+class FakeCan():
+  """logcan socket, poller and sendcan socket in one, with ECUs answering on the same bus"""
+  def __init__(self, ecus):
+    self.ecus = ecus
+    self.queue = []
+    self.polls = 0
+
+  def poll(self, timeout):
+    self.polls += 1
+    if not self.queue:
+      time.sleep(timeout / 1000.)
+    return [self] if self.queue else []
+
+  def receive_many(self):
+    ret, self.queue = self.queue, []
+    return ret
+
+  def send(self, dat):
+    for msg in log.Event.from_bytes(dat).sendcan:
+      frames = [[0x123, 0, b'\x00' * 8, BUS], [0x7e8, 0, b'\x00' * 8, BUS + 1]]  # other traffic
+      for ecu in self.ecus:
+        if msg.address == ecu.tx_addr and msg.src == BUS:
+          frames += [[ecu.rx_addr, 0, f, BUS] for f in ecu.frames(msg.dat)]
+      self.queue.append(can_list_to_can_capnp(frames))
+
+
+class TestIsoTpParallelQuery(unittest.TestCase):
+  def query(self, ecus, addrs, timeout=0.1):
+    can = FakeCan(ecus)
+    query = IsoTpParallelQuery(can, can, BUS, addrs, [REQUEST], [RESPONSE], poller=can)
+    return query, can, query.get_data(timeout)
+
+  def test_parallel(self):
+    ecus = [FakeEcu(0x7e0, RESPONSE + b'short'), FakeEcu(0x7e1, RESPONSE + b'a long firmware version')]
+
+    t = time.monotonic()
+    _, can, results = self.query(ecus, [0x7e0, 0x7e1])
+    self.assertEqual(results, {(0x7e0, None): b'short', (0x7e1, None): b'a long firmware version'})
+
+    # returns once every ECU answered, without spinning
+    self.assertLess(time.monotonic() - t, 0.05)
+    self.assertLess(can.polls, 10)
+
+  def test_missing_ecu(self):
+    t = time.monotonic()
+    _, can, results = self.query([FakeEcu(0x7e0, RESPONSE + b'fw')], [0x7e0, 0x7e2], timeout=0.1)
+    self.assertEqual(results, {(0x7e0, None): b'fw'})
+
+    # sleeps on the socket until the deadline
+    self.assertGreaterEqual(time.monotonic() - t, 0.1)
+    self.assertLess(can.polls, 10)
+
+  def test_sub_addr(self):
+    ecus = [FakeEcu(0x750, RESPONSE + b'0f', sub_addr=0xf), FakeEcu(0x750, RESPONSE + b'10', sub_addr=0x10)]
+    for ecu in ecus:
+      _, _, results = self.query(ecus, [(0x750, ecu.sub_addr)])
+      self.assertEqual(results, {(0x750, ecu.sub_addr): ecu.response[len(RESPONSE):]})
+
+  def test_negative_response(self):
+    _, _, results = self.query([FakeEcu(0x7e0, b'\x7f\x22\x31')], [0x7e0])
+    self.assertEqual(results, {})
+
+
+if __name__ == "__main__":
+  unittest.main()
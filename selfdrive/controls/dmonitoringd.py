@@ -20,7 +20,7 @@ def dmonitoringd_thread(sm=None, pm=None):
     pm = messaging.PubMaster(['dMonitoringState'])
 
   if sm is None:
-    sm = messaging.SubMaster(['driverState', 'liveCalibration', 'carState', 'model'])
+    sm = messaging.SubMaster(['driverState', 'liveCalibration', 'carState', 'model'], lazy=True)
 
   driver_status = DriverStatus()
   is_rhd = params.get("IsRHD")
@@ -1,8 +1,9 @@
+import heapq
+
 from cereal import car, log
 from common.realtime import DT_CTRL
 from selfdrive.swaglog import cloudlog
 from selfdrive.controls.lib.alerts import ALERTS
-import copy
 
 
 AlertSize = log.ControlsState.AlertSize
@@ -10,39 +11,70 @@ AlertStatus = log.ControlsState.AlertStatus
 VisualAlert = car.CarControl.HUDControl.VisualAlert
 AudibleAlert = car.CarControl.HUDControl.AudibleAlert
 
+# heap entry fields
+_PRIORITY, _START, _SEQ, _TYPE, _ALERT, _TEXT_1, _TEXT_2, _START_TIME = range(8)
+
+
 class AlertManager():
+  """Active alerts are kept in a heap ordered by priority and then by start time, with one live
+  entry per alert type. Re-adding an alert replaces its entry, superseded and expired entries
+  are dropped once they reach the top of the heap."""
 
   def __init__(self):
-    self.activealerts = []
     self.alerts = {alert.alert_type: alert for alert in ALERTS}
+    # an alert is dropped once all of its durations are over
+    self.alert_durations = {alert.alert_type: max(alert.duration_sound, alert.duration_hud_alert, alert.duration_text)
+                            for alert in ALERTS}
+
+    self.heap = []
+    self.active = {}  # alert type -> its live heap entry
+    self.seq = 0
+
+  def _top(self):
+    heap = self.heap
+    while heap and self.active.get(heap[0][_TYPE]) is not heap[0]:
+      heapq.heappop(heap)
+    return heap[0] if heap else None
 
   def alertPresent(self):
-    return len(self.activealerts) > 0
+    return self._top() is not None
 
   def add(self, frame, alert_type, enabled=True, extra_text_1='', extra_text_2=''):
     alert_type = str(alert_type)
-    added_alert = copy.copy(self.alerts[alert_type])
-    added_alert.alert_text_1 += extra_text_1
-    added_alert.alert_text_2 += extra_text_2
-    added_alert.start_time = frame * DT_CTRL
+    alert = self.alerts[alert_type]
+    start_time = frame * DT_CTRL
 
     # if new alert is higher priority, log it
-    if not self.alertPresent() or added_alert.alert_priority > self.activealerts[0].alert_priority:
-          cloudlog.event('alert_add', alert_type=alert_type, enabled=enabled)
-
-    self.activealerts.append(added_alert)
-
-    # sort by priority first and then by start_time
-    self.activealerts.sort(key=lambda k: (k.alert_priority, k.start_time), reverse=True)
+    top = self._top()
+    if top is None or alert.alert_priority > top[_ALERT].alert_priority:
+      cloudlog.event('alert_add', alert_type=alert_type, enabled=enabled)
+
+    # the newest instance of an alert outranks and outlives the older ones,
+    # on the same frame the first one added wins
+    entry = self.active.get(alert_type)
+    if entry is not None and entry[_START_TIME] >= start_time:
+      return
+
+    entry = (-alert.alert_priority, -start_time, self.seq, alert_type, alert,
+             alert.alert_text_1 + extra_text_1, alert.alert_text_2 + extra_text_2, start_time)
+    self.seq += 1
+    self.active[alert_type] = entry
+    heapq.heappush(self.heap, entry)
+
+    # alerts added every frame leave a trail of superseded entries, rebuild from the live ones
+    if len(self.heap) > 2 * len(self.active) + 32:
+      self.heap = list(self.active.values())
+      heapq.heapify(self.heap)
 
   def process_alerts(self, frame):
     cur_time = frame * DT_CTRL
 
-    # first get rid of all the expired alerts
-    self.activealerts = [a for a in self.activealerts if a.start_time +
-                         max(a.duration_sound, a.duration_hud_alert, a.duration_text) > cur_time]
-
-    current_alert = self.activealerts[0] if self.alertPresent() else None
+    # first get rid of the expired alerts, until the highest priority one is still active
+    current_alert = self._top()
+    while current_alert is not None and current_alert[_START_TIME] + self.alert_durations[current_alert[_TYPE]] <= cur_time:
+      heapq.heappop(self.heap)
+      del self.active[current_alert[_TYPE]]
+      current_alert = self._top()
 
     # start with assuming no alerts
     self.alert_type = ""
@@ -55,17 +87,19 @@ class AlertManager():
     self.alert_rate = 0.
 
     if current_alert:
-      self.alert_type = current_alert.alert_type
-
-      if current_alert.start_time + current_alert.duration_sound > cur_time:
-        self.audible_alert = current_alert.audible_alert
-
-      if current_alert.start_time + current_alert.duration_hud_alert > cur_time:
-        self.visual_alert = current_alert.visual_alert
-
-      if current_alert.start_time + current_alert.duration_text > cur_time:
-        self.alert_text_1 = current_alert.alert_text_1
-        self.alert_text_2 = current_alert.alert_text_2
-        self.alert_status = current_alert.alert_status
-        self.alert_size = current_alert.alert_size
-        self.alert_rate = current_alert.alert_rate
+      alert = current_alert[_ALERT]
+      start_time = current_alert[_START_TIME]
+      self.alert_type = alert.alert_type
+
+      if start_time + alert.duration_sound > cur_time:
+        self.audible_alert = alert.audible_alert
+
+      if start_time + alert.duration_hud_alert > cur_time:
+        self.visual_alert = alert.visual_alert
+
+      if start_time + alert.duration_text > cur_time:
+        self.alert_text_1 = current_alert[_TEXT_1]
+        self.alert_text_2 = current_alert[_TEXT_2]
+        self.alert_status = alert.alert_status
+        self.alert_size = alert.alert_size
+        self.alert_rate = alert.alert_rate
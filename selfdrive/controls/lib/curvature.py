@@ -0,0 +1,113 @@
+"""Curvature of the cubic path polynomial y = a x^3 + b x^2 + c x + d, without sampling it on a grid.
+
+k = y'' / (1 + y'^2)^1.5, https://en.wikipedia.org/wiki/Curvature#Curvature_of_the_graph_of_a_function
+With y' = p x^2 + q x + r, y'' = 2 p x + q and y''' = 2 p, k is stationary where the numerator of k',
+y''' (1 + y'^2) - 3 y' y''^2, vanishes. That is a quartic in x, solved in closed form with Ferrari's method."""
+import cmath
+import math
+
+
+def curvature(poly, x):
+  a, b, c, _ = poly
+  y_p = (3 * a * x + 2 * b) * x + c
+  y_pp = 6 * a * x + 2 * b
+  return y_pp / (1. + y_p * y_p)**1.5
+
+
+def _cbrt(x):
+  return math.copysign(abs(x)**(1. / 3.), x)
+
+
+def _cubic_max_root(A, B, C):
+  """Largest real root of m^3 + A m^2 + B m + C"""
+  P = B - A * A / 3.
+  Q = (2. * A * A / 27. - B / 3.) * A + C
+  disc = Q * Q / 4. + P * P * P / 27.
+  if P < 0. and disc <= 0.:
+    # three real roots
+    cos_3t = max(-1., min(1., 1.5 * Q / P * math.sqrt(-3. / P)))
+    z = 2. * math.sqrt(-P / 3.) * math.cos(math.acos(cos_3t) / 3.)
+  else:
+    sq = math.sqrt(disc)
+    z = _cbrt(-Q / 2. + sq) + _cbrt(-Q / 2. - sq)
+  return z - A / 3.
+
+
+def _quartic_roots(c4, c3, c2, c1, c0):
+  """Complex roots of c4 x^4 + c3 x^3 + c2 x^2 + c1 x + c0, c4 != 0"""
+  b, c, d, e = c3 / c4, c2 / c4, c1 / c4, c0 / c4
+
+  # depressed quartic y^4 + p y^2 + q y + r, x = y - b / 4
+  b2 = b * b
+  p = c - 3. * b2 / 8.
+  q = (b2 / 8. - c / 2.) * b + d
+  r = (-3. * b2 / 256. + c / 16.) * b2 - b * d / 4. + e
+  shift = -b / 4.
+
+  m = _cubic_max_root(p, p * p / 4. - r, -q * q / 8.)
+  if m <= 1e-6 * (abs(p) + math.sqrt(abs(r))):
+    # close to biquadratic, where q / sqrt(m) below loses all precision
+    sq = cmath.sqrt(p * p - 4. * r)
+    z1, z2 = cmath.sqrt((-p + sq) / 2.), cmath.sqrt((-p - sq) / 2.)
+    roots = [z1, -z1, z2, -z2]
+  else:
+    s = math.sqrt(2. * m)
+    roots = []
+    for sign in (1., -1.):
+      w = cmath.sqrt(-(2. * p + 2. * m + sign * 2. * q / s))
+      roots.append((sign * s + w) / 2.)
+      roots.append((sign * s - w) / 2.)
+
+  # polish with a few newton steps on the depressed quartic
+  for i, y in enumerate(roots):
+    for _ in range(2):
+      dy = (4. * y * y + 2. * p) * y + q
+      if dy == 0.:
+        break
+      y -= (((y * y + p) * y + q) * y + r) / dy
+    roots[i] = y
+  return [shift + y for y in roots]
+
+
+def curvature_extrema(poly, n):
+  """x of the points where the curvature of poly is stationary, as real parts of the roots.
+  A cubic term that is negligible over x < n makes the quartic too badly conditioned to solve,
+  so the path is taken as a parabola then."""
+  a, b, c, _ = poly
+  p, q, r = 3. * a, 2. * b, c
+  if abs(p) * n < 1e-12 * abs(q) or p == 0.:
+    # parabola, k is largest where y' = 0
+    return [-r / q] if q != 0. else []
+
+  c4 = -10. * p**3
+  c3 = -20. * p * p * q
+  c2 = -13. * p * q * q - 8. * p * p * r
+  c1 = -3. * q**3 - 8. * p * q * r
+  c0 = 2. * p * (1. + r * r) - 3. * q * q * r
+  return [x.real for x in _quartic_roots(c4, c3, c2, c1, c0)]
+
+
+def max_abs_curvature(poly, n):
+  """Max of |k| over x = 0, 1, ..., n - 1. k is monotonic between its extrema,
+  so it is taken at an end or at an integer next to one of them."""
+  candidates = {0, n - 1}
+  for x in curvature_extrema(poly, n):
+    if -1. < x < n:
+      candidates.add(min(max(int(math.floor(x)), 0), n - 1))
+      candidates.add(min(max(int(math.floor(x)) + 1, 0), n - 1))
+  return max(abs(curvature(poly, x)) for x in candidates)
+
+
+class PathCurvature():
+  """Max curvature and the curvature near the car of a path polynomial, cached on its coefficients"""
+  def __init__(self, n=192):
+    self.n = n
+    self.poly = None
+    self.result = (0., 0.)
+
+  def update(self, poly):
+    poly = tuple(poly)
+    if poly != self.poly:
+      self.poly = poly
+      self.result = (max_abs_curvature(poly, self.n), (curvature(poly, 1) + curvature(poly, 2) + curvature(poly, 3)) / 3.)
+    return self.result
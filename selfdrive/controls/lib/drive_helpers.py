@@ -1,5 +1,5 @@
 from cereal import car
-from common.numpy_fast import clip, interp
+from common.numpy_fast import clip
 from selfdrive.config import Conversions as CV
 
 # kph
@@ -51,12 +51,91 @@ def get_events(events, types):
   return out
 
 
-def rate_limit(new_value, last_value, dw_step, up_step):
-  return clip(new_value, last_value + dw_step, last_value + up_step)
+EVENT_NAME_IDS = car.CarEvent.EventName.schema.enumerants
+EVENT_NAMES = {v: k for k, v in EVENT_NAME_IDS.items()}
+# one bit per event type
+EVENT_TYPE_BITS = {t: 1 << i for i, t in enumerate([EventTypes.ENABLE, EventTypes.PRE_ENABLE, EventTypes.NO_ENTRY,
+                                                    EventTypes.WARNING, EventTypes.USER_DISABLE, EventTypes.SOFT_DISABLE,
+                                                    EventTypes.IMMEDIATE_DISABLE, EventTypes.PERMANENT])}
 
 
-def get_steer_max(CP, v_ego):
-  return interp(v_ego, CP.steerMaxBP, CP.steerMaxV)
+def event_types_mask(types):
+  mask = 0
+  for t in types:
+    mask |= EVENT_TYPE_BITS[t]
+  return mask
+
+
+class Events():
+  """Events of a controlsd cycle, kept as event name ids with a mask of their types.
+  Only converted to CarEvent structs when published."""
+  def __init__(self):
+    self.ids = []
+    self.masks = []
+    self.mask = 0  # all types of all events
+
+  def __len__(self):
+    return len(self.ids)
+
+  def add(self, name, types):
+    mask = event_types_mask(types)
+    self.ids.append(EVENT_NAME_IDS[name])
+    self.masks.append(mask)
+    self.mask |= mask
+
+  def extend(self, car_events):
+    """Adds a list of CarEvent structs"""
+    for e in car_events:
+      mask = 0
+      for t, bit in EVENT_TYPE_BITS.items():
+        if getattr(e, t):
+          mask |= bit
+      self.ids.append(EVENT_NAME_IDS[e.name])
+      self.masks.append(mask)
+      self.mask |= mask
+
+  def any(self, types):
+    return (self.mask & event_types_mask(types)) != 0
+
+  def names(self, types):
+    """Same as get_events: the names of the events with any of the types, once per matching type"""
+    types_mask = event_types_mask(types)
+    if not self.mask & types_mask:
+      return []
+
+    bits = [EVENT_TYPE_BITS[t] for t in types]
+    out = []
+    for event_id, mask in zip(self.ids, self.masks):
+      if mask & types_mask:
+        for bit in bits:
+          if mask & bit:
+            out.append(EVENT_NAMES[event_id])
+    return out
+
+  def key(self):
+    """Changes when any event or event type changes"""
+    return (tuple(self.ids), tuple(self.masks))
+
+  def to_capnp(self):
+    """List of CarEvent dicts, to assign to a capnp list"""
+    return [_car_event_dict(event_id, mask) for event_id, mask in zip(self.ids, self.masks)]
+
+
+_CAR_EVENT_DICTS = {}
+
+def _car_event_dict(event_id, mask):
+  key = (event_id, mask)
+  if key not in _CAR_EVENT_DICTS:
+    d = {'name': EVENT_NAMES[event_id]}
+    for t, bit in EVENT_TYPE_BITS.items():
+      if mask & bit:
+        d[t] = True
+    _CAR_EVENT_DICTS[key] = d
+  return _CAR_EVENT_DICTS[key]
+
+
+def rate_limit(new_value, last_value, dw_step, up_step):
+  return clip(new_value, last_value + dw_step, last_value + up_step)
 
 
 def update_v_cruise(v_cruise_kph, buttonEvents, enabled):
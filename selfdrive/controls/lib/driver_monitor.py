@@ -1,4 +1,4 @@
-from common.numpy_fast import interp
+from common.numpy_fast import Interp1D
 from math import atan2, sqrt
 from common.realtime import DT_DMON
 from selfdrive.controls.lib.drive_helpers import create_event, EventTypes as ET
@@ -28,6 +28,9 @@ _POSESTD_THRESHOLD = 0.14
 _METRIC_THRESHOLD = 0.4
 _METRIC_THRESHOLD_SLACK = 0.55
 _METRIC_THRESHOLD_STRICT = 0.4
+# thresholds go from strict to slack with the model's engaged probability
+_BLINK_THRESHOLD_POLICY = Interp1D([0, 0.5, 1], [_BLINK_THRESHOLD_STRICT, _BLINK_THRESHOLD, _BLINK_THRESHOLD_SLACK])
+_METRIC_THRESHOLD_POLICY = Interp1D([0, 0.5, 1], [_METRIC_THRESHOLD_STRICT, _METRIC_THRESHOLD, _METRIC_THRESHOLD_SLACK])
 _PITCH_POS_ALLOWANCE = 0.12 # rad, to not be too sensitive on positive pitch
 _PITCH_NATURAL_OFFSET = 0.02 # people don't seem to look straight when they drive relaxed, rather a bit up
 _YAW_NATURAL_OFFSET = 0.08 # people don't seem to look straight when they drive relaxed, rather a bit to the right (center of car)
@@ -172,8 +175,8 @@ class DriverStatus():
 
   def set_policy(self, model_data):
     ep = min(model_data.meta.engagedProb, 0.8) / 0.8
-    self.pose.cfactor = interp(ep, [0, 0.5, 1], [_METRIC_THRESHOLD_STRICT, _METRIC_THRESHOLD, _METRIC_THRESHOLD_SLACK])/_METRIC_THRESHOLD
-    self.blink.cfactor = interp(ep, [0, 0.5, 1], [_BLINK_THRESHOLD_STRICT, _BLINK_THRESHOLD, _BLINK_THRESHOLD_SLACK])/_BLINK_THRESHOLD
+    self.pose.cfactor = _METRIC_THRESHOLD_POLICY(ep)/_METRIC_THRESHOLD
+    self.blink.cfactor = _BLINK_THRESHOLD_POLICY(ep)/_BLINK_THRESHOLD
 
   def get_pose(self, driver_state, cal_rpy, car_speed, op_engaged):
     # 10 Hz
@@ -1,10 +1,11 @@
 import numpy as np
 from collections import defaultdict
 
-from common.numpy_fast import interp
+from common.numpy_fast import Interp1D
 
 _FCW_A_ACT_V = [-3., -2.]
 _FCW_A_ACT_BP = [0., 30.]
+_FCW_A_ACT = Interp1D(_FCW_A_ACT_BP, _FCW_A_ACT_V)
 
 
 class FCWChecker():
@@ -44,8 +45,7 @@ class FCWChecker():
       ttc = np.minimum(2 * x_lead / (np.sqrt(delta) + v_rel), max_ttc)
     return ttc
 
-  def update(self, mpc_solution, cur_time, active, v_ego, a_ego, x_lead, v_lead, a_lead, y_lead, vlat_lead, fcw_lead, blinkers):
-    mpc_solution_a = list(mpc_solution[0].a_ego)
+  def update(self, mpc_solution_a, cur_time, active, v_ego, a_ego, x_lead, v_lead, a_lead, y_lead, vlat_lead, fcw_lead, blinkers):
 
     self.last_min_a = min(mpc_solution_a)
     self.v_lead_max = max(self.v_lead_max, v_lead)
@@ -62,7 +62,7 @@ class FCWChecker():
       self.counters['y_lead'] = self.counters['y_lead'] + 1 if abs(y_lead) < 1.0 else 0
       self.counters['vlat_lead'] = self.counters['vlat_lead'] + 1 if abs(vlat_lead) < 0.4 else 0
 
-      a_thr = interp(v_lead, _FCW_A_ACT_BP, _FCW_A_ACT_V)
+      a_thr = _FCW_A_ACT(v_lead)
       a_delta = min(mpc_solution_a[:15]) - min(0.0, a_ego)
 
       future_fcw_allowed = all(c >= 10 for c in self.counters.values())
@@ -1,9 +1,13 @@
-from common.numpy_fast import interp
+from common.numpy_fast import Interp1D
 import numpy as np
 from cereal import log
 
 CAMERA_OFFSET = 0.06  # m from center car to camera
 
+# lane probabilities fade out as the lanes get wider than 4 m
+LANE_WIDTH_PROB = Interp1D([4.0, 5.0], [1.0, 0.0])
+SPEED_LANE_WIDTH = Interp1D([0., 31.], [2.8, 3.5])
+
 
 def compute_path_pinv(l=50):
   deg = 3
@@ -29,7 +33,7 @@ def calc_d_poly(l_poly, r_poly, p_poly, l_prob, r_prob, lane_width, v_ego):
   prob_mods = []
   for t_check in [0.0, 1.5, 3.0]:
     width_at_t = eval_poly(width_poly, t_check * (v_ego + 7))
-    prob_mods.append(interp(width_at_t, [4.0, 5.0], [1.0, 0.0]))
+    prob_mods.append(LANE_WIDTH_PROB(width_at_t))
   mod = min(prob_mods)
   l_prob = mod * l_prob
   r_prob = mod * r_prob
@@ -94,7 +98,7 @@ class LanePlanner():
     self.lane_width_certainty += 0.05 * (self.l_prob * self.r_prob - self.lane_width_certainty)
     current_lane_width = abs(self.l_poly[3] - self.r_poly[3])
     self.lane_width_estimate += 0.005 * (current_lane_width - self.lane_width_estimate)
-    speed_lane_width = interp(v_ego, [0., 31.], [2.8, 3.5])
+    speed_lane_width = SPEED_LANE_WIDTH(v_ego)
     self.lane_width = self.lane_width_certainty * self.lane_width_estimate + \
                       (1 - self.lane_width_certainty) * speed_lane_width
 
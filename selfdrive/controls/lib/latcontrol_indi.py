@@ -3,16 +3,16 @@ import numpy as np
 
 from cereal import log
 from common.realtime import DT_CTRL
-from common.numpy_fast import clip
+from common.numpy_fast import clip, Interp1D
 from selfdrive.car.toyota.values import SteerLimitParams
 from selfdrive.car import apply_toyota_steer_torque_limits
-from selfdrive.controls.lib.drive_helpers import get_steer_max
 from selfdrive.ntune import nTune
 
 
 class LatControlINDI():
   def __init__(self, CP):
     self.angle_steers_des = 0.
+    self.steer_max = Interp1D(CP.steerMaxBP, CP.steerMaxV)
 
     A = np.matrix([[1.0, DT_CTRL, 0.0],
                    [0.0, 1.0, DT_CTRL],
@@ -110,7 +110,7 @@ class LatControlINDI():
       else:
         self.output_steer = self.delayed_output + delta_u
 
-      steers_max = get_steer_max(CP, v_ego)
+      steers_max = self.steer_max(v_ego)
       self.output_steer = clip(self.output_steer, -steers_max, steers_max)
 
       indi_log.active = True
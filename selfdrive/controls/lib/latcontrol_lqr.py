@@ -1,6 +1,5 @@
 import numpy as np
-from selfdrive.controls.lib.drive_helpers import get_steer_max
-from common.numpy_fast import clip, interp
+from common.numpy_fast import clip, Interp1D
 from common.realtime import DT_CTRL
 from cereal import log
 from selfdrive.ntune import nTune
@@ -17,6 +16,7 @@ class LatControlLQR():
     self.K = np.array(CP.lateralTuning.lqr.k).reshape((1,2))
     self.L = np.array(CP.lateralTuning.lqr.l).reshape((2,1))
     self.dc_gain = CP.lateralTuning.lqr.dcGain
+    self.steer_max = Interp1D(CP.steerMaxBP, CP.steerMaxV)
 
     self.x_hat = np.array([[0], [0]])
     self.i_unwind_rate = 0.3 * DT_CTRL
@@ -52,7 +52,7 @@ class LatControlLQR():
 
     lqr_log = log.ControlsState.LateralLQRState.new_message()
 
-    steers_max = get_steer_max(CP, v_ego)
+    steers_max = self.steer_max(v_ego)
     torque_scale = (0.45 + v_ego / 60.0)**2  # Scale actuator model with speed
     torque_scale = min(torque_scale, 0.65)
 
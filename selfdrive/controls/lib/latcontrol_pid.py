@@ -1,5 +1,5 @@
 from selfdrive.controls.lib.pid import PIController
-from selfdrive.controls.lib.drive_helpers import get_steer_max
+from common.numpy_fast import Interp1D
 from cereal import car
 from cereal import log
 
@@ -12,6 +12,7 @@ class LatControlPID():
                             k_d=CP.lateralTuning.pid.kd,
                             pos_limit=1.0, sat_limit=CP.steerLimitTimer)
     self.angle_steers_des = 0.
+    self.steer_max = Interp1D(CP.steerMaxBP, CP.steerMaxV)
 
   def reset(self):
     self.pid.reset()
@@ -28,7 +29,7 @@ class LatControlPID():
     else:
       self.angle_steers_des = path_plan.angleSteers  # get from MPC/PathPlanner
 
-      steers_max = get_steer_max(CP, v_ego)
+      steers_max = self.steer_max(v_ego)
       self.pid.pos_limit = steers_max
       self.pid.neg_limit = -steers_max
       steer_feedforward = self.angle_steers_des   # feedforward desired angle
@@ -1,5 +1,5 @@
 import os
-import math
+import numpy as np
 
 import cereal.messaging as messaging
 from selfdrive.swaglog import cloudlog
@@ -10,57 +10,112 @@ from selfdrive.controls.lib.drive_helpers import MPC_COST_LONG
 
 LOG_MPC = os.environ.get('LOG_MPC', False)
 
+# memory layout of log_t, to read the solutions as numpy arrays
+LOG_DTYPE = np.dtype([('x_ego', np.float64, 21), ('v_ego', np.float64, 21), ('a_ego', np.float64, 21),
+                      ('j_ego', np.float64, 20), ('x_l', np.float64, 21), ('v_l', np.float64, 21),
+                      ('a_l', np.float64, 21), ('t', np.float64, 21), ('cost', np.float64)])
+
 
 class LongitudinalMpc():
+  """The mpc of a single lead, a LongitudinalMpcBatch of one on its own libmpc<mpc_id>"""
   def __init__(self, mpc_id):
     self.mpc_id = mpc_id
+    self.batch = LongitudinalMpcBatch(mpc_ids=(mpc_id,), libmpc=libmpc_py.get_libmpc(mpc_id))
+
+  @property
+  def v_mpc(self):
+    return self.batch.v_mpc[0]
+
+  @property
+  def v_mpc_future(self):
+    return self.batch.v_mpc_future[0]
+
+  @property
+  def a_mpc(self):
+    return self.batch.a_mpc[0]
+
+  @property
+  def prev_lead_status(self):
+    return self.batch.prev_lead_status[0]
 
-    self.setup_mpc()
-    self.v_mpc = 0.0
-    self.v_mpc_future = 0.0
-    self.a_mpc = 0.0
-    self.v_cruise = 0.0
-    self.prev_lead_status = False
-    self.prev_lead_x = 0.0
-    self.new_lead = False
+  @property
+  def new_lead(self):
+    return self.batch.new_lead[0]
 
-    self.last_cloudlog_t = 0.0
+  @property
+  def a_lead_tau(self):
+    return self.batch.a_lead_tau[0]
+
+  @property
+  def mpc_solution(self):
+    return self.batch.mpc_solution
 
   def send_mpc_solution(self, pm, qp_iterations, calculation_time):
+    self.batch.send_mpc_solution(pm, 0, qp_iterations, calculation_time)
+
+  def set_cur_state(self, v, a):
+    self.batch.set_cur_state(v, a)
+
+  def update(self, pm, CS, lead, v_cruise_setpoint):
+    self.batch.update(pm, CS, (lead,), v_cruise_setpoint)
+
+
+class LongitudinalMpcBatch():
+  """Longitudinal mpc of several leads, solved in a single call into libmpc_batch by default.
+  Each lead keeps its own solver state in the library to warm start from, and
+  self.solution maps the fields of log_t to numpy views of shape (n, 21).
+  mpc_ids are the ids of the leads in logs and liveLongitudinalMpc."""
+  def __init__(self, mpc_ids=(1, 2), libmpc=None):
+    assert len(mpc_ids) <= libmpc_py.MAX_BATCH
+    self.mpc_ids = mpc_ids
+    self.n = len(mpc_ids)
+
+    self.setup_mpc(libmpc_py.get_libmpc_batch() if libmpc is None else libmpc)
+    self.v_mpc = [0.0] * self.n
+    self.v_mpc_future = [0.0] * self.n
+    self.a_mpc = [0.0] * self.n
+    self.prev_lead_status = [False] * self.n
+    self.prev_lead_x = [0.0] * self.n
+    self.new_lead = [False] * self.n
+
+    self.last_cloudlog_t = [0.0] * self.n
+
+  def send_mpc_solution(self, pm, k, qp_iterations, calculation_time):
     qp_iterations = max(0, qp_iterations)
     dat = messaging.new_message('liveLongitudinalMpc')
-    dat.liveLongitudinalMpc.xEgo = list(self.mpc_solution[0].x_ego)
-    dat.liveLongitudinalMpc.vEgo = list(self.mpc_solution[0].v_ego)
-    dat.liveLongitudinalMpc.aEgo = list(self.mpc_solution[0].a_ego)
-    dat.liveLongitudinalMpc.xLead = list(self.mpc_solution[0].x_l)
-    dat.liveLongitudinalMpc.vLead = list(self.mpc_solution[0].v_l)
-    dat.liveLongitudinalMpc.cost = self.mpc_solution[0].cost
-    dat.liveLongitudinalMpc.aLeadTau = self.a_lead_tau
+    dat.liveLongitudinalMpc.xEgo = self.solution['x_ego'][k].tolist()
+    dat.liveLongitudinalMpc.vEgo = self.solution['v_ego'][k].tolist()
+    dat.liveLongitudinalMpc.aEgo = self.solution['a_ego'][k].tolist()
+    dat.liveLongitudinalMpc.xLead = self.solution['x_l'][k].tolist()
+    dat.liveLongitudinalMpc.vLead = self.solution['v_l'][k].tolist()
+    dat.liveLongitudinalMpc.cost = float(self.solution['cost'][k])
+    dat.liveLongitudinalMpc.aLeadTau = self.a_lead_tau[k]
     dat.liveLongitudinalMpc.qpIterations = qp_iterations
-    dat.liveLongitudinalMpc.mpcId = self.mpc_id
+    dat.liveLongitudinalMpc.mpcId = self.mpc_ids[k]
     dat.liveLongitudinalMpc.calculationTime = calculation_time
     pm.send('liveLongitudinalMpc', dat)
 
-  def setup_mpc(self):
-    ffi, self.libmpc = libmpc_py.get_libmpc(self.mpc_id)
-    self.libmpc.init(MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE,
-                     MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
+  def setup_mpc(self, libmpc):
+    ffi, self.libmpc = libmpc
+    for k in range(self.n):
+      self.libmpc.init_batch(k, MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE,
+                             MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
 
-    self.mpc_solution = ffi.new("log_t *")
-    self.cur_state = ffi.new("state_t *")
-    self.cur_state[0].v_ego = 0
-    self.cur_state[0].a_ego = 0
-    self.a_lead_tau = _LEAD_ACCEL_TAU
+    self.mpc_solution = ffi.new("log_t[]", self.n)
+    solution = np.frombuffer(ffi.buffer(self.mpc_solution), dtype=LOG_DTYPE)
+    self.solution = {name: solution[name] for name in LOG_DTYPE.names}
+    self.cur_state = ffi.new("state_t[]", self.n)
+    self.a_lead_tau = ffi.new("double[]", [_LEAD_ACCEL_TAU] * self.n)
+    self.a_lead = ffi.new("double[]", self.n)
+    self.n_its = ffi.new("int[]", self.n)
 
   def set_cur_state(self, v, a):
-    self.cur_state[0].v_ego = v
-    self.cur_state[0].a_ego = a
+    for k in range(self.n):
+      self.cur_state[k].v_ego = v
+      self.cur_state[k].a_ego = a
 
-  def update(self, pm, CS, lead, v_cruise_setpoint):
-    v_ego = CS.vEgo
-
-    # Setup current mpc state
-    self.cur_state[0].x_ego = 0.0
+  def set_lead(self, k, lead, v_ego):
+    self.cur_state[k].x_ego = 0.0
 
     if lead is not None and lead.status:
       x_lead = lead.dRel
@@ -71,52 +126,65 @@ class LongitudinalMpc():
         v_lead = 0.0
         a_lead = 0.0
 
-      self.a_lead_tau = lead.aLeadTau
-      self.new_lead = False
-      if not self.prev_lead_status or abs(x_lead - self.prev_lead_x) > 2.5:
-        self.libmpc.init_with_simulation(self.v_mpc, x_lead, v_lead, a_lead, self.a_lead_tau)
-        self.new_lead = True
+      self.a_lead_tau[k] = lead.aLeadTau
+      self.new_lead[k] = False
+      if not self.prev_lead_status[k] or abs(x_lead - self.prev_lead_x[k]) > 2.5:
+        self.libmpc.init_batch_with_simulation(k, self.v_mpc[k], x_lead, v_lead, a_lead, self.a_lead_tau[k])
+        self.new_lead[k] = True
 
-      self.prev_lead_status = True
-      self.prev_lead_x = x_lead
-      self.cur_state[0].x_l = x_lead
-      self.cur_state[0].v_l = v_lead
+      self.prev_lead_status[k] = True
+      self.prev_lead_x[k] = x_lead
+      self.cur_state[k].x_l = x_lead
+      self.cur_state[k].v_l = v_lead
     else:
-      self.prev_lead_status = False
+      self.prev_lead_status[k] = False
       # Fake a fast lead car, so mpc keeps running
-      self.cur_state[0].x_l = 50.0
-      self.cur_state[0].v_l = v_ego + 10.0
+      self.cur_state[k].x_l = 50.0
+      self.cur_state[k].v_l = v_ego + 10.0
       a_lead = 0.0
-      self.a_lead_tau = _LEAD_ACCEL_TAU
+      self.a_lead_tau[k] = _LEAD_ACCEL_TAU
+
+    self.a_lead[k] = a_lead
+
+  def update(self, pm, CS, leads, v_cruise_setpoint):
+    v_ego = CS.vEgo
+
+    # Setup current mpc state
+    for k, lead in enumerate(leads):
+      self.set_lead(k, lead, v_ego)
 
     # Calculate mpc
     t = sec_since_boot()
-    n_its = self.libmpc.run_mpc(self.cur_state, self.mpc_solution, self.a_lead_tau, a_lead)
+    self.libmpc.run_mpc_batch(self.n, self.cur_state, self.mpc_solution, self.a_lead_tau, self.a_lead, self.n_its)
     duration = int((sec_since_boot() - t) * 1e9)
 
     if LOG_MPC:
-      self.send_mpc_solution(pm, n_its, duration)
+      for k in range(self.n):
+        # calculation time is that of the whole batch
+        self.send_mpc_solution(pm, k, self.n_its[k], duration)
 
     # Get solution. MPC timestep is 0.2 s, so interpolation to 0.05 s is needed
-    self.v_mpc = self.mpc_solution[0].v_ego[1]
-    self.a_mpc = self.mpc_solution[0].a_ego[1]
-    self.v_mpc_future = self.mpc_solution[0].v_ego[10]
+    v_ego_sol = self.solution['v_ego']
+    self.v_mpc = v_ego_sol[:, 1].tolist()
+    self.a_mpc = self.solution['a_ego'][:, 1].tolist()
+    self.v_mpc_future = v_ego_sol[:, 10].tolist()
 
     # Reset if NaN or goes through lead car
-    crashing = any(lead - ego < -50 for (lead, ego) in zip(self.mpc_solution[0].x_l, self.mpc_solution[0].x_ego))
-    nans = any(math.isnan(x) for x in self.mpc_solution[0].v_ego)
-    backwards = min(self.mpc_solution[0].v_ego) < -0.01
-
-    if ((backwards or crashing) and self.prev_lead_status) or nans:
-      if t > self.last_cloudlog_t + 5.0:
-        self.last_cloudlog_t = t
-        cloudlog.warning("Longitudinal mpc %d reset - backwards: %s crashing: %s nan: %s" % (
-                          self.mpc_id, backwards, crashing, nans))
-
-      self.libmpc.init(MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE,
-                       MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
-      self.cur_state[0].v_ego = v_ego
-      self.cur_state[0].a_ego = 0.0
-      self.v_mpc = v_ego
-      self.a_mpc = CS.aEgo
-      self.prev_lead_status = False
+    crashing = (self.solution['x_l'] - self.solution['x_ego'] < -50).any(axis=1)
+    nans = np.isnan(v_ego_sol).any(axis=1)
+    backwards = v_ego_sol.min(axis=1) < -0.01
+
+    for k in range(self.n):
+      if ((backwards[k] or crashing[k]) and self.prev_lead_status[k]) or nans[k]:
+        if t > self.last_cloudlog_t[k] + 5.0:
+          self.last_cloudlog_t[k] = t
+          cloudlog.warning("Longitudinal mpc %d reset - backwards: %s crashing: %s nan: %s" % (
+                            self.mpc_ids[k], backwards[k], crashing[k], nans[k]))
+
+        self.libmpc.init_batch(k, MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE,
+                               MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
+        self.cur_state[k].v_ego = v_ego
+        self.cur_state[k].a_ego = 0.0
+        self.v_mpc[k] = v_ego
+        self.a_mpc[k] = CS.aEgo
+        self.prev_lead_status[k] = False
@@ -5,8 +5,10 @@ from common.ffi_wrapper import suffix
 
 mpc_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
 
-def _get_libmpc(mpc_id):
-    libmpc_fn = os.path.join(mpc_dir, "libmpc%d%s" % (mpc_id, suffix()))
+MAX_BATCH = 2
+
+def _get_libmpc(name):
+    libmpc_fn = os.path.join(mpc_dir, "lib%s%s" % (name, suffix()))
 
     ffi = FFI()
     ffi.cdef("""
@@ -31,11 +33,20 @@ def _get_libmpc(mpc_id):
     void init_with_simulation(double v_ego, double x_l, double v_l, double a_l, double l);
     int run_mpc(state_t * x0, log_t * solution,
                 double l, double a_l_0);
+
+    void init_batch(int k, double ttcCost, double distanceCost, double accelerationCost, double jerkCost);
+    void init_batch_with_simulation(int k, double v_ego, double x_l, double v_l, double a_l, double l);
+    void run_mpc_batch(int n, state_t * x0, log_t * solutions,
+                       double * l, double * a_l_0, int * n_its);
     """)
 
     return (ffi, ffi.dlopen(libmpc_fn))
 
-mpcs = [_get_libmpc(1), _get_libmpc(2)]
+mpcs = [_get_libmpc("mpc1"), _get_libmpc("mpc2")]
+mpc_batch = _get_libmpc("mpc_batch")
 
 def get_libmpc(mpc_id):
     return mpcs[mpc_id - 1]
+
+def get_libmpc_batch():
+    return mpc_batch
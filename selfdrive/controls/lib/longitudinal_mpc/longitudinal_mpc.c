@@ -14,6 +14,8 @@
 
 #define N           ACADO_N   /* Number of intervals in the horizon. */
 
+#define MAX_BATCH   2         /* Number of leads solved by run_mpc_batch. */
+
 ACADOvariables acadoVariables;
 ACADOworkspace acadoWorkspace;
 
@@ -34,6 +36,25 @@ typedef struct {
   double cost;
 } log_t;
 
+// Solver state of each lead in a batch. The generated code only works on the
+// global acadoVariables and acadoWorkspace, so they are swapped in and out.
+static ACADOvariables batchVariables[MAX_BATCH];
+static ACADOworkspace batchWorkspace[MAX_BATCH];
+static int batch_selected = -1;
+
+static void select_batch(int k){
+  if (k == batch_selected){
+    return;
+  }
+  if (batch_selected >= 0){
+    batchVariables[batch_selected] = acadoVariables;
+    batchWorkspace[batch_selected] = acadoWorkspace;
+  }
+  acadoVariables = batchVariables[k];
+  acadoWorkspace = batchWorkspace[k];
+  batch_selected = k;
+}
+
 void init(double ttcCost, double distanceCost, double accelerationCost, double jerkCost){
   acado_initializeSolver();
   int    i;
@@ -171,3 +192,23 @@ int run_mpc(state_t * x0, log_t * solution, double l, double a_l_0){
 
   return acado_getNWSR();
 }
+
+void init_batch(int k, double ttcCost, double distanceCost, double accelerationCost, double jerkCost){
+  select_batch(k);
+  init(ttcCost, distanceCost, accelerationCost, jerkCost);
+}
+
+void init_batch_with_simulation(int k, double v_ego, double x_l_0, double v_l_0, double a_l_0, double l){
+  select_batch(k);
+  init_with_simulation(v_ego, x_l_0, v_l_0, a_l_0, l);
+}
+
+// Runs the mpc of the first n leads, each from its own last solution.
+// Must not be mixed with init and run_mpc in the same library.
+void run_mpc_batch(int n, state_t * x0, log_t * solutions, double * l, double * a_l_0, int * n_its){
+  int k;
+  for (k = 0; k < n && k < MAX_BATCH; k++){
+    select_batch(k);
+    n_its[k] = run_mpc(&x0[k], &solutions[k], l[k], a_l_0[k]);
+  }
+}
@@ -1,6 +1,6 @@
 import time
 import numpy as np
-from common.numpy_fast import clip, interp
+from common.numpy_fast import clip, Interp1D
 from common.realtime import DT_CTRL
 
 
@@ -15,8 +15,8 @@ def apply_deadzone(error, deadzone):
 
 class PIController():
   def __init__(self, k_p, k_i, k_f=1., k_d=0., pos_limit=None, neg_limit=None, rate=100, sat_limit=0.8, convert=None):
-    self._k_p = k_p # proportional gain
-    self._k_i = k_i # integral gain
+    self._k_p = Interp1D(*k_p) # proportional gain
+    self._k_i = Interp1D(*k_i) # integral gain
     self.k_f = k_f  # feedforward gain
     self.k_d = k_d
 
@@ -36,11 +36,11 @@ class PIController():
 
   @property
   def k_p(self):
-    return interp(self.speed, self._k_p[0], self._k_p[1])
+    return self._k_p(self.speed)
 
   @property
   def k_i(self):
-    return interp(self.speed, self._k_i[0], self._k_i[1])
+    return self._k_i(self.speed)
 
   def _check_saturation(self, control, check_saturation, error):
     saturated = (control < self.neg_limit) or (control > self.pos_limit)
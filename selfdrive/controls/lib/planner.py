@@ -2,7 +2,7 @@
 import math
 import numpy as np
 from common.params import Params
-from common.numpy_fast import interp
+from common.numpy_fast import Interp1D
 
 import cereal.messaging as messaging
 from cereal import car
@@ -12,7 +12,8 @@ from selfdrive.config import Conversions as CV
 from selfdrive.controls.lib.speed_smoother import speed_smoother
 from selfdrive.controls.lib.longcontrol import LongCtrlState, MIN_CAN_SPEED
 from selfdrive.controls.lib.fcw import FCWChecker
-from selfdrive.controls.lib.long_mpc import LongitudinalMpc
+from selfdrive.controls.lib.long_mpc import LongitudinalMpcBatch
+from selfdrive.controls.lib.curvature import PathCurvature
 
 MAX_SPEED = 255.0
 
@@ -35,17 +36,22 @@ _A_CRUISE_MAX_BP = [0.,  6.4, 22.5, 40.]
 _A_TOTAL_MAX_V = [1.7, 3.2]
 _A_TOTAL_MAX_BP = [20., 40.]
 
+_A_CRUISE_MIN = Interp1D(_A_CRUISE_MIN_BP, _A_CRUISE_MIN_V)
+_A_CRUISE_MAX = Interp1D(_A_CRUISE_MAX_BP, _A_CRUISE_MAX_V)
+_A_CRUISE_MAX_FOLLOWING = Interp1D(_A_CRUISE_MAX_BP, _A_CRUISE_MAX_V_FOLLOWING)
+_A_TOTAL_MAX = Interp1D(_A_TOTAL_MAX_BP, _A_TOTAL_MAX_V)
+
 # 75th percentile
 SPEED_PERCENTILE_IDX = 7
 
 
 def calc_cruise_accel_limits(v_ego, following):
-  a_cruise_min = interp(v_ego, _A_CRUISE_MIN_BP, _A_CRUISE_MIN_V)
+  a_cruise_min = _A_CRUISE_MIN(v_ego)
 
   if following:
-    a_cruise_max = interp(v_ego, _A_CRUISE_MAX_BP, _A_CRUISE_MAX_V_FOLLOWING)
+    a_cruise_max = _A_CRUISE_MAX_FOLLOWING(v_ego)
   else:
-    a_cruise_max = interp(v_ego, _A_CRUISE_MAX_BP, _A_CRUISE_MAX_V)
+    a_cruise_max = _A_CRUISE_MAX(v_ego)
   return np.vstack([a_cruise_min, a_cruise_max])
 
 
@@ -55,7 +61,7 @@ def limit_accel_in_turns(v_ego, angle_steers, a_target, CP):
   this should avoid accelerating when losing the target in turns
   """
 
-  a_total_max = interp(v_ego, _A_TOTAL_MAX_BP, _A_TOTAL_MAX_V)
+  a_total_max = _A_TOTAL_MAX(v_ego)
   a_y = v_ego**2 * angle_steers * CV.DEG_TO_RAD / (CP.steerRatio * CP.wheelbase)
   a_x_allowed = math.sqrt(max(a_total_max**2 - a_y**2, 0.))
 
@@ -66,8 +72,8 @@ class Planner():
   def __init__(self, CP):
     self.CP = CP
 
-    self.mpc1 = LongitudinalMpc(1)
-    self.mpc2 = LongitudinalMpc(2)
+    # lead one and lead two, solved together
+    self.mpc = LongitudinalMpcBatch((1, 2))
 
     self.v_acc_start = 0.0
     self.a_acc_start = 0.0
@@ -82,7 +88,7 @@ class Planner():
 
     self.longitudinalPlanSource = 'cruise'
     self.fcw_checker = FCWChecker()
-    self.path_x = np.arange(192)
+    self.path_curvature = PathCurvature(192)
 
     self.params = Params()
     self.first_loop = True
@@ -90,21 +96,21 @@ class Planner():
   def choose_solution(self, v_cruise_setpoint, enabled):
     if enabled:
       solutions = {'model': self.v_model, 'cruise': self.v_cruise}
-      if self.mpc1.prev_lead_status:
-        solutions['mpc1'] = self.mpc1.v_mpc
-      if self.mpc2.prev_lead_status:
-        solutions['mpc2'] = self.mpc2.v_mpc
+      if self.mpc.prev_lead_status[0]:
+        solutions['mpc1'] = self.mpc.v_mpc[0]
+      if self.mpc.prev_lead_status[1]:
+        solutions['mpc2'] = self.mpc.v_mpc[1]
 
       slowest = min(solutions, key=solutions.get)
 
       self.longitudinalPlanSource = slowest
       # Choose lowest of MPC and cruise
       if slowest == 'mpc1':
-        self.v_acc = self.mpc1.v_mpc
-        self.a_acc = self.mpc1.a_mpc
+        self.v_acc = self.mpc.v_mpc[0]
+        self.a_acc = self.mpc.a_mpc[0]
       elif slowest == 'mpc2':
-        self.v_acc = self.mpc2.v_mpc
-        self.a_acc = self.mpc2.a_mpc
+        self.v_acc = self.mpc.v_mpc[1]
+        self.a_acc = self.mpc.a_mpc[1]
       elif slowest == 'cruise':
         self.v_acc = self.v_cruise
         self.a_acc = self.a_cruise
@@ -112,7 +118,7 @@ class Planner():
         self.v_acc = self.v_model
         self.a_acc = self.a_model
 
-    self.v_acc_future = min([self.mpc1.v_mpc_future, self.mpc2.v_mpc_future, v_cruise_setpoint])
+    self.v_acc_future = min(self.mpc.v_mpc_future + [v_cruise_setpoint])
 
   def update(self, sm, pm, CP, VM, PP):
     """Gets called when new radarState is available"""
@@ -131,22 +137,12 @@ class Planner():
     following = lead_1.status and lead_1.dRel < 45.0 and lead_1.vLeadK > v_ego and lead_1.aLeadK > 0.0
 
     if len(sm['model'].path.poly):
-      path = list(sm['model'].path.poly)
-
-      # Curvature of polynomial https://en.wikipedia.org/wiki/Curvature#Curvature_of_the_graph_of_a_function
-      # y = a x^3 + b x^2 + c x + d, y' = 3 a x^2 + 2 b x + c, y'' = 6 a x + 2 b
-      # k = y'' / (1 + y'^2)^1.5
-      # TODO: compute max speed without using a list of points and without numpy
-      y_p = 3 * path[0] * self.path_x**2 + 2 * path[1] * self.path_x + path[2]
-      y_pp = 6 * path[0] * self.path_x + 2 * path[1]
-      curv = y_pp / (1. + y_p**2)**1.5
+      # max curvature over the first 192 m of the path, and the mean curvature at 1 to 3 m
+      max_curvature, curvature = self.path_curvature.update(sm['model'].path.poly)
 
       a_y_max = 2.975 - v_ego * 0.0375  # ~1.85 @ 75mph, ~2.6 @ 25mph
-      v_curvature = np.sqrt(a_y_max / np.clip(np.abs(curv), 1e-4, None))
-      model_speed = np.min(v_curvature)
+      model_speed = math.sqrt(max(a_y_max, 0.) / max(max_curvature, 1e-4))
       model_speed = max(20.0 * CV.MPH_TO_MS, model_speed) # Don't slow down below 20mph
-
-      curvature = np.mean(curv[1:4])
     else:
       model_speed = MAX_SPEED
       curvature = 0.
@@ -188,20 +184,17 @@ class Planner():
       self.v_cruise = reset_speed
       self.a_cruise = reset_accel
 
-    self.mpc1.set_cur_state(self.v_acc_start, self.a_acc_start)
-    self.mpc2.set_cur_state(self.v_acc_start, self.a_acc_start)
-
-    self.mpc1.update(pm, sm['carState'], lead_1, v_cruise_setpoint)
-    self.mpc2.update(pm, sm['carState'], lead_2, v_cruise_setpoint)
+    self.mpc.set_cur_state(self.v_acc_start, self.a_acc_start)
+    self.mpc.update(pm, sm['carState'], (lead_1, lead_2), v_cruise_setpoint)
 
     self.choose_solution(v_cruise_setpoint, enabled)
 
     # determine fcw
-    if self.mpc1.new_lead:
+    if self.mpc.new_lead[0]:
       self.fcw_checker.reset_lead(cur_time)
 
     blinkers = sm['carState'].leftBlinker or sm['carState'].rightBlinker
-    fcw = self.fcw_checker.update(self.mpc1.mpc_solution, cur_time,
+    fcw = self.fcw_checker.update(self.mpc.solution['a_ego'][0], cur_time,
                                   sm['controlsState'].active,
                                   v_ego, sm['carState'].aEgo,
                                   lead_1.dRel, lead_1.vLead, lead_1.aLeadK,
@@ -232,7 +225,7 @@ class Planner():
     plan_send.plan.vTarget = float(self.v_acc)
     plan_send.plan.aTarget = float(self.a_acc)
     plan_send.plan.vTargetFuture = float(self.v_acc_future)
-    plan_send.plan.hasLead = self.mpc1.prev_lead_status
+    plan_send.plan.hasLead = self.mpc.prev_lead_status[0]
     plan_send.plan.longitudinalPlanSource = self.longitudinalPlanSource
 
     radar_valid = not (radar_dead or radar_fault)
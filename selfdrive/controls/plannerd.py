@@ -3,6 +3,7 @@ import gc
 
 from cereal import car
 from common.params import Params
+from common.profiler import StageTimer
 from common.realtime import set_realtime_priority
 from selfdrive.swaglog import cloudlog
 from selfdrive.controls.lib.planner import Planner
@@ -27,7 +28,7 @@ def plannerd_thread(sm=None, pm=None):
   VM = VehicleModel(CP)
 
   if sm is None:
-    sm = messaging.SubMaster(['carState', 'controlsState', 'radarState', 'model', 'liveParameters'])
+    sm = messaging.SubMaster(['carState', 'controlsState', 'radarState', 'model', 'liveParameters'], lazy=True)
 
   if pm is None:
     pm = messaging.PubMaster(['plan', 'liveLongitudinalMpc', 'pathPlan', 'liveMpc'])
@@ -37,13 +38,20 @@ def plannerd_thread(sm=None, pm=None):
   sm['liveParameters'].steerRatio = CP.steerRatio
   sm['liveParameters'].stiffnessFactor = 1.0
 
+  timer = StageTimer("plannerd")
+
   while True:
+    timer.start()
     sm.update()
+    timer.checkpoint("Wait", ignore=True)
 
     if sm.updated['model']:
       PP.update(sm, pm, CP, VM)
+      timer.checkpoint("Path planner")
     if sm.updated['radarState']:
       PL.update(sm, pm, CP, VM, PP)
+      timer.checkpoint("Planner")
+    timer.end(pm)
 
 
 def main(sm=None, pm=None):
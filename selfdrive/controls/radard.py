@@ -7,6 +7,7 @@ import cereal.messaging as messaging
 from cereal import car
 from common.numpy_fast import interp
 from common.params import Params
+from common.profiler import StageTimer
 from common.realtime import Ratekeeper, set_realtime_priority
 from selfdrive.config import RADAR_TO_CAMERA
 from selfdrive.controls.lib.cluster.fastcluster_py import cluster_points_centroid
@@ -193,7 +194,7 @@ def radard_thread(sm=None, pm=None, can_sock=None):
     can_sock = messaging.sub_sock('can')
 
   if sm is None:
-    sm = messaging.SubMaster(['model', 'controlsState', 'liveParameters'])
+    sm = messaging.SubMaster(['model', 'controlsState', 'liveParameters'], lazy=True)
 
   # *** publish radarState and liveTracks
   if pm is None:
@@ -205,17 +206,22 @@ def radard_thread(sm=None, pm=None, can_sock=None):
   RD = RadarD(CP.radarTimeStep, RI.delay)
 
   has_radar = not CP.radarOffCan
+  timer = StageTimer("radard")
 
   while 1:
+    timer.start()
     can_strings = messaging.drain_sock_raw(can_sock, wait_for_one=True)
+    timer.checkpoint("CAN wait", ignore=True)
     rr = RI.update(can_strings)
 
     if rr is None:
       continue
 
     sm.update(0)
+    timer.checkpoint("Sample")
 
     dat = RD.update(rk.frame, sm, rr, has_radar)
+    timer.checkpoint("Fusion")
     dat.radarState.cumLagMs = -rk.remaining*1000.
 
     pm.send('radarState', dat)
@@ -232,6 +238,8 @@ def radard_thread(sm=None, pm=None, can_sock=None):
         "vRel": float(tracks[ids].vRel),
       }
     pm.send('liveTracks', dat)
+    timer.checkpoint("Sent")
+    timer.end(pm)
 
     rk.monitor_time()
 
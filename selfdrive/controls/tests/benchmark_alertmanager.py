@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Time adding and processing controlsd's alerts with AlertManager against the sorted list it replaced.
+
+Replays the warning and permanent alerts of the carEvents in a log when given one,
+otherwise a few alerts are held for long stretches like controlsd does."""
+import random
+import sys
+import time
+
+from selfdrive.controls.lib.alertmanager import AlertManager
+from selfdrive.controls.lib.alerts import ALERTS
+from selfdrive.controls.tests.test_alertmanager import ListAlertManager, random_alert_stream
+
+
+def frames_from_log(fn):
+  from tools.lib.logreader import LogReader
+  known = {a.alert_type for a in ALERTS}
+  frames = []
+  for msg in LogReader(fn):
+    if msg.which() != 'carEvents':
+      continue
+    added = []
+    for e in msg.carEvents:
+      name = str(e.name)
+      if e.warning and name in known:
+        added.append((name, ''))
+      if e.permanent and name + "Permanent" in known:
+        added.append((name + "Permanent", ''))
+    frames.append((len(frames), added))
+  return frames
+
+
+def run(name, AM, frames):
+  t = time.monotonic()
+  for frame, added in frames:
+    for alert_type, extra_text in added:
+      AM.add(frame, alert_type, extra_text_2=extra_text)
+    AM.process_alerts(frame)
+  dt = time.monotonic() - t
+  print("%-5s %8.2f us/frame" % (name, dt / len(frames) * 1e6))
+
+
+if __name__ == "__main__":
+  if len(sys.argv) > 1:
+    frames = frames_from_log(sys.argv[1])
+  else:
+    random.seed(0)
+    frames = list(random_alert_stream(6000, [a.alert_type for a in ALERTS]))
+
+  run("list", ListAlertManager(), frames)
+  run("heap", AlertManager(), frames)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Time the curvature speed limit of Planner.update sampled on every meter of the path against the
+closed form solution, with and without the cache. The model path changes at 20 Hz like radarState,
+so every other update is assumed to see the same path."""
+import math
+import random
+import time
+import numpy as np
+
+from selfdrive.controls.lib.curvature import PathCurvature, max_abs_curvature, curvature
+from selfdrive.controls.tests.test_curvature import PATH_X, random_path
+
+N = 20000
+A_Y_MAX = 2.
+
+
+def sampled(path):
+  y_p = 3 * path[0] * PATH_X**2 + 2 * path[1] * PATH_X + path[2]
+  y_pp = 6 * path[0] * PATH_X + 2 * path[1]
+  curv = y_pp / (1. + y_p**2)**1.5
+  return np.min(np.sqrt(A_Y_MAX / np.clip(np.abs(curv), 1e-4, None))), np.mean(curv[1:4])
+
+
+def closed_form(path):
+  max_curvature = max_abs_curvature(path, len(PATH_X))
+  return math.sqrt(A_Y_MAX / max(max_curvature, 1e-4)), (curvature(path, 1) + curvature(path, 2) + curvature(path, 3)) / 3.
+
+
+def cached():
+  pc = PathCurvature(len(PATH_X))
+  def f(path):
+    max_curvature, curv = pc.update(path)
+    return math.sqrt(A_Y_MAX / max(max_curvature, 1e-4)), curv
+  return f
+
+
+if __name__ == "__main__":
+  random.seed(0)
+  paths = [random_path() for _ in range(N // 2)]
+  paths = [p for path in paths for p in (path, path)]
+
+  for name, f in [("sampled", sampled), ("closed form", closed_form), ("cached", cached())]:
+    t = time.monotonic()
+    for path in paths:
+      f(path)
+    dt = time.monotonic() - t
+    print("%-12s %6.2f us/update" % (name, dt / len(paths) * 1e6))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import copy
+import random
+import unittest
+
+from common.realtime import DT_CTRL
+from selfdrive.controls.lib.alertmanager import AlertManager, AlertSize, AlertStatus, AudibleAlert, VisualAlert
+from selfdrive.controls.lib.alerts import ALERTS
+
+OUTPUTS = ['alert_type', 'alert_text_1', 'alert_text_2', 'alert_status', 'alert_size',
+           'visual_alert', 'audible_alert', 'alert_rate']
+
+
+class ListAlertManager():
+  """The AlertManager before the heap, keeps every added alert in a sorted list"""
+  def __init__(self):
+    self.activealerts = []
+    self.alerts = {alert.alert_type: alert for alert in ALERTS}
+
+  def add(self, frame, alert_type, enabled=True, extra_text_1='', extra_text_2=''):
+    added_alert = copy.copy(self.alerts[str(alert_type)])
+    added_alert.alert_text_1 += extra_text_1
+    added_alert.alert_text_2 += extra_text_2
+    added_alert.start_time = frame * DT_CTRL
+    self.activealerts.append(added_alert)
+    self.activealerts.sort(key=lambda k: (k.alert_priority, k.start_time), reverse=True)
+
+  def process_alerts(self, frame):
+    cur_time = frame * DT_CTRL
+    self.activealerts = [a for a in self.activealerts if a.start_time +
+                         max(a.duration_sound, a.duration_hud_alert, a.duration_text) > cur_time]
+    a = self.activealerts[0] if len(self.activealerts) else None
+
+    self.alert_type = a.alert_type if a else ""
+    self.audible_alert = a.audible_alert if a and a.start_time + a.duration_sound > cur_time else AudibleAlert.none
+    self.visual_alert = a.visual_alert if a and a.start_time + a.duration_hud_alert > cur_time else VisualAlert.none
+    show_text = a is not None and a.start_time + a.duration_text > cur_time
+    self.alert_text_1 = a.alert_text_1 if show_text else ""
+    self.alert_text_2 = a.alert_text_2 if show_text else ""
+    self.alert_status = a.alert_status if show_text else AlertStatus.normal
+    self.alert_size = a.alert_size if show_text else AlertSize.none
+    self.alert_rate = a.alert_rate if show_text else 0.
+
+
+def random_alert_stream(frames, types):
+  """Yields the (alert type, extra text) added on each frame, a few alerts are held for many frames"""
+  held = {}
+  for frame in range(frames):
+    for alert_type in random.sample(types, 2):
+      if random.random() < 0.05:
+        held[alert_type] = random.randint(1, 100)
+
+    added = []
+    for alert_type in list(held):
+      added.append((alert_type, random.choice(['', ' 1', ' 2'])))
+      held[alert_type] -= 1
+      if held[alert_type] == 0:
+        del held[alert_type]
+    if random.random() < 0.1:
+      added.append((random.choice(types), ''))
+    random.shuffle(added)
+    yield frame, added
+
+
+class TestAlertManager(unittest.TestCase):
+  def test_matches_list_manager(self):
+    random.seed(0)
+    types = [a.alert_type for a in ALERTS]
+    for _ in range(5):
+      AM, ref = AlertManager(), ListAlertManager()
+      for frame, added in random_alert_stream(1000, random.sample(types, 15)):
+        for alert_type, extra_text in added:
+          AM.add(frame, alert_type, extra_text_2=extra_text)
+          ref.add(frame, alert_type, extra_text_2=extra_text)
+
+        # controlsd skips no frames, but alerts must expire the same when it does
+        if random.random() < 0.9:
+          AM.process_alerts(frame)
+          ref.process_alerts(frame)
+          for name in OUTPUTS:
+            self.assertEqual(getattr(AM, name), getattr(ref, name), f"{name} differs on frame {frame}")
+          self.assertEqual(AM.alertPresent(), len(ref.activealerts) > 0)
+
+  def test_same_frame_first_added_wins(self):
+    AM = AlertManager()
+    alert_type = ALERTS[0].alert_type
+    AM.add(0, alert_type, extra_text_1=' first')
+    AM.add(0, alert_type, extra_text_1=' second')
+    AM.process_alerts(0)
+    self.assertEqual(AM.alert_text_1, ALERTS[0].alert_text_1 + ' first')
+
+  def test_heap_stays_bounded(self):
+    AM = AlertManager()
+    types = [a.alert_type for a in ALERTS][:5]
+    for frame in range(10000):
+      for alert_type in types:
+        AM.add(frame, alert_type)
+      AM.process_alerts(frame)
+    self.assertLessEqual(len(AM.heap), 2 * len(types) + 33)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import random
+import unittest
+import numpy as np
+
+from selfdrive.controls.lib.curvature import PathCurvature, curvature, max_abs_curvature
+
+PATH_X = np.arange(192)
+
+
+def sampled_curvature(path):
+  """The curvature as Planner.update computed it, on every meter of the path"""
+  y_p = 3 * path[0] * PATH_X**2 + 2 * path[1] * PATH_X + path[2]
+  y_pp = 6 * path[0] * PATH_X + 2 * path[1]
+  return y_pp / (1. + y_p**2)**1.5
+
+
+def random_path():
+  poly = [random.gauss(0, random.choice([1e-12, 1e-9, 1e-7, 1e-6, 1e-5, 1e-4, 1e-3])),
+          random.gauss(0, random.choice([1e-7, 1e-5, 1e-4, 1e-3, 1e-2, 0.1])),
+          random.gauss(0, random.choice([1e-3, 1e-2, 0.1, 1.])),
+          random.gauss(0, 1.)]
+  if random.random() < 0.05:
+    poly[0] = 0.
+  elif random.random() < 0.05:
+    # float32 model outputs can leave a cubic term that is practically zero
+    poly[0] = random.gauss(0, 10**random.uniform(-30, -13))
+  if random.random() < 0.01:
+    poly[1] = 0.
+  return poly
+
+
+class TestCurvature(unittest.TestCase):
+  def test_matches_sampled(self):
+    random.seed(0)
+    for _ in range(20000):
+      poly = random_path()
+      curv = sampled_curvature(poly)
+      np.testing.assert_allclose(max_abs_curvature(poly, len(PATH_X)), np.max(np.abs(curv)), rtol=1e-9, atol=1e-15, err_msg=str(poly))
+
+  def test_straight(self):
+    self.assertEqual(max_abs_curvature([0., 0., 0.1, 1.], 192), 0.)
+
+  def test_cache(self):
+    random.seed(1)
+    pc = PathCurvature(192)
+    for _ in range(100):
+      poly = random_path()
+      curv = sampled_curvature(poly)
+      for _ in range(2):
+        max_curvature, curvature_near = pc.update(poly)
+        self.assertAlmostEqual(max_curvature, np.max(np.abs(curv)), delta=1e-9 * np.max(np.abs(curv)))
+        self.assertAlmostEqual(curvature_near, np.mean(curv[1:4]))
+    self.assertAlmostEqual(curvature(pc.poly, 0.), curv[0])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+import random
+import unittest
+
+from cereal import car
+from selfdrive.controls.lib.drive_helpers import Events, EventTypes as ET, EVENT_NAME_IDS, EVENT_TYPE_BITS, \
+                                                 create_event, get_events
+
+ALL_TYPES = list(EVENT_TYPE_BITS.keys())
+
+
+def random_events(n):
+  return [(random.choice(list(EVENT_NAME_IDS.keys())), random.sample(ALL_TYPES, random.randint(0, 3))) for _ in range(n)]
+
+
+class TestEvents(unittest.TestCase):
+  def test_matches_capnp_events(self):
+    random.seed(0)
+    for _ in range(200):
+      added = random_events(random.randint(0, 10))
+      car_events = random_events(random.randint(0, 5))
+
+      events = Events()
+      events.extend([create_event(name, types) for name, types in car_events])
+      for name, types in added:
+        events.add(name, types)
+      capnp_events = [create_event(name, types) for name, types in car_events + added]
+
+      self.assertEqual(len(events), len(capnp_events))
+      for types in [[t] for t in ALL_TYPES] + [[ET.IMMEDIATE_DISABLE, ET.SOFT_DISABLE]]:
+        self.assertEqual(events.names(types), get_events(capnp_events, types))
+        self.assertEqual(events.any(types), bool(get_events(capnp_events, types)))
+
+      msg = car.CarState.new_message()
+      msg.events = events.to_capnp()
+      self.assertEqual([e.to_dict() for e in msg.events], [e.to_dict() for e in capnp_events])
+
+  def test_key(self):
+    a, b = Events(), Events()
+    for events in [a, b]:
+      events.add('canError', [ET.NO_ENTRY, ET.IMMEDIATE_DISABLE])
+    self.assertEqual(a.key(), b.key())
+
+    b.add('ldw', [ET.PERMANENT])
+    self.assertNotEqual(a.key(), b.key())
+
+    a.add('ldw', [ET.WARNING])
+    self.assertNotEqual(a.key(), b.key())
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,152 @@
+import math
+import random
+import unittest
+import numpy as np
+
+from cereal import log
+import cereal.messaging as messaging
+from selfdrive.controls.lib.drive_helpers import MPC_COST_LONG
+from selfdrive.controls.lib.long_mpc import LongitudinalMpcBatch
+from selfdrive.controls.lib.longitudinal_mpc import libmpc_py
+from selfdrive.controls.lib.radar_helpers import _LEAD_ACCEL_TAU
+
+
+class SingleLongitudinalMpc():
+  """The LongitudinalMpc before the batch, one libmpc per lead solved with run_mpc"""
+  def __init__(self, mpc_id):
+    self.mpc_id = mpc_id
+    ffi, self.libmpc = libmpc_py.get_libmpc(mpc_id)
+    self.libmpc.init(MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE,
+                     MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
+
+    self.mpc_solution = ffi.new("log_t *")
+    self.cur_state = ffi.new("state_t *")
+    self.cur_state[0].v_ego = 0
+    self.cur_state[0].a_ego = 0
+    self.a_lead_tau = _LEAD_ACCEL_TAU
+
+    self.v_mpc = 0.0
+    self.v_mpc_future = 0.0
+    self.a_mpc = 0.0
+    self.prev_lead_status = False
+    self.prev_lead_x = 0.0
+    self.new_lead = False
+
+  def set_cur_state(self, v, a):
+    self.cur_state[0].v_ego = v
+    self.cur_state[0].a_ego = a
+
+  def update(self, CS, lead):
+    v_ego = CS.vEgo
+    self.cur_state[0].x_ego = 0.0
+
+    if lead is not None and lead.status:
+      x_lead = lead.dRel
+      v_lead = max(0.0, lead.vLead)
+      a_lead = lead.aLeadK
+
+      if (v_lead < 0.1 or -a_lead / 2.0 > v_lead):
+        v_lead = 0.0
+        a_lead = 0.0
+
+      self.a_lead_tau = lead.aLeadTau
+      self.new_lead = False
+      if not self.prev_lead_status or abs(x_lead - self.prev_lead_x) > 2.5:
+        self.libmpc.init_with_simulation(self.v_mpc, x_lead, v_lead, a_lead, self.a_lead_tau)
+        self.new_lead = True
+
+      self.prev_lead_status = True
+      self.prev_lead_x = x_lead
+      self.cur_state[0].x_l = x_lead
+      self.cur_state[0].v_l = v_lead
+    else:
+      self.prev_lead_status = False
+      self.cur_state[0].x_l = 50.0
+      self.cur_state[0].v_l = v_ego + 10.0
+      a_lead = 0.0
+      self.a_lead_tau = _LEAD_ACCEL_TAU
+
+    self.libmpc.run_mpc(self.cur_state, self.mpc_solution, self.a_lead_tau, a_lead)
+
+    self.v_mpc = self.mpc_solution[0].v_ego[1]
+    self.a_mpc = self.mpc_solution[0].a_ego[1]
+    self.v_mpc_future = self.mpc_solution[0].v_ego[10]
+
+    crashing = any(lead - ego < -50 for (lead, ego) in zip(self.mpc_solution[0].x_l, self.mpc_solution[0].x_ego))
+    nans = any(math.isnan(x) for x in self.mpc_solution[0].v_ego)
+    backwards = min(self.mpc_solution[0].v_ego) < -0.01
+
+    if ((backwards or crashing) and self.prev_lead_status) or nans:
+      self.libmpc.init(MPC_COST_LONG.TTC, MPC_COST_LONG.DISTANCE,
+                       MPC_COST_LONG.ACCELERATION, MPC_COST_LONG.JERK)
+      self.cur_state[0].v_ego = v_ego
+      self.cur_state[0].a_ego = 0.0
+      self.v_mpc = v_ego
+      self.a_mpc = CS.aEgo
+      self.prev_lead_status = False
+
+
+class FakePubMaster():
+  def send(self, s, data):
+    assert data
+
+
+def random_leads(frames):
+  v_ego = 20.
+  leads = [[True, 40., 18.], [True, 70., 25.]]
+  for i in range(frames):
+    msgs = []
+    for lead in leads:
+      if random.random() < 0.02:
+        lead[0] = not lead[0]
+      if random.random() < 0.01:
+        # cut in
+        lead[1] = random.uniform(5., 100.)
+      lead[2] = max(0., lead[2] + random.gauss(0., 0.3))
+      lead[1] = max(1., lead[1] + (lead[2] - v_ego) * 0.05)
+
+      msg = log.RadarState.LeadData.new_message()
+      msg.status = lead[0]
+      msg.dRel = lead[1]
+      msg.vLead = lead[2]
+      msg.aLeadK = random.gauss(0., 0.5)
+      msg.aLeadTau = 1.5
+      msgs.append(msg)
+
+    if i == 100:
+      # nan in the first lead resets only its mpc
+      msgs[0].dRel = float('nan')
+
+    yield v_ego, msgs
+    v_ego = min(30., max(0., v_ego + random.gauss(0., 0.05)))
+
+
+class TestLongitudinalMpcBatch(unittest.TestCase):
+  def test_matches_single_mpcs(self):
+    random.seed(0)
+    pm = FakePubMaster()
+    singles = [SingleLongitudinalMpc(1), SingleLongitudinalMpc(2)]
+    batch = LongitudinalMpcBatch((1, 2))
+
+    for v_ego, leads in random_leads(500):
+      CS = messaging.new_message('carState')
+      CS.carState.vEgo = v_ego
+
+      for mpc, lead in zip(singles, leads):
+        mpc.set_cur_state(v_ego, 0.)
+        mpc.update(CS.carState, lead)
+      batch.set_cur_state(v_ego, 0.)
+      batch.update(pm, CS.carState, leads, 30.)
+
+      for k, mpc in enumerate(singles):
+        self.assertEqual(mpc.prev_lead_status, batch.prev_lead_status[k])
+        self.assertEqual(mpc.new_lead, batch.new_lead[k])
+        for v_single, v_batch in ((mpc.v_mpc, batch.v_mpc[k]), (mpc.a_mpc, batch.a_mpc[k]),
+                                  (mpc.v_mpc_future, batch.v_mpc_future[k])):
+          self.assertTrue(v_single == v_batch or (math.isnan(v_single) and math.isnan(v_batch)))
+        np.testing.assert_array_equal(list(mpc.mpc_solution[0].x_ego), batch.solution['x_ego'][k])
+        np.testing.assert_array_equal(list(mpc.mpc_solution[0].v_ego), batch.solution['v_ego'][k])
+
+
+if __name__ == "__main__":
+  unittest.main()
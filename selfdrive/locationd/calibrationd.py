@@ -8,6 +8,7 @@ import cereal.messaging as messaging
 from selfdrive.locationd.calibration_helpers import Calibration
 from selfdrive.swaglog import cloudlog
 from common.params import Params, put_nonblocking
+from common.profiler import StageTimer
 from common.transformations.model import model_height
 from common.transformations.camera import view_frame_from_device_frame, get_view_frame_from_road_frame, \
                                           get_calib_from_vp, vp_from_rpy, H, W, FOCAL
@@ -151,8 +152,11 @@ def calibrationd_thread(sm=None, pm=None):
   calibrator = Calibrator(param_put=True)
 
   send_counter = 0
+  timer = StageTimer("calibrationd")
   while 1:
+    timer.start()
     sm.update()
+    timer.checkpoint("Wait", ignore=True)
 
     # if no inputs still publish calibration
     if not sm.updated['carState'] and not sm.updated['cameraOdometry']:
@@ -161,9 +165,11 @@ def calibrationd_thread(sm=None, pm=None):
 
     if sm.updated['carState']:
       calibrator.handle_v_ego(sm['carState'].vEgo)
+      # decimate outputs for efficiency
       if send_counter % 25 == 0:
         calibrator.send_data(pm)
       send_counter += 1
+      timer.checkpoint("carState")
 
     if sm.updated['cameraOdometry']:
       new_vp = calibrator.handle_cam_odom(sm['cameraOdometry'].trans,
@@ -174,8 +180,9 @@ def calibrationd_thread(sm=None, pm=None):
 
       if DEBUG and new_vp is not None:
         print('got new vp', new_vp)
+      timer.checkpoint("cameraOdometry")
 
-      # decimate outputs for efficiency
+    timer.end(pm)
 
 
 def main(sm=None, pm=None):
@@ -4,6 +4,7 @@ import signal
 import json
 import numpy as np
 from common.realtime import DT_CTRL
+from common.numpy_fast import Interp1D
 
 CONF_PATH = '/data/ntune/'
 CONF_LQR_FILE = '/data/ntune/lat_lqr.json'
@@ -194,6 +195,7 @@ class nTune():
 
     self.CP.steerMaxBP = [0.0]
     self.CP.steerMaxV = [float(self.config["steerMax"])]
+    self.lqr.steer_max = Interp1D(self.CP.steerMaxBP, self.CP.steerMaxV)
 
     self.lqr.x_hat = np.array([[0], [0]])
     self.lqr.reset()
@@ -211,6 +213,7 @@ class nTune():
 
     self.CP.steerMaxBP = [0.0]
     self.CP.steerMaxV = [float(self.config["steerMax"])]
+    self.indi.steer_max = Interp1D(self.CP.steerMaxBP, self.CP.steerMaxV)
 
     self.indi.reset()
 
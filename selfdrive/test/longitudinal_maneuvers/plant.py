@@ -147,7 +147,8 @@ class Plant():
     # lead car
     self.distance_lead, self.distance_lead_prev = distance_lead , distance_lead
 
-    self.rk = Ratekeeper(rate, print_delay_threshold=100)
+    # spin the last ms before each frame, the plant runs in lockstep with controlsd
+    self.rk = Ratekeeper(rate, print_delay_threshold=100, spin=0.001)
     self.ts = 1./rate
 
     self.cp = get_car_can_parser()
@@ -45,6 +45,9 @@ class FakeSocket:
       self.recv_ready.clear()
     return self.data.pop()
 
+  def receive_many(self, max_msgs=-1):
+    return []
+
   def send(self, data):
     if self.wait:
       wait_for_event(self.recv_called)
@@ -106,6 +109,7 @@ class FakePubMaster(messaging.PubMaster):
   def __init__(self, services):
     self.data = {}
     self.sock = {}
+    self.msg_words = {}
     self.last_updated = None
     for s in services:
       try:
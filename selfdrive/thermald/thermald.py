@@ -10,7 +10,7 @@ from common.android import ANDROID, get_network_type, get_network_strength, get_
 from common.basedir import BASEDIR
 from common.params import Params, put_nonblocking
 from common.realtime import sec_since_boot, DT_TRML
-from common.numpy_fast import clip, interp
+from common.numpy_fast import clip, Interp1D
 from common.filter_simple import FirstOrderFilter
 from selfdrive.version import terms_version, training_version
 from selfdrive.swaglog import cloudlog
@@ -117,6 +117,8 @@ _TEMP_THRS_L = [42.5, 57.5, 72.5, 10000]
 _FAN_SPEEDS = [0, 16384, 32768, 65535]
 # max fan speed only allowed if battery is hot
 _BAT_TEMP_THERSHOLD = 45.
+# uno fan speed in percent from cpu temp
+_FAN_SPEED_UNO = Interp1D([40.0, 80.0], [0, 80])
 
 
 def handle_fan_eon(max_cpu_temp, bat_temp, fan_speed, ignition):
@@ -140,7 +142,7 @@ def handle_fan_eon(max_cpu_temp, bat_temp, fan_speed, ignition):
 
 
 def handle_fan_uno(max_cpu_temp, bat_temp, fan_speed, ignition):
-  new_speed = int(interp(max_cpu_temp, [40.0, 80.0], [0, 80]))
+  new_speed = int(_FAN_SPEED_UNO(max_cpu_temp))
 
   if not ignition:
     new_speed = min(30, new_speed)
@@ -185,7 +187,7 @@ def thermald_thread():
   handle_fan = None
   is_uno = False
 
-  params = Params()
+  params = Params(cache=True)
   pm = PowerMonitoring()
   no_panda_cnt = 0
 